@@ -23,13 +23,13 @@ api_router.include_router(
     tags=["health"],
 )
 
-# Search endpoints (6 endpoints)
+# Search endpoints (9 endpoints)
 api_router.include_router(
     search.router,
     tags=["search"],
 )
 
-# Autocomplete endpoints (3 endpoints)
+# Autocomplete endpoints (4 endpoints)
 api_router.include_router(
     autocomplete.router,
     tags=["autocomplete"],
@@ -41,13 +41,13 @@ api_router.include_router(
     tags=["indexing"],
 )
 
-# Analytics endpoints (4 endpoints)
+# Analytics endpoints (7 endpoints)
 api_router.include_router(
     analytics.router,
     tags=["analytics"],
 )
 
-# Management endpoints (4 endpoints)
+# Management endpoints (15 endpoints)
 api_router.include_router(
     management.router,
     tags=["management"],
@@ -10,7 +10,11 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_current_user
+from app.core.timing import stage_histogram_stats
+from app.services.analytics_pipeline import analytics_pipeline
+from app.services.autocomplete_service import suggestion_flight
 from app.services.search_analytics_service import SearchAnalyticsService
+from app.services.search_service import search_flight
 
 router = APIRouter()
 
@@ -91,3 +95,50 @@ async def get_performance_metrics(
     """
     service = SearchAnalyticsService(db)
     return await service.get_performance_metrics(days)
+
+
+@router.get("/analytics/pipeline")
+async def get_pipeline_stats(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get background analytics pipeline counters.
+    
+    Requires authentication.
+    
+    Returns queue depth and how many events were flushed, dropped
+    or sampled out under load.
+    """
+    return analytics_pipeline.stats()
+
+
+@router.get("/analytics/timings")
+async def get_search_timings(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get histograms of time spent per search stage.
+    
+    Requires authentication.
+    
+    Stages are parse, coalesce (waiting on an identical search in flight),
+    cache, count, fetch (including SQL highlighting), hydrate, highlight
+    (Python highlighting), analytics and serialize, in milliseconds since
+    the process started.
+    """
+    return stage_histogram_stats()
+
+
+@router.get("/analytics/coalescing")
+async def get_coalescing_stats(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get request coalescing counters.
+    
+    Requires authentication.
+    
+    Per layer (search, autocomplete): executions run, requests that shared
+    another request's execution, and the share of requests coalesced.
+    """
+    return {
+        "search": search_flight.stats(),
+        "autocomplete": suggestion_flight.stats(),
+    }
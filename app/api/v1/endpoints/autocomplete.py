@@ -10,8 +10,15 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_current_user, get_current_user_optional
-from app.schemas.search import AutoCompleteRequest, AutoCompleteResponse
+from app.schemas.search import (
+    AutoCompleteRequest,
+    AutoCompleteResponse,
+    SpellingCorrection,
+    SpellingResponse,
+)
+from app.search.query_parser import parse_query
 from app.services.autocomplete_service import AutoCompleteService
+from app.services.spelling_corrector import spelling_corrector
 
 router = APIRouter()
 
@@ -76,3 +83,30 @@ async def get_recent_searches(
         query="",
         suggestions=suggestions
     )
+
+
+@router.get("/autocomplete/spelling", response_model=SpellingResponse)
+async def get_spelling_suggestions(
+    query: str = Query(..., min_length=1, max_length=500),
+    language: str = Query(None, max_length=10),
+    limit: int = Query(5, ge=1, le=20),
+    db: AsyncSession = Depends(get_db)
+) -> SpellingResponse:
+    """Get "did you mean" suggestions for a query.
+    
+    Words whose stem was never indexed get the indexed words within a
+    couple of edits, from an in-process dictionary.
+    """
+    parsed_query = parse_query(query, language)
+    corrections = await spelling_corrector.corrections(db, parsed_query, limit)
+    
+    return SpellingResponse(
+        query=query,
+        did_you_mean=spelling_corrector.respell(parsed_query, corrections),
+        corrections=[
+            SpellingCorrection(
+                word=word, suggestions=[suggestion.term for suggestion in suggestions]
+            )
+            for word, suggestions in corrections.items()
+        ]
+    )
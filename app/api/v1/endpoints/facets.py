@@ -6,11 +6,14 @@ API endpoints for faceted search.
 from typing import List, Dict, Any
 
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_current_user_optional
+from app.core.config import settings
 from app.schemas.search import FacetRequest, FacetResponse, FacetOption
 from app.services.facet_service import FacetService
+from app.services.search_service import SearchTimeoutError, is_statement_timeout
 
 router = APIRouter()
 
@@ -27,9 +30,18 @@ async def get_facets(
     - Languages
     - Authors
     - Status
+    
+    Aggregations running past SEARCH_FACET_TIMEOUT_SECONDS fail with 504.
     """
     service = FacetService(db)
-    return await service.get_facets(request)
+    try:
+        return await service.get_facets(request)
+    except DBAPIError as e:
+        if is_statement_timeout(e):
+            raise SearchTimeoutError(
+                f"Facets exceeded their {settings.SEARCH_FACET_TIMEOUT_SECONDS}s budget"
+            ) from e
+        raise
 
 
 @router.get("/facets/options", response_model=List[FacetOption])
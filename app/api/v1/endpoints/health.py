@@ -7,11 +7,13 @@ import logging
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.db.session import get_db
+from app.services.search_warmup import search_warmup
 
 logger = logging.getLogger(__name__)
 
@@ -50,7 +52,8 @@ async def readiness_check(db: AsyncSession = Depends(get_db)):
     """Readiness check endpoint.
     
     This endpoint checks if the service is ready to handle requests.
-    It verifies database connectivity and other critical dependencies.
+    It verifies database connectivity and other critical dependencies,
+    and that the startup warm-up has finished.
     Use this for Kubernetes readiness probes.
     """
     checks = {
@@ -72,10 +75,17 @@ async def readiness_check(db: AsyncSession = Depends(get_db)):
         checks["checks"]["database"] = "disconnected"
         checks["status"] = "not ready"
     
+    # Cold workers answer the first searches slowly; wait for the warm-up
+    if search_warmup.ready:
+        checks["checks"]["warmup"] = "complete"
+    else:
+        checks["checks"]["warmup"] = "in progress"
+        checks["status"] = "not ready"
+    
     # Add more dependency checks here (Redis, Kafka, etc.)
     
     # Return appropriate status code
     if checks["status"] == "not ready":
-        return checks, status.HTTP_503_SERVICE_UNAVAILABLE
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=checks)
     
     return checks
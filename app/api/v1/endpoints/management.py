@@ -10,9 +10,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.api.deps import get_db, get_current_user
+from app.core.config import settings
 from app.models.index_job import IndexJob, JobStatus
 from app.schemas.index_job import IndexJobResponse
+from app.services.click_boost_aggregator import click_boost_aggregator
 from app.services.indexing_service import IndexingService
+from app.services.search_warmup import search_warmup
+from app.services.semantic_index import semantic_index
+from app.services.slow_query_recorder import slow_query_recorder
+from app.services.spelling_corrector import spelling_corrector
+from app.services.synonym_loader import synonym_loader
 
 router = APIRouter()
 
@@ -115,3 +122,149 @@ async def list_index_jobs(
     jobs = result.scalars().all()
     
     return [IndexJobResponse.from_orm(job) for job in jobs]
+
+
+@router.get("/management/slow-queries")
+async def list_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """List recently captured slow queries.
+    
+    Requires authentication.
+    
+    Each entry has the kind (search, facets, autocomplete), normalized
+    query text, filters, stage timings, the SQL as run and, for sampled
+    entries, the EXPLAIN (ANALYZE, BUFFERS) plan as JSON. Newest first.
+    """
+    return {
+        **slow_query_recorder.stats(),
+        "queries": slow_query_recorder.list(limit),
+    }
+
+
+@router.delete("/management/slow-queries")
+async def clear_slow_queries(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Empty the slow-query buffer.
+    
+    Requires authentication.
+    """
+    slow_query_recorder.clear()
+    return {"success": True}
+
+
+@router.get("/management/spelling")
+async def get_spelling_dictionary_status(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get the state of the spelling dictionary.
+    
+    Requires authentication.
+    """
+    return spelling_corrector.stats()
+
+
+@router.post("/management/spelling/refresh")
+async def refresh_spelling_dictionary(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Rebuild the spelling dictionary of this worker now.
+    
+    Requires authentication.
+    """
+    await spelling_corrector.load()
+    return spelling_corrector.stats()
+
+
+@router.get("/management/synonyms")
+async def get_synonym_status(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get the loaded synonym rules' statistics.
+    
+    Requires authentication.
+    """
+    return synonym_loader.stats()
+
+
+@router.post("/management/synonyms/reload")
+async def reload_synonyms(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Reload synonym rules on this worker now.
+    
+    Requires authentication. Other workers pick the rules up within
+    SEARCH_SYNONYMS_REFRESH_SECONDS.
+    """
+    changed = await synonym_loader.load()
+    return {"changed": changed, **synonym_loader.stats()}
+
+
+@router.get("/management/semantic")
+async def get_semantic_index_status(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get the state of the semantic (ANN) index of this worker.
+    
+    Requires authentication.
+    """
+    return semantic_index.stats()
+
+
+@router.post("/management/semantic/rebuild")
+async def rebuild_semantic_index(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Backfill missing embeddings and rebuild the semantic index of this worker now.
+    
+    Requires authentication.
+    """
+    if not settings.SEARCH_SEMANTIC_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Semantic retrieval is disabled (SEARCH_SEMANTIC_ENABLED)"
+        )
+    await semantic_index.load(force=True)
+    return semantic_index.stats()
+
+
+@router.get("/management/click-boosts")
+async def get_click_boost_status(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get the state of the click boosts rebuilt by this worker.
+    
+    Requires authentication.
+    """
+    return click_boost_aggregator.stats()
+
+
+@router.post("/management/click-boosts/rebuild")
+async def rebuild_click_boosts(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Rebuild the click boosts from recent clicks now.
+    
+    Requires authentication. `rebuilt` is false when another worker is
+    rebuilding them.
+    """
+    if not settings.SEARCH_CLICK_BOOSTS_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Click boosts are disabled (SEARCH_CLICK_BOOSTS_ENABLED)"
+        )
+    rebuilt = await click_boost_aggregator.aggregate(force=True)
+    return {"rebuilt": rebuilt, **click_boost_aggregator.stats()}
+
+
+@router.get("/management/warmup")
+async def get_warmup_status(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get the outcome of this worker's startup warm-up.
+    
+    Requires authentication.
+    """
+    return search_warmup.stats()
@@ -3,26 +3,56 @@
 API endpoints for search operations.
 """
 
-from typing import Optional
+import time
+from typing import Any, Dict, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db, get_current_user_optional
+from app.api.deps import get_db, get_current_user, get_current_user_optional
+from app.core.config import settings
+from app.core.timing import search_stage_histograms
 from app.models.search_index import DocumentType
-from app.schemas.search import SearchRequest, SearchResponse
-from app.services.search_service import SearchService
+from app.schemas.search import (
+    ClickRequest,
+    MultiSearchRequest,
+    MultiSearchResponse,
+    SearchRequest,
+    SearchResponse,
+)
+from app.services.analytics_pipeline import analytics_pipeline
+from app.services.search_analytics_service import SearchAnalyticsService
+from app.services.search_service import SearchService, export_slots
 
 router = APIRouter()
 
 
+def timed_response(service: SearchService, response: SearchResponse) -> Response:
+    """Serialize a search response, adding a Server-Timing header with its stages.
+    
+    Serialization is done here rather than by FastAPI so that it can be
+    timed; it shows up in the header and histograms but not in the body's
+    ``timings``, which are serialized with it.
+    """
+    with service.timer.stage("serialize"):
+        body = response.model_dump_json()
+    search_stage_histograms["serialize"].observe(service.timer.timings["serialize"])
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"Server-Timing": service.timer.server_timing()}
+    )
+
+
 @router.post("/search", response_model=SearchResponse)
 async def universal_search(
     request: SearchRequest,
     db: AsyncSession = Depends(get_db),
     current_user: Optional[dict] = Depends(get_current_user_optional)
-) -> SearchResponse:
+) -> Response:
     """Universal search across all content types.
     
     - **query**: Search query (required)
@@ -33,7 +63,114 @@ async def universal_search(
     """
     service = SearchService(db)
     user_id = UUID(current_user["sub"]) if current_user else None
-    return await service.search(request, user_id)
+    response = await service.search(request, user_id)
+    return timed_response(service, response)
+
+
+@router.post("/search/msearch", response_model=MultiSearchResponse)
+async def multi_search(
+    request: MultiSearchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[dict] = Depends(get_current_user_optional)
+) -> MultiSearchResponse:
+    """Run several searches in one call.
+    
+    Searches run concurrently, each on its own pooled connection; responses
+    are returned in the order of `searches`. Limit a search to a type (as
+    the per-type endpoints do) with its `document_types`.
+    
+    A search with an invalid cursor or out of time is answered with
+    `{status, type, detail}` in its place; the other searches still are.
+    """
+    if len(request.searches) > settings.SEARCH_MSEARCH_MAX_SEARCHES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.SEARCH_MSEARCH_MAX_SEARCHES} searches per msearch call",
+        )
+    
+    start_time = time.time()
+    service = SearchService(db)
+    user_id = UUID(current_user["sub"]) if current_user else None
+    responses = await service.msearch(request.searches, user_id)
+    return MultiSearchResponse(
+        responses=responses,
+        execution_time=(time.time() - start_time) * 1000
+    )
+
+
+@router.post("/search/export")
+async def export_search(
+    request: SearchRequest,
+    current_user: dict = Depends(get_current_user)
+) -> StreamingResponse:
+    """Export matches as NDJSON (one search result per line).
+    
+    Accepts the same filters and sorting as /search; `page`, `page_size`
+    and `cursor` are ignored. Exports stop after SEARCH_EXPORT_MAX_ROWS
+    results and then end with a `{"truncated": true, "max_rows": N}` line.
+    Set `highlight` to false for faster exports.
+    
+    Requires authentication. Answers 429 while this worker is already
+    streaming SEARCH_EXPORT_CONCURRENCY exports.
+    """
+    # Checked and taken without awaiting in between, so no other export
+    # can take the slot in the meantime
+    if export_slots.locked():
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many exports running, retry later",
+        )
+    await export_slots.acquire()
+    released = False
+    
+    def release_slot() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            export_slots.release()
+    
+    # The export opens its own session, which outlives this request
+    service = SearchService(None)
+    
+    async def stream():
+        try:
+            async for chunk in service.export(request):
+                yield chunk
+        finally:
+            release_slot()
+    
+    # The background task releases the slot when the client went away
+    # before the stream started or while it was suspended
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(release_slot),
+    )
+
+
+@router.post("/search/click")
+async def record_click(
+    request: ClickRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[dict] = Depends(get_current_user_optional)
+) -> Dict[str, Any]:
+    """Record that a result of a search was opened.
+    
+    - **query_id**: `query_id` of the search response
+    - **result_id**: `id` of the opened result
+    
+    Clicks feed the click boosts of later searches. `recorded` is false
+    when the search is unknown (analytics may have shed it under load), did
+    not return the result, or was made by another signed-in user.
+    """
+    user_id = UUID(current_user["sub"]) if current_user else None
+    # The search may still be waiting in the analytics pipeline
+    recorded = analytics_pipeline.record_click(request.query_id, request.result_id, user_id)
+    if recorded is None:
+        recorded = await SearchAnalyticsService(db).track_click(
+            request.query_id, request.result_id, user_id
+        )
+    return {"recorded": recorded}
 
 
 @router.post("/search/content", response_model=SearchResponse)
@@ -41,7 +178,7 @@ async def search_content(
     request: SearchRequest,
     db: AsyncSession = Depends(get_db),
     current_user: Optional[dict] = Depends(get_current_user_optional)
-) -> SearchResponse:
+) -> Response:
     """Search content (articles, stories).
     
     Searches only within article and story document types.
@@ -52,7 +189,8 @@ async def search_content(
     # Filter to content types
     request.document_types = [DocumentType.ARTICLE, DocumentType.STORY]
     
-    return await service.search(request, user_id)
+    response = await service.search(request, user_id)
+    return timed_response(service, response)
 
 
 @router.post("/search/partners", response_model=SearchResponse)
@@ -60,14 +198,15 @@ async def search_partners(
     request: SearchRequest,
     db: AsyncSession = Depends(get_db),
     current_user: Optional[dict] = Depends(get_current_user_optional)
-) -> SearchResponse:
+) -> Response:
     """Search partners.
     
     Searches only within partner document type.
     """
     service = SearchService(db)
     user_id = UUID(current_user["sub"]) if current_user else None
-    return await service.search_by_type(DocumentType.PARTNER, request, user_id)
+    response = await service.search_by_type(DocumentType.PARTNER, request, user_id)
+    return timed_response(service, response)
 
 
 @router.post("/search/projects", response_model=SearchResponse)
@@ -75,14 +214,15 @@ async def search_projects(
     request: SearchRequest,
     db: AsyncSession = Depends(get_db),
     current_user: Optional[dict] = Depends(get_current_user_optional)
-) -> SearchResponse:
+) -> Response:
     """Search projects.
     
     Searches only within project document type.
     """
     service = SearchService(db)
     user_id = UUID(current_user["sub"]) if current_user else None
-    return await service.search_by_type(DocumentType.PROJECT, request, user_id)
+    response = await service.search_by_type(DocumentType.PROJECT, request, user_id)
+    return timed_response(service, response)
 
 
 @router.post("/search/social", response_model=SearchResponse)
@@ -90,14 +230,15 @@ async def search_social(
     request: SearchRequest,
     db: AsyncSession = Depends(get_db),
     current_user: Optional[dict] = Depends(get_current_user_optional)
-) -> SearchResponse:
+) -> Response:
     """Search social media posts.
     
     Searches only within social post document type.
     """
     service = SearchService(db)
     user_id = UUID(current_user["sub"]) if current_user else None
-    return await service.search_by_type(DocumentType.SOCIAL_POST, request, user_id)
+    response = await service.search_by_type(DocumentType.SOCIAL_POST, request, user_id)
+    return timed_response(service, response)
 
 
 @router.post("/search/notifications", response_model=SearchResponse)
@@ -105,11 +246,12 @@ async def search_notifications(
     request: SearchRequest,
     db: AsyncSession = Depends(get_db),
     current_user: Optional[dict] = Depends(get_current_user_optional)
-) -> SearchResponse:
+) -> Response:
     """Search notifications.
     
     Searches only within notification document type.
     """
     service = SearchService(db)
     user_id = UUID(current_user["sub"]) if current_user else None
-    return await service.search_by_type(DocumentType.NOTIFICATION, request, user_id)
+    response = await service.search_by_type(DocumentType.NOTIFICATION, request, user_id)
+    return timed_response(service, response)
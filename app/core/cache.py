@@ -0,0 +1,260 @@
+"""Search result cache.
+
+Caches serialized search responses keyed by a normalized fingerprint of the
+request. Entries are invalidated through per-document_type generation
+counters: every indexing write bumps the counter of the affected type, and
+the counters of the searched types are part of the cache key, so stale
+entries are simply never read again and expire through their TTL.
+
+Redis is used in deployed environments; an in-process backend is available
+for tests and single-process development.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.models.search_index import DocumentType
+from app.schemas.search import SearchRequest, SearchResponse
+
+logger = logging.getLogger(__name__)
+
+# Settings that change the ranking of a request without changing the request
+RANKING_SETTINGS = (
+    "SEARCH_RANKING",
+    "SEARCH_TWO_PHASE_RANKING",
+    "SEARCH_RANK_CANDIDATES",
+    "SEARCH_CANDIDATE_ORDER",
+    "SEARCH_BM25_K1",
+    "SEARCH_BM25_B",
+    "SEARCH_RANKING_PROFILES",
+    "SEARCH_CLICK_BOOSTS_ENABLED",
+    "SEARCH_CLICK_BOOST_MIN_CLICKS",
+    "SEARCH_CLICK_BOOST_PRIOR_SEARCHES",
+    "SEARCH_CLICK_BOOST_QUERY_WEIGHT",
+    "SEARCH_CLICK_BOOST_DOCUMENT_WEIGHT",
+    "SEARCH_CLICK_BOOST_MAX",
+)
+
+
+def request_fingerprint(request: SearchRequest) -> str:
+    """Hash of the normalized request.
+
+    Query whitespace and case, the order of document types and the
+    order of metadata filter keys do not change the result, so they are
+    normalized away before hashing. The ranking settings are hashed too, so
+    workers ranking differently (say, during a deploy) never share entries.
+    """
+    payload = request.model_dump(mode="json")
+    # Timings are added per call and never cached
+    payload.pop("include_timings", None)
+    payload["query"] = " ".join(request.query.lower().split())
+    if payload.get("document_types"):
+        payload["document_types"] = sorted(payload["document_types"])
+    payload["ranking_settings"] = {name: getattr(settings, name) for name in RANKING_SETTINGS}
+
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class InMemoryCacheBackend:
+    """Process-local cache backend with TTL support.
+
+    Entries with a TTL are bounded to ``max_entries``, evicting the least
+    recently used. Entries without one (generation counters) are few and
+    never evicted: losing a counter would make stale entries readable again.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._persistent: Dict[str, str] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        if key in self._persistent:
+            return self._persistent[key]
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        if not ttl:
+            self._data.pop(key, None)
+            self._persistent[key] = value
+            return
+
+        self._persistent.pop(key, None)
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def incr(self, key: str) -> int:
+        value = int(await self.get(key) or 0) + 1
+        await self.set(key, str(value))
+        return value
+
+    async def close(self) -> None:
+        self._data.clear()
+        self._persistent.clear()
+
+
+class RedisCacheBackend:
+    """Redis cache backend."""
+
+    def __init__(self, url: str):
+        self.client = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        return await self.client.mget(keys)
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        await self.client.set(key, value, ex=ttl)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class SearchCache:
+    """Cache of search responses with generation-based invalidation.
+
+    Cache failures are logged and treated as misses so that an unavailable
+    Redis never fails a search.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        ttl: int = 300,
+        zero_result_ttl: int = 60,
+        prefix: str = "search"
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.zero_result_ttl = zero_result_ttl
+        self.prefix = prefix
+
+    async def get_response(self, request: SearchRequest) -> Optional[SearchResponse]:
+        """Return the cached response for a request, if any."""
+        try:
+            key = await self._response_key(request)
+            payload = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Search cache read failed: {e}")
+            return None
+
+        if payload is None:
+            return None
+        return SearchResponse.model_validate_json(payload)
+
+    async def set_response(self, request: SearchRequest, response: SearchResponse) -> None:
+        """Store a response; zero-result answers are kept for a shorter time."""
+        ttl = self.ttl if response.total_count > 0 else self.zero_result_ttl
+        try:
+            key = await self._response_key(request)
+            await self.backend.set(key, response.model_dump_json(), ttl)
+        except Exception as e:
+            logger.warning(f"Search cache write failed: {e}")
+
+    async def invalidate(self, document_types: Iterable[DocumentType]) -> None:
+        """Invalidate cached results covering the given document types."""
+        for document_type in set(document_types):
+            try:
+                await self.backend.incr(self._generation_key(document_type))
+            except Exception as e:
+                logger.warning(f"Search cache invalidation failed for {document_type.value}: {e}")
+
+    async def invalidate_all(self) -> None:
+        """Invalidate every cached result."""
+        await self.invalidate(DocumentType)
+
+    async def invalidate_on_change(self, source: str, digest: str) -> bool:
+        """Invalidate every cached result unless ``source`` is still at ``digest``.
+
+        The digest last seen is kept in the backend, so a restart with the
+        same ``source``, or another worker that already invalidated for it,
+        leaves the cache alone. Returns whether it invalidated.
+        """
+        key = f"{self.prefix}:source:{source}"
+        try:
+            if await self.backend.get(key) == digest:
+                return False
+            await self.backend.set(key, digest)
+        except Exception as e:
+            logger.warning(f"Search cache read failed for {source}: {e}")
+        await self.invalidate_all()
+        return True
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def fingerprint(self, request: SearchRequest) -> str:
+        return request_fingerprint(request)
+
+    async def _response_key(self, request: SearchRequest) -> str:
+        document_types = sorted(
+            request.document_types or list(DocumentType),
+            key=lambda document_type: document_type.value
+        )
+        generations = await self.backend.mget(
+            [self._generation_key(document_type) for document_type in document_types]
+        )
+        generation_tag = ".".join(generation or "0" for generation in generations)
+        return f"{self.prefix}:result:{self.fingerprint(request)}:{generation_tag}"
+
+    def _generation_key(self, document_type: DocumentType) -> str:
+        return f"{self.prefix}:generation:{document_type.value}"
+
+
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """Return the shared search cache, or None when caching is disabled."""
+    global _search_cache
+
+    if not settings.SEARCH_CACHE_ENABLED:
+        return None
+
+    if _search_cache is None:
+        if settings.SEARCH_CACHE_BACKEND == "memory":
+            backend = InMemoryCacheBackend(settings.SEARCH_CACHE_MAX_ENTRIES)
+        else:
+            backend = RedisCacheBackend(settings.REDIS_URL)
+        _search_cache = SearchCache(
+            backend,
+            ttl=settings.SEARCH_CACHE_TTL_SECONDS,
+            zero_result_ttl=settings.SEARCH_CACHE_ZERO_RESULT_TTL_SECONDS,
+        )
+    return _search_cache
+
+
+async def close_search_cache() -> None:
+    """Release the shared cache's connections."""
+    global _search_cache
+
+    if _search_cache is not None:
+        await _search_cache.close()
+        _search_cache = None
@@ -5,7 +5,7 @@ Different configurations can be used for dev/staging/prod environments.
 """
 
 import secrets
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from pydantic import AnyHttpUrl, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -63,6 +63,13 @@ class Settings(BaseSettings):
     # Redis (for caching, sessions, etc.)
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Search result cache
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_BACKEND: str = "redis"  # redis or memory
+    SEARCH_CACHE_TTL_SECONDS: int = 300
+    SEARCH_CACHE_ZERO_RESULT_TTL_SECONDS: int = 60
+    SEARCH_CACHE_MAX_ENTRIES: int = 10000  # Results kept by the memory backend, LRU evicted
+    
     # Kafka (for event-driven architecture)
     KAFKA_BOOTSTRAP_SERVERS: str = "localhost:9092"
     KAFKA_TOPIC_PREFIX: str = "search_service"
@@ -80,10 +87,129 @@ class Settings(BaseSettings):
     # Search Settings
     SEARCH_MAX_RESULTS: int = 100
     SEARCH_DEFAULT_PAGE_SIZE: int = 20
-    SEARCH_TIMEOUT_SECONDS: int = 30
+    SEARCH_TIMEOUT_SECONDS: int = 30  # Statement time budget of a whole search
+    SEARCH_COUNT_TIMEOUT_SECONDS: float = 2.0  # Counts running longer are dropped (timed_out)
+    SEARCH_FACET_TIMEOUT_SECONDS: float = 5.0  # Facets running longer are dropped (timed_out)
+    SEARCH_DEFAULT_LANGUAGE: str = "en"  # Query language when the request has none
+    SEARCH_PREFIX_MIN_LENGTH: int = 3  # Shorter terms are matched exactly, not as prefixes
+    SEARCH_QUERY_CACHE_SIZE: int = 4096  # Parsed queries kept in the LRU
+    SEARCH_SNIPPET_LENGTH: int = 200  # Characters of content returned as the snippet
+    SEARCH_SQL_HIGHLIGHT: bool = True  # Highlight with ts_headline instead of in Python
+    SEARCH_HEADLINE_SOURCE_CHARS: int = 5000  # Leading content characters ts_headline looks at
+    SEARCH_HEADLINE_OPTIONS: str = (
+        "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+    )
+    SEARCH_TITLE_HEADLINE_OPTIONS: str = "StartSel=<mark>, StopSel=</mark>, HighlightAll=true"
+    SEARCH_SINGLE_ROUNDTRIP: bool = True  # Fetch the page and the total count in one statement
+    # Counting of matches: true = exact, false = skip, N = stop counting at N
+    SEARCH_TRACK_TOTAL_HITS: Union[bool, int] = True
+    SEARCH_RANKING: str = "ts_rank"  # Relevance ranking: ts_rank, ts_rank_cd or bm25
+    # Rank only SEARCH_RANK_CANDIDATES matches (always on for bm25)
+    SEARCH_TWO_PHASE_RANKING: bool = False
+    SEARCH_RANK_CANDIDATES: int = 1000  # Matches ranked per search in two-phase ranking
+    SEARCH_CANDIDATE_ORDER: str = "title_first"  # Candidate selection: title_first or recent
+    SEARCH_BM25_STATS_ENABLED: bool = True  # Maintain lexeme and corpus statistics on index writes
+    SEARCH_BM25_K1: float = 1.2  # BM25 term frequency saturation
+    SEARCH_BM25_B: float = 0.75  # BM25 document length normalization
+    # Relevance weights, normalization and recency decay per document type ("default" for the rest)
+    SEARCH_RANKING_PROFILES: Dict[str, Dict[str, Any]] = {
+        "default": {"weights": {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}, "normalization": 0},
+        "notification": {"decay": {"function": "exp", "scale_days": 7, "floor": 0.1}},
+        "social_post": {"decay": {"function": "exp", "scale_days": 30, "floor": 0.25}},
+    }
+    # Identical concurrent searches and autocompletes share one execution
+    SEARCH_COALESCE_REQUESTS: bool = True
+    SEARCH_MSEARCH_MAX_SEARCHES: int = 10  # Searches accepted per msearch call
+    # Searches of all msearch calls running at once per worker, one connection each
+    SEARCH_MSEARCH_CONCURRENCY: int = 4
+    SEARCH_EXPORT_BATCH_SIZE: int = 1000  # Rows fetched per server-side cursor round trip
+    # Rows an export stops after, ending with a "truncated" line
+    SEARCH_EXPORT_MAX_ROWS: int = 1000000
+    SEARCH_EXPORT_TIMEOUT_SECONDS: int = 120  # statement_timeout of each fetch of an export
+    SEARCH_EXPORT_CONCURRENCY: int = 2  # Exports streaming at once per worker, one connection each
+    SEARCH_TYPO_FALLBACK: bool = True  # Retry searches that match nothing with typos corrected
+    SEARCH_TYPO_LEXEME_CORRECTION: bool = True  # Correct words against search_term_stats first
+    SEARCH_TYPO_MIN_WORD_LENGTH: int = 4  # Shorter words are never corrected
+    SEARCH_TYPO_LEXEME_SIMILARITY: float = 0.4  # pg_trgm similarity a replacement lexeme needs
+    SEARCH_TYPO_TITLE_SIMILARITY: float = 0.5  # pg_trgm word similarity a title needs to match
+    SEARCH_TYPO_CANDIDATES: int = 100  # Rows counted and ranked by the fallback
+    SEARCH_TYPO_TIMEOUT_SECONDS: float = 1.0  # Statement time budget of the whole fallback
     AUTOCOMPLETE_MIN_LENGTH: int = 2
     AUTOCOMPLETE_MAX_SUGGESTIONS: int = 10
     
+    # In-process BM25 index serving searches limited to small, hot document types
+    SEARCH_MEMORY_INDEX_ENABLED: bool = False  # Serves date and indexing time sorts only
+    SEARCH_MEMORY_INDEX_TYPES: List[str] = ["partner", "project", "campaign"]
+    SEARCH_MEMORY_INDEX_REFRESH_SECONDS: int = 300  # Full rebuild, picks up other workers' writes
+    
+    # In-process "did you mean" dictionary of the indexed words
+    SPELLING_ENABLED: bool = True
+    SPELLING_REFRESH_SECONDS: int = 3600  # Full rebuild, which reads every indexed document
+    SPELLING_LOAD_TIMEOUT_SECONDS: int = 300  # statement_timeout of each rebuild
+    SPELLING_MAX_EDIT_DISTANCE: int = 2
+    SPELLING_PREFIX_LENGTH: int = 7  # Deletes are generated from this many leading characters
+    SPELLING_MIN_DOCUMENT_COUNT: int = 2  # Rarer words (often typos themselves) are left out
+    SPELLING_SUGGEST_MAX_HITS: int = 0  # Searches with at most this many results get did_you_mean
+    
+    # Synonym and acronym expansion of query terms
+    SEARCH_SYNONYMS_ENABLED: bool = True
+    SEARCH_SYNONYMS_FILE: Optional[str] = None  # Solr-format rules, added to the table's rules
+    SEARCH_SYNONYMS_REFRESH_SECONDS: int = 300  # Reload interval, picks up edits without a restart
+    
+    # Hybrid lexical + semantic retrieval
+    SEARCH_SEMANTIC_ENABLED: bool = False  # Embed indexed documents and serve mode=hybrid
+    SEARCH_MODE: str = "lexical"  # Default retrieval mode: lexical or hybrid
+    SEARCH_EMBEDDING_DIMENSIONS: int = 256  # Output size of the hashing embedder
+    # Directory the ANN index is saved to and memory-mapped from, shared by the host's workers
+    SEARCH_SEMANTIC_INDEX_PATH: Optional[str] = None
+    SEARCH_SEMANTIC_REFRESH_SECONDS: int = 900  # Full ANN rebuild, picks up other workers' writes
+    SEARCH_ANN_LISTS: int = 0  # IVF lists; 0 picks about sqrt(documents)
+    SEARCH_ANN_PROBES: int = 8  # IVF lists scanned per query
+    SEARCH_HYBRID_CANDIDATES: int = 200  # Candidates taken from each of the two retrievers
+    SEARCH_RRF_K: int = 60  # Reciprocal rank fusion constant
+    
+    # Relevance boosts learned from result clicks
+    SEARCH_CLICK_BOOSTS_ENABLED: bool = False  # Aggregate clicks, multiply relevance by the boosts
+    SEARCH_CLICK_BOOST_REFRESH_SECONDS: int = 3600  # Rebuild interval, done by one of the workers
+    SEARCH_CLICK_BOOST_WINDOW_DAYS: int = 90  # Searches and clicks older than this are not counted
+    SEARCH_CLICK_BOOST_MIN_CLICKS: int = 3  # Results clicked fewer times are not boosted
+    # Smoothing: click-through is clicks / (searches + this)
+    SEARCH_CLICK_BOOST_PRIOR_SEARCHES: int = 10
+    # A result clicked on every search of a query nears 1 + this
+    SEARCH_CLICK_BOOST_QUERY_WEIGHT: float = 1.0
+    # The most clicked result overall gets 1 + this for any query
+    SEARCH_CLICK_BOOST_DOCUMENT_WEIGHT: float = 0.2
+    SEARCH_CLICK_BOOST_MAX: float = 2.0  # Cap of the per-query boost
+    
+    # Replay of popular searches at startup; /ready reports ready once it is over
+    SEARCH_WARMUP_ENABLED: bool = True
+    SEARCH_WARMUP_QUERIES: int = 50  # Most popular queries replayed
+    SEARCH_WARMUP_DAYS: int = 7  # Window the popularity is counted over
+    SEARCH_WARMUP_CONCURRENCY: int = 4  # Replays running at once, each on its own connection
+    # pg_prewarm the relations below first (needs CREATE EXTENSION pg_prewarm)
+    SEARCH_WARMUP_PREWARM: bool = False
+    SEARCH_WARMUP_PREWARM_RELATIONS: List[str] = ["idx_search_vector"]
+    SEARCH_WARMUP_TIMEOUT_SECONDS: float = 60.0  # Ready after this even if replays still run
+    
+    # Search analytics (recorded off the request path)
+    ANALYTICS_ASYNC_ENABLED: bool = True
+    ANALYTICS_QUEUE_SIZE: int = 10000
+    ANALYTICS_BATCH_SIZE: int = 500
+    ANALYTICS_FLUSH_INTERVAL_SECONDS: float = 1.0
+    # sample (thin out above the watermark) or drop (only when full)
+    ANALYTICS_OVERFLOW_POLICY: str = "sample"
+    ANALYTICS_SAMPLE_WATERMARK: float = 0.8  # Queue fill ratio where sampling starts
+    ANALYTICS_SAMPLE_RATE: float = 0.1  # Share of events kept above the watermark
+    ANALYTICS_DRAIN_TIMEOUT_SECONDS: float = 10.0
+    
+    # Slow query capture (search, facet and autocomplete statements)
+    SLOW_QUERY_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 500.0
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 1.0  # Share of slow queries re-run under EXPLAIN
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = 60.0  # At most one EXPLAIN per interval
+    SLOW_QUERY_EXPLAIN_TIMEOUT_SECONDS: float = 30.0
+    SLOW_QUERY_BUFFER_SIZE: int = 100  # Most recent slow queries kept
+    
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "json"  # json or text
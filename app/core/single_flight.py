@@ -0,0 +1,54 @@
+"""Single Flight
+
+Coalesces concurrent identical calls: while a call for a key is in flight,
+further callers with the same key wait for its result instead of starting
+their own. Nothing is kept once the call completes, so this is not a cache;
+it only flattens bursts of identical requests.
+
+The shared call runs as its own task, so a caller that goes away (a client
+disconnect cancelling its request) does not cancel it for the others.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Shares one in-flight execution among concurrent callers of a key."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run ``fn`` unless a call for ``key`` is in flight.
+
+        Returns the result and whether it was shared from another caller's
+        execution. Shared results are the same object for every caller, so
+        callers that mutate them must copy them first.
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+            self.executions += 1
+
+        return await asyncio.shield(task), shared
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.executions + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalescing_ratio": round(self.coalesced / requests, 4) if requests else 0.0,
+        }
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
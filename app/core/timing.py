@@ -0,0 +1,97 @@
+"""Stage Timing
+
+Per-stage wall-clock timing of searches. A StageTimer collects how long each
+stage of one search took; the module-level histograms aggregate the stages
+of every search for the analytics timing endpoint.
+
+Nested stages are exclusive: time spent in an inner stage (highlighting
+inside hydration, say) is not counted again in the outer one.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Mapping, Sequence
+
+SEARCH_STAGES = (
+    "parse", "coalesce", "cache", "count", "fetch", "vector", "hydrate", "highlight",
+    "typo", "spelling", "analytics", "serialize",
+)
+
+# Bucket upper bounds in milliseconds
+DEFAULT_BOUNDS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """Fixed-bucket histogram of millisecond durations."""
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, object]:
+        """Cumulative bucket counts, as Prometheus reports them."""
+        buckets = {}
+        running = 0
+        for bound, count in zip([*self.bounds, "+Inf"], self.counts):
+            running += count
+            buckets[str(bound)] = running
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum, 3),
+            "mean_ms": round(self.sum / self.count, 3) if self.count else None,
+            "buckets": buckets,
+        }
+
+
+class StageTimer:
+    """Accumulates the time spent in each stage of one search."""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._stack: List[List[float]] = []  # [start, time spent in nested stages]
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        frame = [time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = (time.perf_counter() - frame[0]) * 1000
+            self.add(name, elapsed - frame[1])
+            if self._stack:
+                self._stack[-1][1] += elapsed
+
+    def add(self, name: str, milliseconds: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + milliseconds
+
+    def rounded(self) -> Dict[str, float]:
+        return {name: round(value, 3) for name, value in self.timings.items()}
+
+    def server_timing(self) -> str:
+        """Value for the Server-Timing response header."""
+        return ", ".join(f"{name};dur={value:.3f}" for name, value in self.timings.items())
+
+
+search_stage_histograms: Dict[str, Histogram] = {stage: Histogram() for stage in SEARCH_STAGES}
+
+
+def observe_stages(timings: Mapping[str, float]) -> None:
+    """Record a search's stage timings in the histograms."""
+    for name, value in timings.items():
+        histogram = search_stage_histograms.get(name)
+        if histogram is not None:
+            histogram.observe(value)
+
+
+def stage_histogram_stats() -> Dict[str, Dict[str, object]]:
+    return {name: histogram.snapshot() for name, histogram in search_stage_histograms.items()}
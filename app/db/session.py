@@ -4,7 +4,9 @@ Provides async database engine and session factory.
 """
 
 from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
 
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
@@ -49,3 +51,19 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             raise
         finally:
             await session.close()
+
+
+@asynccontextmanager
+async def statement_timeout(session: AsyncSession, seconds: float) -> AsyncGenerator[None, None]:
+    """Run the block's statements under a statement_timeout of ``seconds``, set once.
+    
+    The block gets a transaction of its own (a savepoint when one is
+    already open) that is rolled back when it ends. It is meant for reads:
+    rolling back also drops the SET LOCAL, so statements after the block
+    run under the statement_timeout in force before it.
+    """
+    transaction = session.begin_nested() if session.in_transaction() else session.begin()
+    async with transaction as scope:
+        await session.execute(text(f"SET LOCAL statement_timeout = {max(1, int(seconds * 1000))}"))
+        yield
+        await scope.rollback()
@@ -13,10 +13,21 @@ from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 
 from app.api.v1.api import api_router
+from app.core.cache import close_search_cache
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.db.session import engine
 from app.db.base import Base
+from app.services.analytics_pipeline import analytics_pipeline
+from app.services.click_boost_aggregator import click_boost_aggregator
+from app.services.memory_search_backend import memory_search_backend
+from app.services.slow_query_recorder import slow_query_recorder
+from app.services.spelling_corrector import spelling_corrector
+from app.services.synonym_loader import synonym_loader
+from app.search.cursor import InvalidCursorError
+from app.services.search_service import SearchTimeoutError
+from app.services.search_warmup import search_warmup
+from app.services.semantic_index import semantic_index
 
 # Set up logging
 setup_logging()
@@ -37,10 +48,47 @@ async def lifespan(app: FastAPI):
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
     
+    # Record search analytics in the background
+    if settings.ANALYTICS_ASYNC_ENABLED:
+        await analytics_pipeline.start()
+    
+    # Serve hot document types from the in-process index
+    if settings.SEARCH_MEMORY_INDEX_ENABLED:
+        await memory_search_backend.start()
+    
+    # Expand query terms with synonyms, reloaded periodically
+    if settings.SEARCH_SYNONYMS_ENABLED:
+        await synonym_loader.start()
+    
+    # Embed documents and serve hybrid searches from an in-process ANN index
+    if settings.SEARCH_SEMANTIC_ENABLED:
+        await semantic_index.start()
+    
+    # Answer "did you mean" from an in-process dictionary
+    if settings.SPELLING_ENABLED:
+        await spelling_corrector.start()
+    
+    # Rebuild relevance boosts from result clicks periodically
+    if settings.SEARCH_CLICK_BOOSTS_ENABLED:
+        await click_boost_aggregator.start()
+    
+    # Replay popular searches before reporting ready
+    if settings.SEARCH_WARMUP_ENABLED:
+        await search_warmup.start()
+    
     yield
     
     # Shutdown
     logger.info(f"Shutting down {settings.PROJECT_NAME}...")
+    await search_warmup.stop()
+    await memory_search_backend.stop()
+    await spelling_corrector.stop()
+    await synonym_loader.stop()
+    await semantic_index.stop()
+    await click_boost_aggregator.stop()
+    await slow_query_recorder.stop()
+    await analytics_pipeline.stop()
+    await close_search_cache()
     await engine.dispose()
 
 
@@ -72,6 +120,30 @@ app.add_middleware(GZipMiddleware, minimum_size=1000)
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request, exc):
+    """Reject malformed or mismatched pagination cursors."""
+    return JSONResponse(
+        status_code=400,
+        content={
+            "detail": str(exc),
+            "type": "invalid_cursor",
+        },
+    )
+
+
+@app.exception_handler(SearchTimeoutError)
+async def search_timeout_handler(request, exc):
+    """Searches that cannot return a page within their budget."""
+    return JSONResponse(
+        status_code=504,
+        content={
+            "detail": str(exc),
+            "type": "search_timeout",
+        },
+    )
+
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -4,6 +4,10 @@ from app.models.search_index import SearchIndex, DocumentType  # noqa: F401
 from app.models.search_query import SearchQuery  # noqa: F401
 from app.models.search_suggestion import SearchSuggestion  # noqa: F401
 from app.models.index_job import IndexJob, JobType, JobStatus  # noqa: F401
+from app.models.corpus_stats import SearchTermStat, SearchCorpusStats  # noqa: F401
+from app.models.search_synonym import SearchSynonym  # noqa: F401
+from app.models.search_embedding import SearchEmbedding  # noqa: F401
+from app.models.search_click_boost import SearchClickBoost, SearchClickBoostRebuild  # noqa: F401
 
 __all__ = [
     "SearchIndex",
@@ -13,4 +17,10 @@ __all__ = [
     "IndexJob",
     "JobType",
     "JobStatus",
+    "SearchTermStat",
+    "SearchCorpusStats",
+    "SearchSynonym",
+    "SearchEmbedding",
+    "SearchClickBoost",
+    "SearchClickBoostRebuild",
 ]
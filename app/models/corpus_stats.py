@@ -0,0 +1,59 @@
+"""Corpus Statistics Models
+
+Per-lexeme document frequencies and corpus totals used for BM25 ranking.
+Maintained incrementally by IndexingService.
+"""
+
+import uuid
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Index,
+    Integer,
+    String,
+)
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base_class import Base
+
+
+class SearchTermStat(Base):
+    """Number of indexed documents containing a lexeme."""
+    
+    __tablename__ = "search_term_stats"
+    
+    __table_args__ = (
+        # Lexeme dictionary lookups of the typo fallback
+        Index(
+            "idx_search_term_stats_lexeme_trgm",
+            "lexeme",
+            postgresql_using="gin",
+            postgresql_ops={"lexeme": "gin_trgm_ops"}
+        ),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # C collation so prefix lookups can use a range scan on the unique index
+    lexeme = Column(String(collation="C"), nullable=False, unique=True)
+    document_count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<SearchTermStat '{self.lexeme}': {self.document_count}>"
+
+
+class SearchCorpusStats(Base):
+    """Totals over part of the indexed documents; the rows add up to the corpus.
+    
+    Writers add to the row of their shard (see CorpusStatsService), so the
+    rows are not per document type or any other meaningful split.
+    """
+    
+    __tablename__ = "search_corpus_stats"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Shard number
+    document_count = Column(BigInteger, nullable=False, default=0)
+    total_length = Column(BigInteger, nullable=False, default=0)  # Sum of document_length
+    
+    def __repr__(self):
+        return f"<SearchCorpusStats {self.document_count} documents>"
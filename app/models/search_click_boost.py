@@ -0,0 +1,56 @@
+"""SearchClickBoost Model
+
+Relevance multipliers learned from click-through, precomputed from
+search_queries by the click boost aggregator.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+)
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base_class import Base
+
+
+class SearchClickBoost(Base):
+    """Boost of a search_indexes row for one normalized query, or for every query."""
+    
+    __tablename__ = "search_click_boosts"
+    
+    # Same id as the boosted search_indexes row
+    id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("search_indexes.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    # Normalized query text, '' for the document's own boost
+    query_key = Column(String(500), primary_key=True)
+    clicks = Column(Integer, nullable=False, default=0)
+    # Searches of the query, 0 for the document's own boost
+    searches = Column(Integer, nullable=False, default=0)
+    boost = Column(Float, nullable=False, default=1.0)  # Rank multiplier
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<SearchClickBoost {self.id} '{self.query_key}': {self.boost}>"
+
+
+class SearchClickBoostRebuild(Base):
+    """When search_click_boosts was last rebuilt, by any worker; a single row."""
+    
+    __tablename__ = "search_click_boost_rebuilds"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Always 1
+    boosts = Column(Integer, nullable=False, default=0)  # Boosts the rebuild wrote
+    rebuilt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<SearchClickBoostRebuild {self.rebuilt_at}: {self.boosts} boosts>"
@@ -0,0 +1,40 @@
+"""SearchEmbedding Model
+
+Embedding vectors of indexed documents, for semantic retrieval. Kept in a
+side table so search_indexes rows (and the scans over them) stay narrow.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    String,
+)
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base_class import Base
+
+
+class SearchEmbedding(Base):
+    """The embedding of one search_indexes row."""
+    
+    __tablename__ = "search_embeddings"
+    
+    # Same id as the embedded search_indexes row
+    id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("search_indexes.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    model = Column(String(100), nullable=False)  # Embedder that produced the vector
+    dimensions = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # Little-endian float32
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<SearchEmbedding {self.id} ({self.model})>"
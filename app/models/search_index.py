@@ -15,11 +15,14 @@ from sqlalchemy import (
     DateTime,
     Enum,
     Index,
+    Integer,
     func,
+    text,
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 
 from app.db.base_class import Base
+from app.search.languages import LANGUAGE_REGCONFIGS
 
 
 class DocumentType(str, PyEnum):
@@ -46,6 +49,8 @@ class SearchIndex(Base):
     language = Column(String(10), default="en", index=True)  # en, es, fr, pt
     metadata = Column(JSONB, default=dict)  # Additional searchable fields
     search_vector = Column(TSVECTOR)  # PostgreSQL full-text search vector
+    # Lexeme positions, set by trigger
+    document_length = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Additional fields for filtering and sorting
     author_id = Column(UUID(as_uuid=True), nullable=True)
@@ -67,6 +72,13 @@ class SearchIndex(Base):
         # Composite indexes for common queries
         Index("idx_document_type_language", "document_type", "language"),
         Index("idx_published_at", "published_at"),
+        # Newest-first scans within a type: recency candidates of decaying ranking profiles
+        Index(
+            "idx_document_type_published_at",
+            document_type,
+            published_at.desc().nulls_last(),
+            id.desc()
+        ),
         Index("idx_author_id", "author_id"),
         # JSONB index for metadata queries
         Index(
@@ -74,6 +86,32 @@ class SearchIndex(Base):
             metadata,
             postgresql_using="gin"
         ),
+        # Smaller, faster index for the metadata @> containment filters
+        Index(
+            "idx_metadata_path_ops",
+            metadata,
+            postgresql_using="gin",
+            postgresql_ops={"metadata": "jsonb_path_ops"}
+        ),
+        # Range filters on project budgets
+        Index("idx_metadata_budget", text("(metadata -> 'budget')")),
+        # Trigram index for the typo fallback's title similarity search
+        Index(
+            "idx_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"}
+        ),
+        # Per-language partial GIN indexes, used when searches filter by language
+        *(
+            Index(
+                f"idx_search_vector_{language}",
+                "search_vector",
+                postgresql_using="gin",
+                postgresql_where=text(f"language = '{language}'")
+            )
+            for language in LANGUAGE_REGCONFIGS
+        ),
     )
     
     def __repr__(self):
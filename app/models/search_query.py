@@ -14,8 +14,9 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Index,
+    text,
 )
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, JSONB
 
 from app.db.base_class import Base
 
@@ -33,12 +34,19 @@ class SearchQuery(Base):
     user_id = Column(UUID(as_uuid=True), nullable=True, index=True)  # If authenticated
     execution_time = Column(Float, nullable=True)  # Milliseconds
     clicked_result_id = Column(UUID(as_uuid=True), nullable=True)  # Which result was clicked
+    result_ids = Column(ARRAY(UUID(as_uuid=True)), nullable=True)  # Results returned, all clickable
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
     
     __table_args__ = (
         Index("idx_query_text_created", "query_text", "created_at"),
         Index("idx_user_created", "user_id", "created_at"),
         Index("idx_results_count", "results_count"),
+        # Click boost aggregation reads recent clicked searches
+        Index(
+            "idx_search_queries_clicked_created",
+            "created_at",
+            postgresql_where=text("clicked_result_id IS NOT NULL")
+        ),
     )
     
     def __repr__(self):
@@ -0,0 +1,38 @@
+"""SearchSynonym Model
+
+Synonym and acronym rules expanded into search queries.
+"""
+
+from datetime import datetime
+import uuid
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    String,
+    Text,
+    DateTime,
+)
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base_class import Base
+
+
+class SearchSynonym(Base):
+    """A synonym rule in Solr format.
+    
+    Either equivalent terms (``ngo, non-profit``) or an explicit mapping
+    (``unicef => united nations children's fund``).
+    """
+    
+    __tablename__ = "search_synonyms"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    rule = Column(Text, nullable=False)
+    language = Column(String(10), nullable=True)  # None applies the rule to every language
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<SearchSynonym '{self.rule}'>"
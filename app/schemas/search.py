@@ -1,11 +1,12 @@
 """Search Request/Response Schemas"""
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 from app.models.search_index import DocumentType
+from app.search.metadata_filters import validate_metadata_filters
 from app.schemas.search_index import SearchResult
 
 
@@ -17,19 +18,98 @@ class SearchRequest(BaseModel):
         description="Filter by document types"
     )
     language: Optional[str] = Field(None, max_length=10, description="Language filter")
+    all_languages: bool = Field(
+        default=False,
+        description=(
+            "Without a language, also match the query stemmed under every other "
+            "language (slower); otherwise it is stemmed under the default language only"
+        )
+    )
     author_id: Optional[UUID] = Field(None, description="Filter by author")
     status: Optional[str] = Field(None, description="Filter by status")
     date_from: Optional[str] = Field(None, description="Filter by date from (ISO format)")
     date_to: Optional[str] = Field(None, description="Filter by date to (ISO format)")
     metadata_filters: Optional[Dict[str, Any]] = Field(
         None,
-        description="Additional metadata filters"
+        description=(
+            "Metadata filters: typed values match exactly, lists match arrays "
+            "containing every value, {\"gte\"/\"gt\"/\"lte\"/\"lt\": x} filter "
+            "a range and {\"in\": [...]} any of the values"
+        )
     )
     page: int = Field(default=1, ge=1, description="Page number")
     page_size: int = Field(default=20, ge=1, le=100, description="Results per page")
     sort_by: Optional[str] = Field(default="relevance", description="Sort field (relevance, date, title)")
     sort_order: Optional[str] = Field(default="desc", description="Sort order (asc, desc)")
     highlight: bool = Field(default=True, description="Enable result highlighting")
+    cursor: Optional[str] = Field(
+        None,
+        description=(
+            "Opaque cursor from a previous response's next_cursor "
+            "(keyset pagination, overrides page)"
+        )
+    )
+    track_total_hits: Optional[Union[bool, int]] = Field(
+        None,
+        description=(
+            "Count matches exactly (true), not at all (false) or up to N; "
+            "defaults to SEARCH_TRACK_TOTAL_HITS"
+        )
+    )
+    ranking: Optional[str] = Field(
+        None,
+        pattern="^(ts_rank|ts_rank_cd|bm25)$",
+        description="Relevance ranking (ts_rank, ts_rank_cd, bm25); defaults to SEARCH_RANKING"
+    )
+    two_phase: Optional[bool] = Field(
+        None,
+        description=(
+            "Rank only the first rank_candidates matches of a cheap ordering; "
+            "defaults to SEARCH_TWO_PHASE_RANKING"
+        )
+    )
+    rank_candidates: Optional[int] = Field(
+        None,
+        ge=1,
+        le=10000,
+        description="Matches ranked in two-phase ranking; defaults to SEARCH_RANK_CANDIDATES"
+    )
+    mode: Optional[str] = Field(
+        None,
+        pattern="^(lexical|hybrid)$",
+        description=(
+            "Retrieval: lexical (full-text) or hybrid (full-text and semantic, fused by rank; "
+            "relevance sorting and page-based paging only); defaults to SEARCH_MODE"
+        )
+    )
+    include_facets: bool = Field(
+        default=False,
+        description="Return facet counts for the matched set in `facets` (the total is then exact)"
+    )
+    facet_fields: List[str] = Field(
+        default=["document_type", "language", "author_name", "status"],
+        description="Fields to generate facets for when include_facets is set"
+    )
+    include_timings: bool = Field(
+        default=False,
+        description="Return milliseconds spent per search stage in `timings`"
+    )
+    
+    @field_validator("metadata_filters")
+    @classmethod
+    def validate_metadata_filters(cls, v: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Reject unknown or malformed filter operators."""
+        if v is not None:
+            validate_metadata_filters(v)
+        return v
+    
+    @field_validator("track_total_hits")
+    @classmethod
+    def validate_track_total_hits(cls, v: Optional[Union[bool, int]]) -> Optional[Union[bool, int]]:
+        """Reject negative count limits."""
+        if v is not None and not isinstance(v, bool) and v < 0:
+            raise ValueError("track_total_hits must be true, false or a non-negative integer")
+        return v
 
 
 class SearchResponse(BaseModel):
@@ -37,11 +117,51 @@ class SearchResponse(BaseModel):
     query: str
     results: List[SearchResult]
     total_count: int
+    total_relation: str = "eq"  # "gte" when total_count is a lower bound (e.g. 10000+)
     page: int
     page_size: int
     total_pages: int
     execution_time: float  # milliseconds
     facets: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    next_cursor: Optional[str] = None  # Pass back as `cursor` to fetch the next page
+    rank_truncated: Optional[bool] = None  # True when more matches existed than were ranked
+    timings: Optional[Dict[str, float]] = None  # Milliseconds per stage, with include_timings
+    timed_out: bool = False  # The count or facets ran out of time and were left out
+    # Typo-corrected query, when the query as typed matched nothing
+    corrected_query: Optional[str] = None
+    # "corrected" or "title_similarity" when the results come from the typo fallback
+    typo_fallback: Optional[str] = None
+    # The query with unknown words respelled, when it found (next to) nothing
+    did_you_mean: Optional[str] = None
+    query_id: Optional[UUID] = None  # Pass to /search/click when a result is opened
+
+
+class ClickRequest(BaseModel):
+    """Schema for reporting a click on a search result."""
+    query_id: UUID = Field(..., description="query_id of the search response")
+    result_id: UUID = Field(..., description="id of the clicked result")
+
+
+class MultiSearchRequest(BaseModel):
+    """Schema for running several searches in one call."""
+    searches: List[SearchRequest] = Field(
+        ...,
+        min_length=1,
+        description="Searches to run; responses come back in the same order"
+    )
+
+
+class MultiSearchError(BaseModel):
+    """Schema for a search of a multi-search call that failed on its own."""
+    status: int  # HTTP status the search would have answered with alone
+    type: str  # "invalid_cursor" or "search_timeout"
+    detail: str
+
+
+class MultiSearchResponse(BaseModel):
+    """Schema for multi-search responses."""
+    responses: List[Union[SearchResponse, MultiSearchError]]
+    execution_time: float  # milliseconds
 
 
 class AutoCompleteRequest(BaseModel):
@@ -57,6 +177,19 @@ class AutoCompleteResponse(BaseModel):
     suggestions: List[str]
 
 
+class SpellingCorrection(BaseModel):
+    """Suggested spellings of an unknown query word."""
+    word: str
+    suggestions: List[str]  # Closest and most frequent first
+
+
+class SpellingResponse(BaseModel):
+    """Schema for spelling suggestion responses."""
+    query: str
+    did_you_mean: Optional[str] = None
+    corrections: List[SpellingCorrection]
+
+
 class FacetRequest(BaseModel):
     """Schema for facet requests."""
     query: str = Field(..., min_length=1, max_length=500)
@@ -65,6 +198,16 @@ class FacetRequest(BaseModel):
         description="Fields to generate facets for"
     )
     filters: Optional[Dict[str, Any]] = None
+    
+    @field_validator("filters")
+    @classmethod
+    def validate_filters(cls, v: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Reject unknown or malformed metadata filter operators."""
+        if v is not None and v.get("metadata") is not None:
+            if not isinstance(v["metadata"], dict):
+                raise ValueError("filters.metadata must be an object of metadata filters")
+            validate_metadata_filters(v["metadata"])
+        return v
 
 
 class FacetOption(BaseModel):
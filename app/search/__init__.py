@@ -0,0 +1,5 @@
+"""Search engine internals.
+
+Query parsing, pagination cursors and other building blocks used by the
+search services.
+"""
@@ -0,0 +1,184 @@
+"""Approximate Nearest Neighbours
+
+IVF (inverted file) index over L2-normalized float32 vectors, where the
+dot product is the cosine similarity.
+
+The vectors are clustered with spherical k-means into ``n_lists`` lists
+and stored grouped by list, so each list is one contiguous slice of the
+vector array. A query scores the centroids, then only the vectors of the
+``n_probe`` closest lists: with ``n_lists ~ sqrt(N)`` that is a few
+percent of the corpus instead of all of it.
+
+Indexes are built in memory and can be saved as plain ``.npy`` files and
+loaded back memory-mapped, so the vectors live in the page cache (shared
+by every worker on the host) rather than on each worker's heap.
+"""
+
+import math
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+import numpy as np
+
+# Vectors scored per matrix product while clustering, bounding the
+# temporary similarity matrix
+ASSIGN_BATCH = 8192
+# Vectors sampled per list to train the centroids
+TRAINING_SAMPLE_PER_LIST = 64
+
+_FILES = ("centroids", "vectors", "offsets", "ids")
+
+
+class IVFIndex:
+    """Inverted-file index of vectors keyed by UUID."""
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        vectors: np.ndarray,
+        offsets: np.ndarray,
+        ids: np.ndarray
+    ):
+        self.centroids = centroids  # (n_lists, dimensions)
+        self.vectors = vectors  # (N, dimensions), grouped by list
+        self.offsets = offsets  # (n_lists + 1,), list i is vectors[offsets[i]:offsets[i + 1]]
+        self.ids = ids  # (N, 2) uint64 halves of the UUIDs
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def dimensions(self) -> int:
+        return self.vectors.shape[1]
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[UUID],
+        vectors: np.ndarray,
+        n_lists: int = 0,
+        iterations: int = 10,
+        seed: int = 0
+    ) -> "IVFIndex":
+        """Cluster the vectors into lists; n_lists 0 picks about sqrt(N)."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        count = len(vectors)
+        if n_lists <= 0:
+            n_lists = int(math.sqrt(count))
+        n_lists = max(1, min(n_lists, count))
+
+        rng = np.random.default_rng(seed)
+        if count == 0:
+            centroids = np.zeros((1, vectors.shape[1]), dtype=np.float32)
+            assignments = np.zeros(0, dtype=np.int64)
+        else:
+            centroids = _train_centroids(vectors, n_lists, iterations, rng)
+            assignments = _assign(vectors, centroids)
+
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=len(centroids)), out=offsets[1:])
+        return cls(centroids, vectors[order], offsets, _encode_ids(ids)[order])
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        n_probe: int = 8,
+        exclude: Optional[set] = None
+    ) -> List[Tuple[UUID, float]]:
+        """The k vectors most similar to the query among the n_probe closest lists.
+
+        Ids in ``exclude`` (removed or superseded since the build) are skipped.
+        """
+        if len(self) == 0 or k <= 0:
+            return []
+
+        query = np.asarray(query, dtype=np.float32)
+        n_probe = min(n_probe, len(self.centroids))
+        probes = _top(self.centroids @ query, n_probe)
+        rows = np.concatenate([
+            np.arange(self.offsets[probe], self.offsets[probe + 1])
+            for probe in probes
+        ])
+        if len(rows) == 0:
+            return []
+
+        scores = self.vectors[rows] @ query
+        wanted = k + len(exclude) if exclude else k
+        best = _top(scores, wanted)
+
+        results = []
+        for position in best:
+            document_id = _decode_id(self.ids[rows[position]])
+            if exclude and document_id in exclude:
+                continue
+            results.append((document_id, float(scores[position])))
+            if len(results) == k:
+                break
+        return results
+
+    def save(self, directory: Union[str, Path]) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in _FILES:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+
+    @classmethod
+    def load(cls, directory: Union[str, Path], mmap: bool = True) -> "IVFIndex":
+        """Load a saved index; with mmap the arrays are mapped read-only instead of read."""
+        directory = Path(directory)
+        mode = "r" if mmap else None
+        return cls(**{
+            name: np.load(directory / f"{name}.npy", mmap_mode=mode)
+            for name in _FILES
+        })
+
+
+def _train_centroids(vectors: np.ndarray, n_lists: int, iterations: int, rng) -> np.ndarray:
+    """Spherical k-means on a sample of the vectors."""
+    sample_size = min(len(vectors), n_lists * TRAINING_SAMPLE_PER_LIST)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        norms = np.linalg.norm(sums, axis=1)
+        empty = norms == 0
+        # Restart empty lists from random sample vectors
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        norms[empty] = 1.0
+        centroids = (sums / norms[:, None]).astype(np.float32)
+
+    return centroids
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid of each vector."""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_BATCH):
+        batch = vectors[start:start + ASSIGN_BATCH]
+        assignments[start:start + len(batch)] = np.argmax(batch @ centroids.T, axis=1)
+    return assignments
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, highest first."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def _encode_ids(ids: Sequence[UUID]) -> np.ndarray:
+    encoded = np.zeros((len(ids), 2), dtype=np.uint64)
+    for row, document_id in enumerate(ids):
+        encoded[row] = (document_id.int >> 64, document_id.int & 0xFFFFFFFFFFFFFFFF)
+    return encoded
+
+
+def _decode_id(encoded: np.ndarray) -> UUID:
+    return UUID(int=(int(encoded[0]) << 64) | int(encoded[1]))
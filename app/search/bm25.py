@@ -0,0 +1,88 @@
+"""BM25 Ranking
+
+SQL expression scoring a search_indexes row against a parsed query with
+BM25, using the precomputed corpus statistics (search_term_stats and
+search_corpus_stats) for document frequencies and the average document
+length.
+
+Every positive query word is scored separately: its lexeme is taken from
+to_tsvector under the query's configuration, term frequency is the number
+of positions of that lexeme (or of the lexemes it prefixes) in the row's
+vector, and document frequency comes from the statistics table. The
+expression is evaluated per row, so it is meant for a bounded candidate
+set rather than every match.
+"""
+
+from sqlalchemy import Float, Text, and_, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, REGCONFIG
+
+from app.core.config import settings
+from app.models.corpus_stats import SearchCorpusStats, SearchTermStat
+from app.models.search_index import SearchIndex
+from app.search.query_parser import ParsedQuery
+
+# Sorts after every other character under the C collation
+_MAX_CHAR = "\U0010ffff"
+
+
+def bm25_score(
+    parsed_query: ParsedQuery,
+    k1: float = None,
+    b: float = None
+):
+    """BM25 score of the current search_indexes row for a query."""
+    k1 = settings.SEARCH_BM25_K1 if k1 is None else k1
+    b = settings.SEARCH_BM25_B if b is None else b
+    regconfig = cast(parsed_query.regconfig, REGCONFIG)
+
+    # The corpus totals are spread over shard rows
+    document_count = func.coalesce(
+        select(func.sum(SearchCorpusStats.document_count)).scalar_subquery(), 0
+    )
+    average_length = func.coalesce(
+        select(
+            cast(func.sum(SearchCorpusStats.total_length), Float)
+            / func.nullif(func.sum(SearchCorpusStats.document_count), 0)
+        ).scalar_subquery(),
+        1.0
+    )
+    length_norm = k1 * (1 - b + b * cast(SearchIndex.document_length, Float) / average_length)
+
+    score = literal(0.0)
+    for word, prefix in parsed_query.positive_words:
+        # NULL for stopwords, which then score nothing
+        lexeme = func.tsvector_to_array(
+            func.to_tsvector(regconfig, word), type_=ARRAY(Text)
+        )[1]
+
+        vector = func.unnest(SearchIndex.search_vector).table_valued("lexeme", "positions")
+        if prefix:
+            vector_match = func.starts_with(vector.c.lexeme, lexeme)
+            stats_match = and_(
+                SearchTermStat.lexeme >= lexeme,
+                SearchTermStat.lexeme < lexeme + _MAX_CHAR
+            )
+        else:
+            vector_match = vector.c.lexeme == lexeme
+            stats_match = SearchTermStat.lexeme == lexeme
+
+        term_frequency = select(
+            func.coalesce(func.sum(func.coalesce(func.array_length(vector.c.positions, 1), 1)), 0)
+        ).select_from(vector).where(vector_match).scalar_subquery()
+
+        # A prefix can cover several lexemes of the same document, so the
+        # summed frequency is capped at the corpus size
+        document_frequency = func.least(
+            select(
+                func.coalesce(func.sum(SearchTermStat.document_count), 0)
+            ).where(stats_match).scalar_subquery(),
+            document_count
+        )
+
+        # ln(1 + (N - df + 0.5) / (df + 0.5)) and tf * (k1 + 1) / (tf + norm),
+        # rearranged so each subquery appears (and runs) once per row
+        idf = func.ln((document_count + 1) / (document_frequency + 0.5))
+        saturation = 1 - length_norm / func.nullif(term_frequency + length_norm, 0)
+        score = score + func.coalesce(idf * (k1 + 1) * saturation, 0)
+
+    return score
@@ -0,0 +1,44 @@
+"""Click Boosts
+
+Relevance multipliers learned from click-through. The aggregator
+precomputes them into search_click_boosts: one row per (normalized query,
+clicked result) that was clicked often enough, and one per result (query
+key '') for its clicks under any query. A search multiplies its rank by
+both, looked up by primary key per ranked row, so no clicks are counted
+at query time.
+"""
+
+from sqlalchemy import func, select
+
+from app.models.search_click_boost import SearchClickBoost
+from app.models.search_index import SearchIndex
+
+# Query key of the boosts that apply to every query
+DOCUMENT_BOOST_KEY = ""
+
+
+def normalize_query(query_text: str) -> str:
+    """The query key clicks are aggregated under: lower case, single spaces."""
+    return " ".join(query_text.lower().split())
+
+
+def normalize_query_sql(query_text):
+    """SQL counterpart of :func:`normalize_query`."""
+    return func.lower(func.regexp_replace(func.btrim(query_text), r"\s+", " ", "g"))
+
+
+def click_boost(query_text: str):
+    """Rank multiplier of the current search_indexes row for a query; 1 without clicks."""
+    def boost(query_key: str):
+        return func.coalesce(
+            select(SearchClickBoost.boost).where(
+                SearchClickBoost.id == SearchIndex.id,
+                SearchClickBoost.query_key == query_key
+            ).scalar_subquery(),
+            1.0
+        )
+
+    query_key = normalize_query(query_text)
+    if not query_key:
+        return boost(DOCUMENT_BOOST_KEY)
+    return boost(query_key) * boost(DOCUMENT_BOOST_KEY)
@@ -0,0 +1,100 @@
+"""Keyset Pagination Cursors
+
+Opaque cursors for search-after pagination.
+
+A cursor records the sort key of the last row of a page plus its id as a
+tiebreaker, so the next page can be fetched with a seek predicate instead
+of an OFFSET scan. Relevance rankings that decay with age also record the
+time the decay was measured from, so every page is ranked with the scores
+of the first. A cursor also carries a hash of the query, filters and
+ranking it was issued for, and is rejected with any other.
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded or does not match the request."""
+
+
+@dataclass(frozen=True)
+class SearchCursor:
+    """Decoded search-after position."""
+    sort_by: str
+    sort_order: str
+    key: Any
+    last_id: UUID
+    reference_time: Optional[datetime] = None
+    scope: Optional[str] = None
+
+
+def encode_cursor(
+    sort_by: str,
+    sort_order: str,
+    key: Any,
+    last_id: UUID,
+    reference_time: Optional[datetime] = None,
+    scope: Optional[str] = None
+) -> str:
+    """Encode the sort position of the last returned row."""
+    if isinstance(key, datetime):
+        encoded_key = {"dt": key.isoformat()}
+    else:
+        encoded_key = key
+    
+    payload = {
+        "s": sort_by,
+        "o": sort_order,
+        "k": encoded_key,
+        "i": str(last_id),
+    }
+    if reference_time is not None:
+        payload["t"] = reference_time.isoformat()
+    if scope is not None:
+        payload["h"] = scope
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SearchCursor:
+    """Decode a cursor produced by :func:`encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key = payload["k"]
+        if isinstance(key, dict):
+            key = datetime.fromisoformat(key["dt"])
+        reference_time = payload.get("t")
+        return SearchCursor(
+            sort_by=payload["s"],
+            sort_order=payload["o"],
+            key=key,
+            last_id=UUID(payload["i"]),
+            reference_time=datetime.fromisoformat(reference_time) if reference_time else None,
+            scope=payload.get("h"),
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {str(e)}") from e
+
+
+def check_cursor(
+    cursor: SearchCursor,
+    sort_by: Optional[str],
+    sort_order: Optional[str],
+    scope: Optional[str] = None
+) -> None:
+    """Ensure a cursor is reused with the sort and scope it was issued for."""
+    if cursor.sort_by != sort_by or cursor.sort_order != sort_order:
+        raise InvalidCursorError(
+            "Cursor was issued for a different sort; restart pagination without a cursor"
+        )
+    if cursor.scope != scope:
+        raise InvalidCursorError(
+            "Cursor was issued for a different query, filters or ranking; "
+            "restart pagination without a cursor"
+        )
@@ -0,0 +1,104 @@
+"""Embeddings
+
+Deterministic, local text embeddings for semantic retrieval.
+
+HashingEmbedder maps text to a fixed-size vector by feature hashing: words,
+word bigrams and the character trigrams of words are hashed (with a
+stable hash, not Python's salted one) to a dimension and a sign, weighted
+by sublinear term frequency, and the vector is L2-normalized so that the
+dot product of two embeddings is their cosine similarity. Trigrams make
+inflections and misspellings land close to each other. It needs no model
+files or network access, and the same text always gets the same vector in
+every process.
+"""
+
+import hashlib
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from app.search.query_parser import STOPWORDS
+
+_WORD_PATTERN = re.compile(r"\w+")
+_STOPWORDS = frozenset().union(*STOPWORDS.values())
+
+# Feature weights relative to words
+BIGRAM_WEIGHT = 0.5
+TRIGRAM_WEIGHT = 0.25
+
+
+class HashingEmbedder:
+    """Feature-hashing embedder producing L2-normalized float32 vectors."""
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+        # Stored with each embedding, so vectors of another embedder are never mixed in
+        self.name = f"hashing-{dimensions}"
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature, weight in self._features(text).items():
+            dimension, sign = _hash_feature(feature, self.dimensions)
+            vector[dimension] += sign * weight
+
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector
+
+    def embed_many(self, texts: Iterable[str]) -> np.ndarray:
+        """Embeddings of several texts as the rows of one array."""
+        vectors = [self.embed(text) for text in texts]
+        if not vectors:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        return np.stack(vectors)
+
+    def _features(self, text: str) -> Dict[str, float]:
+        words = [word for word in _WORD_PATTERN.findall(text.lower()) if word not in _STOPWORDS]
+        counts: Counter = Counter(words)
+        for word in words:
+            padded = f"<{word}>"
+            counts.update(
+                "#" + padded[position:position + 3] for position in range(len(padded) - 2)
+            )
+        counts.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+
+        # Sublinear term frequency, so repeated words do not dominate
+        return {
+            feature: (1.0 + math.log(count)) * _feature_weight(feature)
+            for feature, count in counts.items()
+        }
+
+
+def _feature_weight(feature: str) -> float:
+    if feature.startswith("#"):
+        return TRIGRAM_WEIGHT
+    if " " in feature:
+        return BIGRAM_WEIGHT
+    return 1.0
+
+
+def document_text(title: str, content: str) -> str:
+    """The text a document is embedded from; the title counts twice."""
+    return f"{title}\n{title}\n{content}"
+
+
+@lru_cache(maxsize=65536)
+def _hash_feature(feature: str, dimensions: int) -> Tuple[int, float]:
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dimensions, 1.0 if value >> 63 else -1.0
+
+
+def vector_to_bytes(vector: np.ndarray) -> bytes:
+    """Little-endian float32 bytes, as stored in search_embeddings.vector."""
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+
+def vector_from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<f4").astype(np.float32)
+
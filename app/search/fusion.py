@@ -0,0 +1,25 @@
+"""Rank Fusion
+
+Combines rankings from several retrievers into one.
+"""
+
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    k: int = 60
+) -> List[Tuple[Hashable, float]]:
+    """Reciprocal rank fusion of rankings (best first), best first.
+
+    An item scores ``sum(1 / (k + rank))`` over the rankings it appears in,
+    ranks starting at 1. Only ranks count, so retrievers with incomparable
+    scores (ts_rank and cosine similarity) fuse without normalization;
+    ``k`` damps the weight of the very first ranks. Ties keep the order in
+    which items were first seen.
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda entry: entry[1], reverse=True)
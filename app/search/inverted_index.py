@@ -0,0 +1,325 @@
+"""Inverted Index
+
+In-process BM25 full-text index for small, frequently searched document
+sets.
+
+Text is split into lowercase words. Every distinct word other than the
+stopwords of the document's language gets an integer term id, and its
+postings are two parallel ``array('I')``: document slots and term
+frequencies. A new document always takes the next slot, so postings stay
+in slot order without sorting. Each document also keeps its term id
+sequence, which gives its length and lets phrases be verified on the
+candidates.
+
+A removed document leaves an empty slot behind. Its postings are dropped
+by a compaction once empty slots make up a quarter of the index.
+
+Words are not stemmed. A word matches its exact form, and the last word of
+a query term is prefix-matched like in the SQL search, which covers most
+inflections (``school:*`` matches ``schools``).
+"""
+
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from app.models.search_index import DocumentType
+from app.search.languages import regconfig_for
+from app.search.query_parser import STOPWORDS, ParsedQuery, QueryTerm
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Token separating the title from the content, so a phrase never matches
+# across the two
+_BOUNDARY = 0
+# Token standing in for a stopword; stopwords are not searchable but keep
+# their position, as in a tsvector
+_STOPWORD = 1
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase words."""
+    return _WORD_PATTERN.findall(text.lower())
+
+
+@dataclass
+class IndexedDocument:
+    """The fields of an indexed document needed to filter, sort and display it."""
+    id: UUID
+    document_id: UUID
+    document_type: DocumentType
+    title: str
+    content_prefix: str
+    language: Optional[str]
+    metadata: Dict[str, Any]
+    author_id: Optional[UUID]
+    author_name: Optional[str]
+    status: Optional[str]
+    published_at: Optional[datetime]
+    indexed_at: datetime
+
+
+class InvertedIndex:
+    """Array-backed inverted index scored with BM25."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, title_weight: int = 2):
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight  # Title words count this many times
+
+        self._documents: List[Optional[IndexedDocument]] = []
+        self._tokens: List[Optional[array]] = []
+        self._lengths = array("I")
+        self._slots: Dict[UUID, int] = {}  # document_id -> slot
+        self._term_ids: Dict[str, int] = {}
+        self._postings: Dict[int, Tuple[array, array]] = {}
+        self._vocabulary: Optional[List[str]] = None  # Sorted terms, rebuilt lazily
+        self._total_length = 0
+        self._empty_slots = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, document_id: UUID) -> bool:
+        return document_id in self._slots
+
+    def document(self, slot: int) -> Optional[IndexedDocument]:
+        return self._documents[slot]
+
+    def add(self, document: IndexedDocument, content: str) -> None:
+        """Index a document, replacing an earlier version with the same document_id."""
+        self.remove(document.document_id)
+
+        stopwords = STOPWORDS.get(regconfig_for(document.language), frozenset())
+        tokens = array("I", [self._token(word, stopwords) for word in tokenize(document.title)])
+        tokens.append(_BOUNDARY)
+        tokens.extend(self._token(word, stopwords) for word in tokenize(content))
+
+        self._append(document, tokens)
+
+    def remove(self, document_id: UUID) -> bool:
+        """Remove a document; returns False if it was not indexed."""
+        slot = self._slots.pop(document_id, None)
+        if slot is None:
+            return False
+
+        self._documents[slot] = None
+        self._tokens[slot] = None
+        self._total_length -= self._lengths[slot]
+        self._empty_slots += 1
+
+        if self._empty_slots * 4 > len(self._documents):
+            self._compact()
+        return True
+
+    def clear(self) -> None:
+        self.__init__(k1=self.k1, b=self.b, title_weight=self.title_weight)
+
+    def match(self, parsed_query: ParsedQuery) -> Dict[int, float]:
+        """Return the slots of the documents matching a query with their BM25 scores.
+
+        Clauses are ANDed, alternatives within a clause ORed and negated
+        clauses excluded, like the tsquery the SQL search compiles. Words
+        that are stopwords are ignored, as Postgres does; a query of
+        nothing but stopwords matches nothing.
+        """
+        stopwords = STOPWORDS.get(parsed_query.regconfig, frozenset())
+        scores: Dict[int, float] = {}
+        matched: Optional[Set[int]] = None
+        excluded: Set[int] = set()
+        constrained = False
+
+        for clause in parsed_query.clauses:
+            clause_slots: Set[int] = set()
+            searchable = False
+            for term in clause.alternatives:
+                term_slots = self._term_slots(
+                    term, stopwords, None if clause.negated else scores
+                )
+                if term_slots is not None:
+                    searchable = True
+                    clause_slots |= term_slots
+
+            if not searchable:
+                continue
+            constrained = True
+
+            if clause.negated:
+                excluded |= clause_slots
+            elif matched is None:
+                matched = clause_slots
+            else:
+                matched &= clause_slots
+
+        if not constrained:
+            return {}
+        if matched is None:
+            # Only negated clauses: everything else matches
+            matched = set(self._slots.values())
+
+        return {slot: scores.get(slot, 0.0) for slot in matched - excluded}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._slots),
+            "slots": len(self._documents),
+            "terms": len(self._postings),
+            "average_length": self._average_length(),
+        }
+
+    def _append(self, document: IndexedDocument, tokens: array) -> None:
+        slot = len(self._documents)
+        frequencies = self._frequencies(tokens)
+
+        for term_id, frequency in frequencies.items():
+            postings = self._postings.get(term_id)
+            if postings is None:
+                postings = self._postings[term_id] = (array("I"), array("I"))
+            postings[0].append(slot)
+            postings[1].append(frequency)
+
+        length = sum(frequencies.values())
+        self._documents.append(document)
+        self._tokens.append(tokens)
+        self._lengths.append(length)
+        self._total_length += length
+        self._slots[document.document_id] = slot
+
+    def _frequencies(self, tokens: array) -> Counter:
+        """Weighted term frequencies; words before the boundary are title words."""
+        frequencies: Counter = Counter()
+        weight = self.title_weight
+        for term_id in tokens:
+            if term_id == _BOUNDARY:
+                weight = 1
+            elif term_id != _STOPWORD:
+                frequencies[term_id] += weight
+        return frequencies
+
+    def _compact(self) -> None:
+        """Rebuild postings without the removed documents."""
+        live = [
+            (document, tokens)
+            for document, tokens in zip(self._documents, self._tokens)
+            if document is not None
+        ]
+
+        self._documents = []
+        self._tokens = []
+        self._lengths = array("I")
+        self._slots = {}
+        self._postings = {}
+        self._vocabulary = None
+        self._total_length = 0
+        self._empty_slots = 0
+
+        for document, tokens in live:
+            self._append(document, tokens)
+
+    def _token(self, word: str, stopwords: frozenset) -> int:
+        if word in stopwords:
+            return _STOPWORD
+
+        term_id = self._term_ids.get(word)
+        if term_id is None:
+            term_id = self._term_ids[word] = len(self._term_ids) + 2  # After the special tokens
+            self._vocabulary = None
+        return term_id
+
+    def _expand(self, word: str, prefix: bool) -> Set[int]:
+        """Ids of the indexed terms a query word matches."""
+        if not prefix:
+            term_id = self._term_ids.get(word)
+            return {term_id} if term_id is not None else set()
+
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._term_ids)
+
+        term_ids = set()
+        position = bisect_left(self._vocabulary, word)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(word):
+            term_ids.add(self._term_ids[self._vocabulary[position]])
+            position += 1
+        return term_ids
+
+    def _term_slots(
+        self,
+        term: QueryTerm,
+        stopwords: frozenset,
+        scores: Optional[Dict[int, float]]
+    ) -> Optional[Set[int]]:
+        """Slots containing a word or phrase, adding their scores to ``scores``.
+
+        Stopwords inside a phrase match any word, leading and trailing ones
+        are dropped. Returns None when the term consists of stopwords only.
+        """
+        last = len(term.words) - 1
+        word_ids: List[Optional[Set[int]]] = [
+            None if word in stopwords else self._expand(word, term.prefix and position == last)
+            for position, word in enumerate(term.words)
+        ]
+        while word_ids and word_ids[0] is None:
+            word_ids.pop(0)
+        while word_ids and word_ids[-1] is None:
+            word_ids.pop()
+        if not word_ids:
+            return None
+
+        contributions = [
+            self._score_terms(term_ids) for term_ids in word_ids if term_ids is not None
+        ]
+        slots = set(contributions[0])
+        for contribution in contributions[1:]:
+            slots.intersection_update(contribution)
+
+        if len(word_ids) > 1:
+            slots = {slot for slot in slots if self._contains_phrase(self._tokens[slot], word_ids)}
+
+        if scores is not None:
+            for contribution in contributions:
+                for slot in slots:
+                    scores[slot] = scores.get(slot, 0.0) + contribution[slot]
+        return slots
+
+    def _score_terms(self, term_ids: Iterable[int]) -> Dict[int, float]:
+        """BM25 contribution of a set of terms for every live document containing one."""
+        scores: Dict[int, float] = {}
+        document_count = len(self._slots)
+        average_length = self._average_length() or 1.0
+
+        for term_id in term_ids:
+            postings = self._postings.get(term_id)
+            if postings is None:
+                continue
+            slots, frequencies = postings
+            # Postings of removed documents count towards the document
+            # frequency until the next compaction
+            idf = math.log(1 + (document_count - len(slots) + 0.5) / (len(slots) + 0.5))
+
+            for slot, frequency in zip(slots, frequencies):
+                if self._documents[slot] is None:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[slot] / average_length)
+                score = idf * frequency * (self.k1 + 1) / (frequency + norm)
+                scores[slot] = scores.get(slot, 0.0) + score
+        return scores
+
+    def _contains_phrase(self, tokens: array, word_ids: List[Optional[Set[int]]]) -> bool:
+        """Whether the words occur next to each other, in order (None matches any word)."""
+        first, rest = word_ids[0], word_ids[1:]
+        for start in range(len(tokens) - len(rest)):
+            if tokens[start] in first and all(
+                term_ids is None or tokens[start + offset] in term_ids
+                for offset, term_ids in enumerate(rest, 1)
+            ):
+                return True
+        return False
+
+    def _average_length(self) -> float:
+        return self._total_length / len(self._slots) if self._slots else 0.0
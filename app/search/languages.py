@@ -0,0 +1,36 @@
+"""Language Configuration
+
+Maps the language codes stored on indexed documents (en, es, ...) to
+PostgreSQL text search configurations (regconfig).
+"""
+
+from typing import Optional
+
+from app.core.config import settings
+
+# Language codes to PostgreSQL text search configurations
+LANGUAGE_REGCONFIGS = {
+    "en": "english",
+    "es": "spanish",
+    "fr": "french",
+    "pt": "portuguese",
+}
+
+# Configuration used for languages without a stemmer
+FALLBACK_REGCONFIG = "simple"
+
+
+def regconfig_for(language: Optional[str]) -> str:
+    """Return the text search configuration for a language code.
+    
+    Full configuration names (e.g. "english") are accepted as well.
+    """
+    if not language:
+        language = settings.SEARCH_DEFAULT_LANGUAGE
+    
+    language = language.lower()
+    if language in LANGUAGE_REGCONFIGS:
+        return LANGUAGE_REGCONFIGS[language]
+    if language in LANGUAGE_REGCONFIGS.values():
+        return language
+    return FALLBACK_REGCONFIG
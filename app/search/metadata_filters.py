@@ -0,0 +1,132 @@
+"""Metadata Filters
+
+Compiles ``metadata_filters`` into predicates on the JSONB metadata column.
+
+Filter values:
+- ``{"country": "KE"}``, ``{"budget": 5000}``: typed equality; ``5000`` does
+  not match ``"5000"``
+- ``{"tags": ["water", "school"]}``: the array contains every listed value
+- ``{"budget": {"gte": 1000, "lt": 5000}}``: range over numbers (or
+  strings such as ISO dates); values of another JSON type never match
+- ``{"country": {"in": ["KE", "UG"]}}``: any of the values (at least one)
+
+Equality and array filters are merged into a single ``metadata @> :json``
+containment predicate, which the GIN indexes on metadata can answer.
+``in`` becomes an OR of containments, which they can answer too. Ranges
+compare ``metadata -> key`` as jsonb, so they can use an expression index
+on that key (``idx_metadata_budget``). Keys are rendered inline so the
+expression matches the index under generic prepared plans.
+
+``matches_metadata`` evaluates the same filters in Python, for the
+in-process index.
+"""
+
+import operator
+from typing import Any, Dict, List, Mapping
+
+from sqlalchemy import bindparam, func, literal, or_
+from sqlalchemy.dialects.postgresql import JSONB
+
+RANGE_OPERATORS = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+FILTER_OPERATORS = frozenset(RANGE_OPERATORS) | {"in"}
+
+
+def validate_metadata_filters(filters: Mapping[str, Any]) -> None:
+    """Raise ValueError for malformed operator filters."""
+    for key, value in filters.items():
+        if not isinstance(value, dict):
+            continue
+        unknown = set(value) - FILTER_OPERATORS
+        if not value or unknown:
+            raise ValueError(
+                f"metadata filter '{key}' takes operators {sorted(FILTER_OPERATORS)}"
+            )
+        if "in" in value and (not isinstance(value["in"], list) or not value["in"]):
+            raise ValueError(f"metadata filter '{key}': 'in' takes a non-empty list")
+        for name in set(value) & set(RANGE_OPERATORS):
+            if _json_type(value[name]) not in ("number", "string"):
+                raise ValueError(f"metadata filter '{key}': '{name}' takes a number or string")
+
+
+def metadata_filter_clauses(column, filters: Mapping[str, Any]) -> List[Any]:
+    """SQL predicates on a JSONB column for the given filters."""
+    contained: Dict[str, Any] = {}
+    clauses = []
+
+    for key, value in filters.items():
+        if not isinstance(value, dict):
+            contained[key] = value
+            continue
+
+        if "in" in value:
+            clauses.append(or_(*[column.contains({key: option}) for option in value["in"]]))
+
+        ranges = {name: bound for name, bound in value.items() if name in RANGE_OPERATORS}
+        if ranges:
+            element = column.op("->")(bindparam(None, key, literal_execute=True))
+            # jsonb orders values of different types too; only compare like with like
+            for json_type in sorted({_json_type(bound) for bound in ranges.values()}):
+                clauses.append(func.jsonb_typeof(element) == json_type)
+            for name, bound in ranges.items():
+                clauses.append(RANGE_OPERATORS[name](element, literal(bound, JSONB)))
+
+    if contained:
+        clauses.insert(0, column.contains(contained))
+    return clauses
+
+
+def matches_metadata(metadata: Mapping[str, Any], filters: Mapping[str, Any]) -> bool:
+    """Python equivalent of metadata_filter_clauses."""
+    metadata = metadata or {}
+    for key, value in filters.items():
+        if not isinstance(value, dict):
+            if key not in metadata or not _contains(metadata[key], value):
+                return False
+            continue
+
+        actual = metadata.get(key)
+        if "in" in value and not any(
+            key in metadata and _contains(actual, option) for option in value["in"]
+        ):
+            return False
+        for name, bound in value.items():
+            if name not in RANGE_OPERATORS:
+                continue
+            if actual is None or _json_type(actual) != _json_type(bound):
+                return False
+            if not RANGE_OPERATORS[name](actual, bound):
+                return False
+    return True
+
+
+def _contains(value: Any, pattern: Any) -> bool:
+    """jsonb ``@>`` below the top level."""
+    if isinstance(pattern, dict):
+        return isinstance(value, dict) and all(
+            key in value and _contains(value[key], item) for key, item in pattern.items()
+        )
+    if isinstance(pattern, list):
+        return isinstance(value, list) and all(
+            any(_contains(element, item) for element in value) for item in pattern
+        )
+    return _json_type(value) == _json_type(pattern) and value == pattern
+
+
+def _json_type(value: Any) -> str:
+    """The jsonb_typeof of a decoded JSON value."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    return "object"
@@ -0,0 +1,282 @@
+"""Query Parser
+
+Compiles user search input into PostgreSQL tsquery syntax.
+
+Supported syntax:
+- ``water well``: all terms must match (``&``)
+- ``"clean water"``: phrase, words must be adjacent (``<->``)
+- ``-drought`` / ``-"dry season"``: exclude a term or phrase (``!``)
+- ``school OR clinic`` / ``school | clinic``: either term (``|``); OR binds
+  tighter than the implicit AND, so ``rural school OR clinic`` means
+  ``rural & (school | clinic)``
+
+Positive single terms are prefix-matched (``term:*``) so partially typed
+words still match, except stopwords and terms shorter than
+``SEARCH_PREFIX_MIN_LENGTH``, whose prefix expansion would touch a large
+part of the GIN index. Words joined by punctuation (``covid-19``) become a
+phrase.
+
+Unquoted positive terms are expanded with their synonyms (see
+app.search.synonyms) into OR groups.
+
+A query without a language is parsed under SEARCH_DEFAULT_LANGUAGE, the
+configuration the index defaults to. Only when the caller asks for all
+languages is its tsquery the OR of the query stemmed under every
+configured language, so documents in other languages match too. Ranking
+and SQL highlighting use that tsquery as well; BM25, the typo fallback and
+stopword handling stay with the default language.
+
+Parsed queries are memoized in a bounded LRU.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Mapping, Optional, Tuple
+
+from sqlalchemy import cast, func
+from sqlalchemy.dialects.postgresql import REGCONFIG
+
+from app.core.config import settings
+from app.search.languages import LANGUAGE_REGCONFIGS, regconfig_for
+from app.search.synonyms import synonym_dictionary
+
+# Common words per text search configuration. Postgres drops these from
+# the tsquery anyway; the parser uses them to avoid prefix-expanding them
+# and to drop them from AND clauses.
+STOPWORDS = {
+    "english": frozenset(
+        "a an and are as at be but by for from has have in into is it its of on or "
+        "that the their there these they this to was were will with".split()
+    ),
+    "spanish": frozenset(
+        "a al con de del el en es la las lo los mas o para pero por que se sin "
+        "su sus un una y".split()
+    ),
+    "french": frozenset(
+        "a au aux avec ce ces dans de des du elle en et il la le les leur mais ou "
+        "par pour qui sa se ses son sur un une".split()
+    ),
+    "portuguese": frozenset(
+        "a ao aos as com da das de do dos e em na nas no nos o os ou para por "
+        "que se sem um uma".split()
+    ),
+}
+
+_TOKEN_PATTERN = re.compile(r'(-?)"([^"]*)"?|(\S+)')
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class QueryTerm:
+    """A single word or a phrase of adjacent words."""
+    words: Tuple[str, ...]
+    prefix: bool = False  # Prefix-match the last word
+
+    def to_tsquery(self) -> str:
+        parts = list(self.words)
+        if self.prefix:
+            parts[-1] = f"{parts[-1]}:*"
+        return " <-> ".join(parts)
+
+
+@dataclass(frozen=True)
+class QueryClause:
+    """Alternatives of which at least one must match (or none, when negated)."""
+    alternatives: Tuple[QueryTerm, ...]
+    negated: bool = False
+
+    def to_tsquery(self) -> str:
+        rendered = [term.to_tsquery() for term in self.alternatives]
+        if len(rendered) == 1 and len(self.alternatives[0].words) == 1:
+            expression = rendered[0]
+        elif len(rendered) == 1:
+            expression = f"({rendered[0]})"
+        else:
+            expression = "(" + " | ".join(rendered) + ")"
+        return f"!{expression}" if self.negated else expression
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    """A compiled search query."""
+    text: str
+    regconfig: str
+    clauses: Tuple[QueryClause, ...]
+    # Further configurations the query also matches under (no language given)
+    other_regconfigs: Tuple[str, ...] = ()
+
+    @property
+    def tsquery(self) -> str:
+        """The query in to_tsquery syntax; empty when nothing is searchable."""
+        return " & ".join(clause.to_tsquery() for clause in self.clauses)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.clauses
+
+    @property
+    def terms(self) -> Tuple[str, ...]:
+        """Words the results should contain, e.g. for highlighting."""
+        words = []
+        for clause in self.clauses:
+            if clause.negated:
+                continue
+            for term in clause.alternatives:
+                for word in term.words:
+                    if word not in words:
+                        words.append(word)
+        return tuple(words)
+
+    @property
+    def positive_words(self) -> Tuple[Tuple[str, bool], ...]:
+        """(word, prefix) pairs of the positive clauses; only a term's last word is a prefix."""
+        words = []
+        for clause in self.clauses:
+            if clause.negated:
+                continue
+            for term in clause.alternatives:
+                last = len(term.words) - 1
+                for position, word in enumerate(term.words):
+                    entry = (word, term.prefix and position == last)
+                    if entry not in words:
+                        words.append(entry)
+        return tuple(words)
+
+    def any_word_tsquery(self, weights: str = "") -> str:
+        """The positive words ORed together, optionally restricted to lexeme weights.
+
+        ``any_word_tsquery("A")`` matches rows with a query word in the title.
+        """
+        return " | ".join(
+            f"{word}:{'*' if prefix else ''}{weights}" if prefix or weights else word
+            for word, prefix in self.positive_words
+        )
+
+    def to_tsquery(self, tsquery: Optional[str] = None):
+        """SQL expression for this query, or another tsquery string, in its language.
+
+        With other configurations, the tsqueries under each are ORed.
+        """
+        tsquery = self.tsquery if tsquery is None else tsquery
+        expression = func.to_tsquery(cast(self.regconfig, REGCONFIG), tsquery)
+        for regconfig in self.other_regconfigs:
+            expression = expression.op("||")(func.to_tsquery(cast(regconfig, REGCONFIG), tsquery))
+        return expression
+
+
+def parse_query(
+    query: str,
+    language: Optional[str] = None,
+    all_languages: bool = False
+) -> ParsedQuery:
+    """Parse a search query for the given language code.
+
+    Without a language, ``all_languages`` also matches the query under every
+    other configured language.
+    """
+    regconfig = regconfig_for(language)
+    other_regconfigs: Tuple[str, ...] = ()
+    if not language and all_languages:
+        other_regconfigs = tuple(
+            other for other in dict.fromkeys(LANGUAGE_REGCONFIGS.values()) if other != regconfig
+        )
+    return _parse_query(query, regconfig, synonym_dictionary.version, other_regconfigs)
+
+
+@lru_cache(maxsize=settings.SEARCH_QUERY_CACHE_SIZE)
+def _parse_query(
+    query: str,
+    regconfig: str,
+    synonyms_version: int,
+    other_regconfigs: Tuple[str, ...] = ()
+) -> ParsedQuery:
+    # synonyms_version only keys the cache: parses made before a synonym
+    # reload are not reused after it
+    stopwords = STOPWORDS.get(regconfig, frozenset())
+    clauses: List[QueryClause] = []
+    pending_or = False
+
+    for negation, phrase, chunk in _TOKEN_PATTERN.findall(query):
+        if not phrase and chunk in ("OR", "|"):
+            pending_or = bool(clauses)
+            continue
+
+        if phrase or negation:
+            negated = bool(negation)
+            words = tuple(_WORD_PATTERN.findall((phrase or "").lower()))
+            quoted = True
+        else:
+            negated = chunk.startswith("-") and len(chunk) > 1
+            words = tuple(_WORD_PATTERN.findall(chunk.lower()))
+            quoted = False
+
+        if not words:
+            pending_or = False
+            continue
+
+        alternatives = (QueryTerm(
+            words=words,
+            prefix=_should_prefix(words, quoted, negated, stopwords),
+        ),)
+        if not quoted and not negated:
+            # Synonyms match exactly, without prefix expansion
+            alternatives += tuple(
+                QueryTerm(words=synonym)
+                for synonym in synonym_dictionary.expand(regconfig, words)
+            )
+
+        # Join with the previous clause when both sides are positive
+        previous = clauses[-1] if clauses else None
+        if pending_or and previous is not None and not previous.negated and not negated:
+            clauses[-1] = QueryClause(alternatives=previous.alternatives + alternatives)
+        else:
+            clauses.append(QueryClause(alternatives=alternatives, negated=negated))
+        pending_or = False
+
+    return ParsedQuery(
+        text=query,
+        regconfig=regconfig,
+        clauses=_drop_stopword_clauses(clauses, stopwords),
+        other_regconfigs=other_regconfigs,
+    )
+
+
+def _should_prefix(
+    words: Tuple[str, ...],
+    quoted: bool,
+    negated: bool,
+    stopwords: frozenset
+) -> bool:
+    """Decide whether the last word of a term is prefix-matched."""
+    if quoted or negated:
+        return False
+    last_word = words[-1]
+    return len(last_word) >= settings.SEARCH_PREFIX_MIN_LENGTH and last_word not in stopwords
+
+
+def _drop_stopword_clauses(
+    clauses: List[QueryClause],
+    stopwords: frozenset
+) -> Tuple[QueryClause, ...]:
+    """Drop single-stopword AND clauses, unless the query is nothing but stopwords."""
+    def is_stopword_clause(clause: QueryClause) -> bool:
+        return all(
+            len(term.words) == 1 and term.words[0] in stopwords
+            for term in clause.alternatives
+        )
+
+    kept = tuple(clause for clause in clauses if not is_stopword_clause(clause))
+    return kept if kept else tuple(clauses)
+
+
+def replace_words(query: str, replacements: Mapping[str, str]) -> str:
+    """Replace whole words of a query as typed, case-insensitively, keeping its operators."""
+    for word, replacement in replacements.items():
+        query = re.sub(rf"\b{re.escape(word)}\b", replacement, query, flags=re.IGNORECASE)
+    return query
+
+
+def clear_query_cache() -> None:
+    """Forget memoized parses."""
+    _parse_query.cache_clear()
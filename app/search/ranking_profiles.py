@@ -0,0 +1,216 @@
+"""Ranking Profiles
+
+Relevance tuning per document type, compiled into the ORDER BY of
+relevance searches so the database returns pages already ranked.
+
+A profile sets:
+- ``weights``: the ts_rank weights of the labels the trigger assigns, A
+  (title), B (content), C (author name) and D (unused)
+- ``normalization``: ts_rank normalization flags, OR'ed together: 1
+  divides by 1 + log(document length), 2 by the length, 4 by the mean
+  harmonic distance between extents (ts_rank_cd only), 8 by the number of
+  unique words, 16 by 1 + log(unique words), 32 maps rank to rank / (rank + 1)
+- ``decay``: a recency multiplier on published_at that falls from 1 to
+  ``floor`` with age: ``exp`` halves every ``scale_days``, ``gauss``
+  halves at ``scale_days`` and falls faster after, ``linear`` reaches the
+  floor at ``scale_days``. Undated documents get the floor.
+
+SEARCH_RANKING_PROFILES holds the profiles by document type value, with
+"default" for every other type; a type's profile overrides only the keys
+it sets. Types sharing a profile share one CASE branch of the sort key.
+
+Weights and normalization apply to ts_rank and ts_rank_cd; BM25 has its
+own length normalization, so only the decay applies to it.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import Float, case, cast, extract, func, literal
+from sqlalchemy.dialects.postgresql import ARRAY, REAL, array
+
+from app.core.config import settings
+from app.models.search_index import DocumentType, SearchIndex
+from app.search.bm25 import bm25_score
+from app.search.query_parser import ParsedQuery
+
+DEFAULT_PROFILE = "default"
+LABELS = ("A", "B", "C", "D")
+# PostgreSQL's own ts_rank weights, in LABELS order
+DEFAULT_WEIGHTS = (1.0, 0.4, 0.2, 0.1)
+DECAY_FUNCTIONS = ("exp", "gauss", "linear")
+
+SECONDS_PER_DAY = 86400.0
+
+
+@dataclass(frozen=True)
+class RecencyDecay:
+    """Multiplier falling from 1 to ``floor`` as a document ages."""
+    function: str
+    scale_days: float
+    floor: float = 0.0
+
+    def factor(self, published_at: Optional[datetime], reference_time: datetime) -> float:
+        """The multiplier of a document published at ``published_at``."""
+        if published_at is None:
+            return self.floor
+        age = max((reference_time - published_at).total_seconds() / SECONDS_PER_DAY, 0.0)
+        ratio = age / self.scale_days
+        if self.function == "exp":
+            remaining = 0.5 ** ratio
+        elif self.function == "gauss":
+            remaining = 0.5 ** (ratio * ratio)
+        else:
+            remaining = max(1.0 - ratio, 0.0)
+        return self.floor + (1.0 - self.floor) * remaining
+
+    def expression(self, reference_time: datetime):
+        """SQL for :meth:`factor` of the current search_indexes row."""
+        seconds = cast(extract("epoch", literal(reference_time) - SearchIndex.published_at), Float)
+        age = func.greatest(seconds / SECONDS_PER_DAY, 0.0)
+        ratio = age / self.scale_days
+        if self.function == "exp":
+            remaining = func.power(0.5, ratio)
+        elif self.function == "gauss":
+            remaining = func.power(0.5, ratio * ratio)
+        else:
+            remaining = func.greatest(1.0 - ratio, 0.0)
+        return func.coalesce(self.floor + (1.0 - self.floor) * remaining, self.floor)
+
+
+@dataclass(frozen=True)
+class RankingProfile:
+    """How relevance is scored for some document types."""
+    weights: Tuple[float, float, float, float] = DEFAULT_WEIGHTS
+    normalization: int = 0
+    decay: Optional[RecencyDecay] = None
+
+    def rank_expression(self, ranking: str, parsed_query: ParsedQuery, reference_time: datetime):
+        """SQL relevance of the current row for a query under this profile."""
+        if ranking == "bm25":
+            rank = bm25_score(parsed_query)
+        else:
+            rank_function = func.ts_rank_cd if ranking == "ts_rank_cd" else func.ts_rank
+            arguments = [SearchIndex.search_vector, parsed_query.to_tsquery()]
+            if self.weights != DEFAULT_WEIGHTS:
+                # ts_rank takes the weights as {D, C, B, A}
+                weights = array([literal(weight) for weight in reversed(self.weights)])
+                arguments.insert(0, cast(weights, ARRAY(REAL)))
+            if self.normalization:
+                arguments.append(self.normalization)
+            rank = rank_function(*arguments)
+
+        if self.decay is not None:
+            rank = rank * self.decay.expression(reference_time)
+        return rank
+
+
+def parse_profiles(config: Mapping[str, Mapping[str, Any]]) -> Dict[str, RankingProfile]:
+    """Compile SEARCH_RANKING_PROFILES into profiles by document type value.
+
+    Raises ValueError for unknown document types, labels or decay
+    functions and for out-of-range values.
+    """
+    known = {DEFAULT_PROFILE, *(document_type.value for document_type in DocumentType)}
+    unknown = set(config) - known
+    if unknown:
+        raise ValueError(
+            f"Ranking profiles for unknown document types: {', '.join(sorted(unknown))}"
+        )
+
+    base = dict(config.get(DEFAULT_PROFILE, {}))
+    profiles = {DEFAULT_PROFILE: _profile(DEFAULT_PROFILE, base)}
+    for name, overrides in config.items():
+        if name != DEFAULT_PROFILE:
+            profiles[name] = _profile(name, {**base, **overrides})
+    return profiles
+
+
+def _profile(name: str, options: Mapping[str, Any]) -> RankingProfile:
+    weights = dict(zip(LABELS, DEFAULT_WEIGHTS))
+    for label, weight in (options.get("weights") or {}).items():
+        if label not in weights:
+            raise ValueError(f"Ranking profile {name!r}: unknown weight label {label!r}")
+        if not 0.0 <= float(weight) <= 1.0:
+            raise ValueError(f"Ranking profile {name!r}: weights must be between 0 and 1")
+        weights[label] = float(weight)
+
+    normalization = int(options.get("normalization", 0))
+    if not 0 <= normalization < 64:
+        raise ValueError(f"Ranking profile {name!r}: normalization flags must be between 0 and 63")
+
+    decay = None
+    if options.get("decay"):
+        decay_options = options["decay"]
+        decay = RecencyDecay(
+            function=decay_options.get("function", "exp"),
+            scale_days=float(decay_options["scale_days"]),
+            floor=float(decay_options.get("floor", 0.0)),
+        )
+        if decay.function not in DECAY_FUNCTIONS:
+            raise ValueError(
+                f"Ranking profile {name!r}: decay function must be one of "
+                f"{', '.join(DECAY_FUNCTIONS)}"
+            )
+        if decay.scale_days <= 0 or not 0.0 <= decay.floor <= 1.0:
+            raise ValueError(
+                f"Ranking profile {name!r}: decay needs scale_days > 0 and a floor between 0 and 1"
+            )
+
+    return RankingProfile(tuple(weights[label] for label in LABELS), normalization, decay)
+
+
+class RankingProfiles:
+    """The configured profiles, looked up by document type."""
+
+    def __init__(self, config: Mapping[str, Mapping[str, Any]]):
+        self.profiles = parse_profiles(config)
+
+    def for_type(self, document_type: DocumentType) -> RankingProfile:
+        value = DocumentType(document_type).value
+        return self.profiles.get(value, self.profiles[DEFAULT_PROFILE])
+
+    def decays(self, document_types: Optional[Iterable[DocumentType]] = None) -> bool:
+        """Whether the relevance of any of the types depends on the time."""
+        return any(profile.decay is not None for profile in self._groups(document_types))
+
+    def sort_key(
+        self,
+        ranking: str,
+        parsed_query: ParsedQuery,
+        document_types: Optional[Iterable[DocumentType]],
+        reference_time: datetime
+    ):
+        """Relevance sort key of a search over the given types (None for all).
+
+        One profile compiles to its rank expression alone; several to a CASE
+        on document_type, with the profile of the most types as the ELSE.
+        """
+        groups = self._groups(document_types)
+        ordered = sorted(groups.items(), key=lambda group: len(group[1]), reverse=True)
+        fallback = ordered[0][0].rank_expression(ranking, parsed_query, reference_time)
+        if len(ordered) == 1:
+            return fallback
+        return case(
+            *(
+                (
+                    SearchIndex.document_type.in_(types),
+                    profile.rank_expression(ranking, parsed_query, reference_time)
+                )
+                for profile, types in ordered[1:]
+            ),
+            else_=fallback
+        )
+
+    def _groups(
+        self,
+        document_types: Optional[Iterable[DocumentType]]
+    ) -> Dict[RankingProfile, List[DocumentType]]:
+        groups: Dict[RankingProfile, List[DocumentType]] = {}
+        for document_type in document_types or DocumentType:
+            groups.setdefault(self.for_type(document_type), []).append(DocumentType(document_type))
+        return groups
+
+
+ranking_profiles = RankingProfiles(settings.SEARCH_RANKING_PROFILES)
@@ -0,0 +1,138 @@
+"""Symmetric Delete Spelling Dictionary
+
+SymSpell-style lookup of the dictionary words within a small edit distance
+of a (possibly misspelled) word.
+
+Every dictionary word is indexed under all strings obtained by deleting up
+to ``max_edit_distance`` characters from it. A lookup generates the deletes
+of the input word the same way; any word sharing a delete with it is a
+candidate, and the candidates are verified with a bounded
+Damerau-Levenshtein (optimal string alignment) distance. Only deletes are
+generated, never inserts, replaces or transposes, so a lookup touches a
+few dozen hash buckets whatever the size of the dictionary.
+
+Deletes are generated from the first ``prefix_length`` characters only,
+which bounds the memory per word; the verification still uses the whole
+word.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    """A dictionary word close to the looked up word."""
+    term: str
+    distance: int
+    count: int  # Documents containing the term
+
+
+class SymSpellDictionary:
+    """Words with their document counts, indexed by their deletes."""
+
+    def __init__(self, max_edit_distance: int = 2, prefix_length: int = 7):
+        if prefix_length <= max_edit_distance:
+            raise ValueError("prefix_length must be greater than max_edit_distance")
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        self.words: Dict[str, int] = {}
+        self.deletes: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.words
+
+    def add(self, word: str, count: int = 1) -> None:
+        """Add a word, or add to the count of a known word."""
+        if word in self.words:
+            self.words[word] += count
+            return
+        self.words[word] = count
+        for delete in self._deletes(word[:self.prefix_length]):
+            self.deletes.setdefault(delete, []).append(word)
+
+    def lookup(
+        self,
+        word: str,
+        max_distance: Optional[int] = None,
+        limit: int = 5
+    ) -> List[Suggestion]:
+        """Dictionary words within ``max_distance`` edits, closest and most frequent first.
+
+        A word in the dictionary is its own only suggestion.
+        """
+        if word in self.words:
+            return [Suggestion(word, 0, self.words[word])]
+        if max_distance is None or max_distance > self.max_edit_distance:
+            max_distance = self.max_edit_distance
+
+        suggestions = []
+        seen: Set[str] = set()
+        for delete in self._deletes(word[:self.prefix_length], max_distance):
+            for candidate in self.deletes.get(delete, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                if abs(len(candidate) - len(word)) > max_distance:
+                    continue
+                distance = edit_distance(word, candidate, max_distance)
+                if distance <= max_distance:
+                    suggestions.append(Suggestion(candidate, distance, self.words[candidate]))
+
+        suggestions.sort(
+            key=lambda suggestion: (suggestion.distance, -suggestion.count, suggestion.term)
+        )
+        return suggestions[:limit]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "words": len(self.words),
+            "deletes": len(self.deletes),
+        }
+
+    def _deletes(self, word: str, max_distance: Optional[int] = None) -> Set[str]:
+        """The word and every string made by deleting up to max_distance of its characters."""
+        if max_distance is None:
+            max_distance = self.max_edit_distance
+        deletes = {word}
+        frontier = {word}
+        for _ in range(max_distance):
+            frontier = {
+                candidate[:position] + candidate[position + 1:]
+                for candidate in frontier
+                for position in range(len(candidate))
+            }
+            deletes |= frontier
+        return deletes
+
+
+def edit_distance(source: str, target: str, max_distance: int) -> int:
+    """Optimal string alignment distance, or max_distance + 1 once it is exceeded."""
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+
+    previous_previous: List[int] = []
+    previous = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        current = [i] + [0] * len(target)
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            current[j] = min(
+                previous[j] + 1,  # Deletion
+                current[j - 1] + 1,  # Insertion
+                previous[j - 1] + cost,  # Substitution
+            )
+            if (
+                i > 1 and j > 1
+                and source[i - 1] == target[j - 2]
+                and source[i - 2] == target[j - 1]
+            ):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)  # Transposition
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+
+    return min(previous[-1], max_distance + 1)
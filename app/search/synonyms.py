@@ -0,0 +1,113 @@
+"""Synonyms
+
+Synonym and acronym rules compiled into an in-memory mapping that the query
+parser expands into OR groups: with ``ngo, non-profit, ministry`` a search
+for ``ngo`` compiles to ``(ngo:* | non <-> profit | ministry)``.
+
+Rules use the Solr synonyms format, one per line:
+- ``ngo, non-profit, ministry, mission``: equivalent terms, each expands to
+  all the others
+- ``unicef => unicef, united nations children's fund``: the terms on the
+  left expand to those on the right only
+- ``#`` starts a comment
+
+Terms of several words become phrases. Only unquoted, positive terms are
+expanded: a quoted phrase or an excluded term means exactly what was typed.
+
+Every load that changes the mapping bumps ``version``, which is part of the
+parsed-query cache key, so expansions are cached per query and reloads take
+effect without clearing anything. ``digest()`` identifies the mapping
+across processes and restarts.
+"""
+
+import hashlib
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+Phrase = Tuple[str, ...]
+SynonymMapping = Dict[Optional[str], Dict[Phrase, Tuple[Phrase, ...]]]
+
+
+def parse_synonym_rules(
+    rules: Iterable[Tuple[str, Optional[str]]]
+) -> SynonymMapping:
+    """Compile (rule, regconfig) pairs into phrase -> synonyms per regconfig.
+
+    A None regconfig applies to every language. Malformed rules raise
+    ValueError.
+    """
+    mapping: Dict[Optional[str], Dict[Phrase, List[Phrase]]] = {}
+
+    for rule, regconfig in rules:
+        rule = rule.split("#", 1)[0].strip()
+        if not rule:
+            continue
+
+        if "=>" in rule:
+            left, right = rule.split("=>", 1)
+            sources, targets = _phrases(left), _phrases(right)
+            if not sources or not targets or "=>" in right:
+                raise ValueError(f"Malformed synonym rule: {rule!r}")
+        else:
+            sources = targets = _phrases(rule)
+
+        expansions = mapping.setdefault(regconfig, {})
+        for source in sources:
+            synonyms = expansions.setdefault(source, [])
+            for target in targets:
+                if target != source and target not in synonyms:
+                    synonyms.append(target)
+
+    return {
+        regconfig: {source: tuple(synonyms) for source, synonyms in expansions.items() if synonyms}
+        for regconfig, expansions in mapping.items()
+    }
+
+
+def _phrases(terms: str) -> List[Phrase]:
+    phrases = []
+    for term in terms.split(","):
+        words = tuple(_WORD_PATTERN.findall(term.lower()))
+        if words and words not in phrases:
+            phrases.append(words)
+    return phrases
+
+
+class SynonymDictionary:
+    """The compiled synonym mapping in use."""
+
+    def __init__(self):
+        self.mapping: SynonymMapping = {}
+        self.version = 0
+
+    def __len__(self) -> int:
+        return sum(len(expansions) for expansions in self.mapping.values())
+
+    def replace(self, mapping: SynonymMapping) -> bool:
+        """Swap in a new mapping; returns whether it differs from the current one."""
+        if mapping == self.mapping:
+            return False
+        self.mapping = mapping
+        self.version += 1
+        return True
+
+    def digest(self) -> str:
+        """Hash of the mapping, the same in every process loading the same rules."""
+        canonical = sorted(
+            (regconfig or "", sorted(expansions.items()))
+            for regconfig, expansions in self.mapping.items()
+        )
+        return hashlib.sha256(repr(canonical).encode("utf-8")).hexdigest()
+
+    def expand(self, regconfig: str, words: Phrase) -> Tuple[Phrase, ...]:
+        """Synonyms of a phrase under a text search configuration, language-specific ones first."""
+        synonyms = list(self.mapping.get(regconfig, {}).get(words, ()))
+        for synonym in self.mapping.get(None, {}).get(words, ()):
+            if synonym not in synonyms:
+                synonyms.append(synonym)
+        return tuple(synonyms)
+
+
+synonym_dictionary = SynonymDictionary()
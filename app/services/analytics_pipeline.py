@@ -0,0 +1,308 @@
+"""Analytics Pipeline
+
+Records search analytics off the request path.
+
+Searches submit events to a bounded in-process queue and return
+immediately. A background flusher bulk-inserts the queued SearchQuery rows
+and applies the aggregated SearchSuggestion usage increments with one
+UPSERT per flush, in a single transaction. When the queue runs hot, events
+are sampled or dropped instead of slowing searches down.
+
+A search's query_id reaches the client before its row is written, so
+clicks on searches still in the pipeline are recorded on the queued event
+and written with it.
+"""
+
+import asyncio
+import logging
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.search_query import SearchQuery
+from app.models.search_suggestion import SearchSuggestion
+from app.services.search_analytics_service import is_suggestible
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SearchEvent:
+    """A search to be recorded in analytics."""
+    query_text: str
+    language: Optional[str]
+    filters: Dict[str, Any]
+    results_count: int
+    user_id: Optional[UUID]
+    execution_time: float
+    result_ids: List[UUID] = field(default_factory=list)
+    clicked_result_id: Optional[UUID] = None
+    id: UUID = field(default_factory=uuid4)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+
+class AnalyticsPipeline:
+    """Bounded queue plus batching flusher for search analytics."""
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow_policy: str = "sample",
+        sample_watermark: float = 0.8,
+        sample_rate: float = 0.1,
+        drain_timeout: float = 10.0
+    ):
+        self.session_factory = session_factory
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.sample_watermark = sample_watermark
+        self.sample_rate = sample_rate
+        self.drain_timeout = drain_timeout
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        # Accepted events whose rows are not committed yet, by id
+        self._pending: Dict[UUID, SearchEvent] = {}
+
+        self.accepted = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.flushed = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._stopping
+
+    async def start(self) -> None:
+        """Start the background flusher."""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="analytics-flusher")
+        logger.info("Analytics pipeline started")
+
+    def submit(self, event: SearchEvent) -> bool:
+        """Queue an event without waiting. Returns False if it was shed."""
+        if not self.running:
+            self.dropped += 1
+            return False
+
+        size = self._queue.qsize()
+        if (
+            self.overflow_policy == "sample"
+            and size >= self.max_queue_size * self.sample_watermark
+            and random.random() >= self.sample_rate
+        ):
+            self.sampled_out += 1
+            return False
+
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+        self._pending[event.id] = event
+        self.accepted += 1
+        return True
+
+    def record_click(
+        self,
+        query_id: UUID,
+        clicked_result_id: UUID,
+        user_id: Optional[UUID] = None
+    ) -> Optional[bool]:
+        """Record a click on a search still waiting to be written.
+
+        Validated like SearchAnalyticsService.track_click. Returns None
+        when the search is not in the pipeline, to be looked up in the
+        database instead.
+        """
+        event = self._pending.get(query_id)
+        if event is None:
+            return None
+        if clicked_result_id not in event.result_ids:
+            return False
+        if event.user_id is not None and event.user_id != user_id:
+            return False
+        event.clicked_result_id = clicked_result_id
+        return True
+
+    async def stop(self) -> None:
+        """Stop accepting events and flush what is queued."""
+        if self._task is None:
+            return
+
+        self._stopping = True
+        await self._queue.put(None)  # Wake the flusher and mark the end
+
+        try:
+            await asyncio.wait_for(self._task, timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Analytics drain timed out, discarding {self._queue.qsize()} events"
+            )
+            self._task.cancel()
+
+        self._task = None
+        self._pending.clear()
+        logger.info("Analytics pipeline stopped")
+
+    def stats(self) -> Dict[str, Any]:
+        """Pipeline counters."""
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "accepted": self.accepted,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "failed": self.failed,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        finished = False
+
+        while not finished:
+            event = await self._queue.get()
+            if event is None:
+                break
+
+            batch = [event]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if event is None:
+                    finished = True
+                    break
+                batch.append(event)
+
+            await self._flush(batch)
+
+    async def _flush(self, events: List[SearchEvent]) -> None:
+        """Write a batch of events in one transaction."""
+        clicks = [event.clicked_result_id for event in events]
+        try:
+            async with self.session_factory() as session:
+                await session.execute(
+                    insert(SearchQuery),
+                    [
+                        {
+                            "id": event.id,
+                            "query_text": event.query_text,
+                            "language": event.language,
+                            "filters": event.filters,
+                            "results_count": event.results_count,
+                            "user_id": event.user_id,
+                            "execution_time": event.execution_time,
+                            "result_ids": event.result_ids,
+                            "clicked_result_id": clicked_result_id,
+                            "created_at": event.created_at,
+                        }
+                        for event, clicked_result_id in zip(events, clicks)
+                    ]
+                )
+
+                suggestions = self._suggestion_increments(events)
+                if suggestions:
+                    await session.execute(self._suggestion_upsert(suggestions))
+
+                await session.commit()
+
+                # Later clicks find the rows; clicks made while they were
+                # being written are applied now
+                self._settle(events)
+                late = [
+                    event for event, clicked_result_id in zip(events, clicks)
+                    if event.clicked_result_id != clicked_result_id
+                ]
+                for event in late:
+                    await session.execute(
+                        update(SearchQuery)
+                        .where(SearchQuery.id == event.id)
+                        .values(clicked_result_id=event.clicked_result_id)
+                    )
+                if late:
+                    await session.commit()
+            self.flushed += len(events)
+        except Exception as e:
+            self.failed += len(events)
+            logger.error(f"Failed to flush {len(events)} analytics events: {e}")
+        finally:
+            self._settle(events)
+
+    def _settle(self, events: List[SearchEvent]) -> None:
+        for event in events:
+            self._pending.pop(event.id, None)
+
+    def _suggestion_increments(self, events: List[SearchEvent]) -> List[Dict[str, Any]]:
+        """Aggregate suggestion usage per query text for the batch."""
+        counts: Counter = Counter()
+        languages: Dict[str, str] = {}
+        last_used: Dict[str, datetime] = {}
+
+        for event in events:
+            if not is_suggestible(event.query_text):
+                continue
+            counts[event.query_text] += 1
+            languages.setdefault(event.query_text, event.language or "en")
+            last_used[event.query_text] = max(
+                event.created_at, last_used.get(event.query_text, event.created_at)
+            )
+
+        return [
+            {
+                "id": uuid4(),
+                "suggestion_text": text,
+                "language": languages[text],
+                "usage_count": count,
+                "last_used_at": last_used[text],
+                "updated_at": last_used[text],
+            }
+            for text, count in counts.items()
+        ]
+
+    def _suggestion_upsert(self, suggestions: List[Dict[str, Any]]):
+        stmt = pg_insert(SearchSuggestion).values(suggestions)
+        return stmt.on_conflict_do_update(
+            index_elements=[SearchSuggestion.suggestion_text],
+            set_={
+                "usage_count": SearchSuggestion.usage_count + stmt.excluded.usage_count,
+                "last_used_at": stmt.excluded.last_used_at,
+                "updated_at": stmt.excluded.updated_at,
+            }
+        )
+
+
+analytics_pipeline = AnalyticsPipeline(
+    max_queue_size=settings.ANALYTICS_QUEUE_SIZE,
+    batch_size=settings.ANALYTICS_BATCH_SIZE,
+    flush_interval=settings.ANALYTICS_FLUSH_INTERVAL_SECONDS,
+    overflow_policy=settings.ANALYTICS_OVERFLOW_POLICY,
+    sample_watermark=settings.ANALYTICS_SAMPLE_WATERMARK,
+    sample_rate=settings.ANALYTICS_SAMPLE_RATE,
+    drain_timeout=settings.ANALYTICS_DRAIN_TIMEOUT_SECONDS,
+)
@@ -3,6 +3,7 @@
 Handles autocomplete and search suggestions.
 """
 
+import time
 from datetime import datetime
 from typing import List, Optional
 from uuid import UUID, uuid4
@@ -10,8 +11,15 @@ from uuid import UUID, uuid4
 from sqlalchemy import select, func, or_, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.single_flight import SingleFlight
 from app.models.search_suggestion import SearchSuggestion
 from app.models.search_query import SearchQuery
+from app.services.slow_query_recorder import slow_query_recorder
+
+
+# Shared by every AutoCompleteService in the process
+suggestion_flight = SingleFlight()
 
 
 class AutoCompleteService:
@@ -26,7 +34,25 @@ class AutoCompleteService:
         language: Optional[str] = None,
         limit: int = 10
     ) -> List[str]:
-        """Get autocomplete suggestions using trigram similarity."""
+        """Get autocomplete suggestions using trigram similarity.
+        
+        Identical concurrent lookups share one execution.
+        """
+        if not settings.SEARCH_COALESCE_REQUESTS:
+            return await self._get_suggestions(query, language, limit)
+        
+        suggestions, _ = await suggestion_flight.do(
+            (query, language, limit),
+            lambda: self._get_suggestions(query, language, limit)
+        )
+        return list(suggestions)
+    
+    async def _get_suggestions(
+        self,
+        query: str,
+        language: Optional[str],
+        limit: int
+    ) -> List[str]:
         if not query or len(query) < 2:
             # For very short queries, return popular suggestions
             return await self.get_popular_searches(language, limit)
@@ -45,7 +71,7 @@ class AutoCompleteService:
             desc(SearchSuggestion.usage_count)
         ).limit(limit)
         
-        result = await self.db.execute(stmt)
+        result = await self._execute(stmt, query)
         suggestions = [row[0] for row in result]
         
         # If we don't have enough suggestions, try prefix matching
@@ -61,7 +87,7 @@ class AutoCompleteService:
                 desc(SearchSuggestion.usage_count)
             ).limit(limit - len(suggestions))
             
-            prefix_result = await self.db.execute(prefix_stmt)
+            prefix_result = await self._execute(prefix_stmt, query)
             prefix_suggestions = [row[0] for row in prefix_result]
             
             # Add unique suggestions
@@ -71,6 +97,15 @@ class AutoCompleteService:
         
         return suggestions[:limit]
     
+    async def _execute(self, stmt, query: str):
+        """Execute a suggestion lookup, handing it to the slow-query recorder."""
+        started = time.perf_counter()
+        result = await self.db.execute(stmt)
+        slow_query_recorder.observe(
+            "autocomplete", stmt, (time.perf_counter() - started) * 1000, query
+        )
+        return result
+    
     async def get_popular_searches(
         self,
         language: Optional[str] = None,
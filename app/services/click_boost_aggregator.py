@@ -0,0 +1,251 @@
+"""Click Boost Aggregator
+
+Periodically rebuilds search_click_boosts from the clicks recorded in
+search_queries over the last SEARCH_CLICK_BOOST_WINDOW_DAYS:
+
+- per (normalized query, result): ``1 + QUERY_WEIGHT * ctr``, where the
+  click-through rate ``ctr = clicks / (searches + PRIOR_SEARCHES)`` is
+  smoothed so a query searched a handful of times cannot earn a full
+  boost, capped at SEARCH_CLICK_BOOST_MAX
+- per result, under any query: ``1 + DOCUMENT_WEIGHT * ln(1 + clicks) /
+  ln(1 + most clicks of any result)``
+
+Results need SEARCH_CLICK_BOOST_MIN_CLICKS clicks to be boosted. The table
+is replaced in one transaction, so searches see either the old boosts or
+the new ones. Every worker runs the loop, but a transaction-level advisory
+lock and the time of the last rebuild, kept in search_click_boost_rebuilds,
+make one worker per interval do the work. Cached results are only dropped
+when a rebuild changed the boosts.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import Float, cast, delete, func, insert, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.cache import get_search_cache
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.search_click_boost import SearchClickBoost, SearchClickBoostRebuild
+from app.models.search_index import SearchIndex
+from app.models.search_query import SearchQuery
+from app.search.click_boosts import DOCUMENT_BOOST_KEY, normalize_query_sql
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_xact_lock key serializing rebuilds across workers
+ADVISORY_LOCK_KEY = 0x5EA7C11C
+
+_COLUMNS = ["id", "query_key", "clicks", "searches", "boost", "created_at", "updated_at"]
+
+
+class ClickBoostAggregator:
+    """Keeps search_click_boosts in line with recent click-through."""
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        refresh_interval: float = 3600,
+        window_days: int = 90,
+        min_clicks: int = 3,
+        prior_searches: int = 10,
+        query_weight: float = 1.0,
+        document_weight: float = 0.2,
+        max_boost: float = 2.0
+    ):
+        self.session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self.window_days = window_days
+        self.min_clicks = min_clicks
+        self.prior_searches = prior_searches
+        self.query_weight = query_weight
+        self.document_weight = document_weight
+        self.max_boost = max_boost
+
+        self.aggregated_at: Optional[datetime] = None
+        self.boosts = 0
+
+        self._started = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start the periodic rebuild; the first runs right away if the boosts are stale."""
+        if self._started:
+            return
+        self._started = True
+        self._task = asyncio.create_task(self._refresh_loop(), name="click-boost-aggregation")
+        logger.info("Click boost aggregator started")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._started = False
+
+    async def aggregate(self, force: bool = False) -> bool:
+        """Rebuild the boosts; returns whether this call rebuilt them.
+
+        Without ``force`` the rebuild is skipped when another worker is at
+        it or did it less than a refresh interval ago.
+        """
+        try:
+            async with self.session_factory() as session:
+                async with session.begin():
+                    locked = await session.scalar(
+                        select(func.pg_try_advisory_xact_lock(ADVISORY_LOCK_KEY))
+                    )
+                    if not locked:
+                        return False
+                    if not force and await self._is_fresh(session):
+                        return False
+
+                    now = datetime.utcnow()
+                    since = now - timedelta(days=self.window_days)
+                    previous = await session.scalar(self.checksum())
+                    await session.execute(delete(SearchClickBoost))
+                    inserted = 0
+                    statements = (self.query_boosts(since, now), self.document_boosts(since, now))
+                    for statement in statements:
+                        result = await session.execute(
+                            insert(SearchClickBoost).from_select(_COLUMNS, statement)
+                        )
+                        inserted += result.rowcount
+                    changed = await session.scalar(self.checksum()) != previous
+                    await session.execute(self._record_rebuild(inserted, now))
+        except Exception as e:
+            logger.error(f"Failed to aggregate click boosts: {e}")
+            return False
+
+        self.boosts = inserted
+        self.aggregated_at = datetime.utcnow()
+        logger.info(f"Click boosts rebuilt: {inserted} boosts{'' if changed else ', unchanged'}")
+        # Cached results were ranked with the old boosts
+        cache = get_search_cache()
+        if changed and cache is not None:
+            await cache.invalidate_all()
+        return True
+
+    def checksum(self):
+        """SELECT of an md5 over every boost, NULL when there are none."""
+        boost = func.concat_ws(
+            ":", SearchClickBoost.id, SearchClickBoost.query_key, SearchClickBoost.boost
+        )
+        in_order = aggregate_order_by(
+            literal_column("','"), SearchClickBoost.id, SearchClickBoost.query_key
+        )
+        return select(func.md5(func.string_agg(boost, in_order)))
+
+    def query_boosts(self, since: datetime, now: datetime):
+        """SELECT of the per-(query, result) boosts, in _COLUMNS order."""
+        recent = select(
+            normalize_query_sql(SearchQuery.query_text).label("query_key"),
+            SearchQuery.clicked_result_id.label("id")
+        ).where(SearchQuery.created_at >= since).cte("recent")
+
+        searches = select(
+            recent.c.query_key,
+            func.count().label("searches")
+        ).group_by(recent.c.query_key).subquery("searches")
+
+        clicks = select(
+            recent.c.query_key,
+            recent.c.id,
+            func.count().label("clicks")
+        ).where(
+            recent.c.id.is_not(None),
+            recent.c.query_key != DOCUMENT_BOOST_KEY
+        ).group_by(
+            recent.c.query_key, recent.c.id
+        ).having(func.count() >= self.min_clicks).subquery("clicks")
+
+        click_through = (
+            cast(clicks.c.clicks, Float)
+            / cast(searches.c.searches + self.prior_searches, Float)
+        )
+        return select(
+            clicks.c.id,
+            clicks.c.query_key,
+            clicks.c.clicks,
+            searches.c.searches,
+            func.least(1.0 + self.query_weight * click_through, self.max_boost),
+            literal(now),
+            literal(now)
+        ).join_from(
+            clicks, searches, searches.c.query_key == clicks.c.query_key
+        ).join(
+            # Results deleted since they were clicked
+            SearchIndex, SearchIndex.id == clicks.c.id
+        )
+
+    def document_boosts(self, since: datetime, now: datetime):
+        """SELECT of the per-result boosts, in _COLUMNS order."""
+        clicks = select(
+            SearchQuery.clicked_result_id.label("id"),
+            func.count().label("clicks")
+        ).where(
+            SearchQuery.created_at >= since,
+            SearchQuery.clicked_result_id.is_not(None)
+        ).group_by(
+            SearchQuery.clicked_result_id
+        ).having(func.count() >= self.min_clicks).subquery("clicks")
+
+        most_clicks = func.max(clicks.c.clicks).over()
+        return select(
+            clicks.c.id,
+            literal(DOCUMENT_BOOST_KEY),
+            clicks.c.clicks,
+            literal(0),
+            1.0 + self.document_weight * func.ln(1.0 + clicks.c.clicks)
+            / cast(func.ln(1.0 + most_clicks), Float),
+            literal(now),
+            literal(now)
+        ).join(SearchIndex, SearchIndex.id == clicks.c.id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "aggregated_at": self.aggregated_at.isoformat() if self.aggregated_at else None,
+            "boosts": self.boosts,
+            "window_days": self.window_days,
+            "min_clicks": self.min_clicks,
+        }
+
+    async def _is_fresh(self, session) -> bool:
+        """Whether some worker rebuilt the boosts less than a refresh interval ago."""
+        rebuilt_at = await session.scalar(
+            select(SearchClickBoostRebuild.rebuilt_at).where(SearchClickBoostRebuild.id == 1)
+        )
+        return (
+            rebuilt_at is not None
+            and rebuilt_at > datetime.utcnow() - timedelta(seconds=self.refresh_interval)
+        )
+
+    def _record_rebuild(self, boosts: int, now: datetime):
+        statement = pg_insert(SearchClickBoostRebuild).values(id=1, boosts=boosts, rebuilt_at=now)
+        return statement.on_conflict_do_update(
+            index_elements=[SearchClickBoostRebuild.id],
+            set_={"boosts": statement.excluded.boosts, "rebuilt_at": statement.excluded.rebuilt_at}
+        )
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self.aggregate()
+            await asyncio.sleep(self.refresh_interval)
+
+
+click_boost_aggregator = ClickBoostAggregator(
+    refresh_interval=settings.SEARCH_CLICK_BOOST_REFRESH_SECONDS,
+    window_days=settings.SEARCH_CLICK_BOOST_WINDOW_DAYS,
+    min_clicks=settings.SEARCH_CLICK_BOOST_MIN_CLICKS,
+    prior_searches=settings.SEARCH_CLICK_BOOST_PRIOR_SEARCHES,
+    query_weight=settings.SEARCH_CLICK_BOOST_QUERY_WEIGHT,
+    document_weight=settings.SEARCH_CLICK_BOOST_DOCUMENT_WEIGHT,
+    max_boost=settings.SEARCH_CLICK_BOOST_MAX,
+)
@@ -0,0 +1,129 @@
+"""Corpus Statistics Service
+
+Keeps the BM25 corpus statistics (lexeme document frequencies, document
+count and total document length) in step with search_indexes.
+
+IndexingService subtracts a document's contribution before changing or
+deleting it and adds it back after the write has been flushed, inside the
+same transaction, so the statistics never need a full recount.
+
+Concurrent writers would all queue on a single totals row, so the totals
+are spread over CORPUS_STATS_SHARDS rows, picked by backend process id,
+and summed by readers. Lexeme rows are locked in lexeme order so that two
+writers touching the same lexemes cannot deadlock, and lexemes no document
+contains any more are deleted.
+"""
+
+from sqlalchemy import delete, func, literal, select, text, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.corpus_stats import SearchCorpusStats, SearchTermStat
+from app.models.search_index import SearchIndex
+
+# Rows the corpus totals are spread over; readers sum them
+CORPUS_STATS_SHARDS = 16
+
+
+class CorpusStatsService:
+    """Service maintaining BM25 corpus statistics."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def add_documents(self, criterion) -> None:
+        """Count the documents matching ``criterion`` into the statistics."""
+        await self._apply(criterion, 1)
+
+    async def remove_documents(self, criterion) -> None:
+        """Take the documents matching ``criterion`` out of the statistics."""
+        await self._apply(criterion, -1)
+
+    async def reset(self) -> None:
+        """Empty the statistics, e.g. after the index was cleared."""
+        await self.db.execute(delete(SearchTermStat))
+        await self.db.execute(delete(SearchCorpusStats))
+
+    async def rebuild(self) -> None:
+        """Recount the statistics from scratch."""
+        await self.db.execute(delete(SearchTermStat))
+        await self.db.execute(text(
+            "INSERT INTO search_term_stats (id, lexeme, document_count) "
+            "SELECT gen_random_uuid(), word, ndoc "
+            "FROM ts_stat('SELECT search_vector FROM search_indexes') ORDER BY word"
+        ))
+        await self.db.execute(delete(SearchCorpusStats))
+        await self.db.execute(self._corpus_upsert(self._totals(true(), 1)))
+
+    async def _apply(self, criterion, sign: int) -> None:
+        lexemes = select(
+            func.unnest(func.tsvector_to_array(SearchIndex.search_vector)).label("lexeme")
+        ).where(criterion).subquery("lexemes")
+
+        if sign > 0:
+            # Rows are inserted, and conflicting rows locked, in lexeme order
+            counts = select(
+                func.gen_random_uuid(),
+                lexemes.c.lexeme,
+                func.count()
+            ).group_by(lexemes.c.lexeme).order_by(lexemes.c.lexeme)
+            stmt = pg_insert(SearchTermStat).from_select(["id", "lexeme", "document_count"], counts)
+            await self.db.execute(stmt.on_conflict_do_update(
+                index_elements=[SearchTermStat.lexeme],
+                set_={
+                    "document_count": SearchTermStat.document_count + stmt.excluded.document_count,
+                    "updated_at": func.now(),
+                }
+            ))
+        else:
+            counts = select(
+                lexemes.c.lexeme,
+                func.count().label("document_count")
+            ).group_by(lexemes.c.lexeme).subquery("counts")
+            # UPDATE ... FROM locks rows in join order; take the locks in lexeme order first
+            await self.db.execute(
+                select(SearchTermStat.id)
+                .where(SearchTermStat.lexeme.in_(select(counts.c.lexeme)))
+                .order_by(SearchTermStat.lexeme)
+                .with_for_update()
+            )
+            await self.db.execute(
+                update(SearchTermStat)
+                .where(SearchTermStat.lexeme == counts.c.lexeme)
+                .values(
+                    document_count=SearchTermStat.document_count - counts.c.document_count,
+                    updated_at=func.now()
+                )
+            )
+            # Lexemes of no document any more would still be offered as corrections
+            await self.db.execute(
+                delete(SearchTermStat).where(
+                    SearchTermStat.lexeme.in_(select(counts.c.lexeme)),
+                    SearchTermStat.document_count <= 0
+                )
+            )
+
+        await self.db.execute(self._corpus_upsert(self._totals(criterion, sign)))
+
+    def _totals(self, criterion, sign: int):
+        """Corpus row values for the documents matching ``criterion``, on this backend's shard."""
+        return select(
+            func.pg_backend_pid() % CORPUS_STATS_SHARDS + 1,
+            func.count() * sign,
+            func.coalesce(func.sum(SearchIndex.document_length), 0) * sign,
+            func.now()
+        ).where(criterion)
+
+    def _corpus_upsert(self, totals):
+        """Insert a corpus row, or add to its totals."""
+        stmt = pg_insert(SearchCorpusStats).from_select(
+            ["id", "document_count", "total_length", "updated_at"], totals
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=[SearchCorpusStats.id],
+            set_={
+                "document_count": SearchCorpusStats.document_count + stmt.excluded.document_count,
+                "total_length": SearchCorpusStats.total_length + stmt.excluded.total_length,
+                "updated_at": stmt.excluded.updated_at,
+            }
+        )
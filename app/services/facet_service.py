@@ -3,14 +3,37 @@
 Handles faceted search and filtering.
 """
 
-from typing import Dict, List, Any, Optional
+import time
+from typing import Dict, List, Any, Optional, Sequence, Tuple
 from uuid import UUID
 
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.db.session import statement_timeout
 from app.models.search_index import SearchIndex, DocumentType
 from app.schemas.search import FacetRequest, FacetResponse, FacetOption
+from app.search.metadata_filters import metadata_filter_clauses
+from app.search.query_parser import parse_query
+from app.services.slow_query_recorder import slow_query_recorder
+
+# Columns facets can be computed for
+FACET_COLUMNS = {
+    "document_type": SearchIndex.document_type,
+    "language": SearchIndex.language,
+    "author_name": SearchIndex.author_name,
+    "status": SearchIndex.status,
+}
+
+LANGUAGE_LABELS = {
+    "en": "English",
+    "es": "Spanish",
+    "fr": "French",
+    "pt": "Portuguese"
+}
+
+MAX_AUTHOR_FACETS = 20
 
 
 class FacetService:
@@ -23,36 +46,30 @@ class FacetService:
         self,
         request: FacetRequest
     ) -> FacetResponse:
-        """Get facets for a search query."""
+        """Get facets for a search query.
+        
+        The aggregation runs under a statement_timeout of
+        SEARCH_FACET_TIMEOUT_SECONDS.
+        """
         # Base query with search
         base_query = select(SearchIndex)
         
         # Apply search vector filter
-        search_query = self._prepare_search_query(request.query)
+        language = request.filters.get("language") if request.filters else None
+        parsed_query = parse_query(request.query, language)
         base_query = base_query.where(
-            SearchIndex.search_vector.op('@@')(func.to_tsquery(search_query))
+            SearchIndex.search_vector.op('@@')(parsed_query.to_tsquery())
         )
         
         # Apply existing filters
         if request.filters:
             base_query = self._apply_filters(base_query, request.filters)
         
-        # Get total count
-        count_query = select(func.count()).select_from(base_query.subquery())
-        total_results = (await self.db.execute(count_query)).scalar_one()
-        
-        # Generate facets for each field
-        facets = {}
-        
-        for field in request.facet_fields:
-            if field == "document_type":
-                facets["document_type"] = await self._get_document_type_facets(base_query)
-            elif field == "language":
-                facets["language"] = await self._get_language_facets(base_query)
-            elif field == "author_name":
-                facets["author_name"] = await self._get_author_facets(base_query)
-            elif field == "status":
-                facets["status"] = await self._get_status_facets(base_query)
+        # Count the matches and every facet in one aggregation
+        async with statement_timeout(self.db, settings.SEARCH_FACET_TIMEOUT_SECONDS):
+            total_results, facets = await self.aggregate_facets(
+                base_query, request.facet_fields, query_text=request.query
+            )
         
         return FacetResponse(
             query=request.query,
@@ -60,6 +77,63 @@ class FacetService:
             total_results=total_results
         )
     
+    async def aggregate_facets(
+        self,
+        matched_query,
+        facet_fields: Sequence[str],
+        query_text: str = ""
+    ) -> Tuple[int, Dict[str, List[FacetOption]]]:
+        """Count the matched rows and their facet values in a single statement.
+        
+        ``matched_query`` is a select over search_indexes carrying the match
+        and filter criteria. Its rows are grouped with one grouping set per
+        facet field plus the empty set, so the full-text match runs once and
+        the empty set yields the total. Unknown fields are ignored; with none
+        left only the total is counted.
+        ``query_text`` labels the statement for the slow-query recorder.
+        """
+        fields = [field for field in dict.fromkeys(facet_fields) if field in FACET_COLUMNS]
+        
+        # The id keeps the subquery (and its FROM) non-empty without facet fields
+        matched = matched_query.with_only_columns(
+            SearchIndex.id,
+            *[FACET_COLUMNS[field] for field in fields]
+        ).subquery("matched")
+        
+        grouping_sets = [tuple_(matched.c[field]) for field in fields] + [tuple_()]
+        stmt = select(
+            *[matched.c[field] for field in fields],
+            *[func.grouping(matched.c[field]).label(f"grouping_{field}") for field in fields],
+            func.count().label("count")
+        ).select_from(matched).group_by(func.grouping_sets(*grouping_sets))
+        
+        started = time.perf_counter()
+        result = await self.db.execute(stmt)
+        slow_query_recorder.observe(
+            "facets", stmt, (time.perf_counter() - started) * 1000, query_text
+        )
+        
+        total_results = 0
+        facets: Dict[str, List[FacetOption]] = {field: [] for field in fields}
+        for row in result:
+            mapping = row._mapping
+            # grouping() is 0 for the column the row was grouped by
+            field = next(
+                (field for field in fields if mapping[f"grouping_{field}"] == 0),
+                None
+            )
+            if field is None:
+                total_results = mapping["count"]
+            elif mapping[field] is not None:
+                facets[field].append(self._facet_option(field, mapping[field], mapping["count"]))
+        
+        for field, options in facets.items():
+            options.sort(key=lambda x: x.count, reverse=True)
+            if field == "author_name":
+                del options[MAX_AUTHOR_FACETS:]
+        
+        return total_results, facets
+    
     async def get_filter_options(self, field: str) -> List[FacetOption]:
         """Get all available options for a filter field."""
         if field == "document_type":
@@ -83,9 +157,9 @@ class FacetService:
         base_query = select(func.count(SearchIndex.id))
         
         # Apply search
-        search_query = self._prepare_search_query(query)
+        parsed_query = parse_query(query, facet_value if facet_field == "language" else None)
         base_query = base_query.where(
-            SearchIndex.search_vector.op('@@')(func.to_tsquery(search_query))
+            SearchIndex.search_vector.op('@@')(parsed_query.to_tsquery())
         )
         
         # Apply facet filter
@@ -112,11 +186,7 @@ class FacetService:
         
         facets = []
         for row in result:
-            facets.append(FacetOption(
-                value=row[0].value,
-                count=row[1],
-                label=row[0].value.replace('_', ' ').title()
-            ))
+            facets.append(self._facet_option("document_type", row[0], row[1]))
         
         return sorted(facets, key=lambda x: x.count, reverse=True)
     
@@ -129,21 +199,9 @@ class FacetService:
         
         result = await self.db.execute(stmt)
         
-        # Map language codes to labels
-        lang_labels = {
-            "en": "English",
-            "es": "Spanish",
-            "fr": "French",
-            "pt": "Portuguese"
-        }
-        
         facets = []
         for row in result:
-            facets.append(FacetOption(
-                value=row[0],
-                count=row[1],
-                label=lang_labels.get(row[0], row[0].upper())
-            ))
+            facets.append(self._facet_option("language", row[0], row[1]))
         
         return sorted(facets, key=lambda x: x.count, reverse=True)
     
@@ -161,13 +219,10 @@ class FacetService:
         facets = []
         for row in result:
             if row[0]:  # Skip null authors
-                facets.append(FacetOption(
-                    value=row[0],
-                    count=row[1],
-                    label=row[0]
-                ))
+                facets.append(self._facet_option("author_name", row[0], row[1]))
         
-        return sorted(facets, key=lambda x: x.count, reverse=True)[:20]  # Top 20 authors
+        # Top 20 authors
+        return sorted(facets, key=lambda x: x.count, reverse=True)[:MAX_AUTHOR_FACETS]
     
     async def _get_status_facets(self, base_query) -> List[FacetOption]:
         """Get status facets."""
@@ -183,19 +238,23 @@ class FacetService:
         facets = []
         for row in result:
             if row[0]:  # Skip null status
-                facets.append(FacetOption(
-                    value=row[0],
-                    count=row[1],
-                    label=row[0].replace('_', ' ').title()
-                ))
+                facets.append(self._facet_option("status", row[0], row[1]))
         
         return sorted(facets, key=lambda x: x.count, reverse=True)
     
-    def _prepare_search_query(self, query: str) -> str:
-        """Prepare search query for PostgreSQL tsquery."""
-        terms = query.strip().split()
-        tsquery_terms = [f"{term}:*" for term in terms if term]
-        return " & ".join(tsquery_terms) if tsquery_terms else "*"
+    def _facet_option(self, field: str, value: Any, count: int) -> FacetOption:
+        """Build a facet option with a display label."""
+        if field == "document_type":
+            value = value.value
+            label = value.replace('_', ' ').title()
+        elif field == "language":
+            label = LANGUAGE_LABELS.get(value, value.upper())
+        elif field == "status":
+            label = value.replace('_', ' ').title()
+        else:
+            label = value
+        
+        return FacetOption(value=value, count=count, label=label)
     
     def _apply_filters(self, query, filters: Dict[str, Any]):
         """Apply filters to query."""
@@ -213,6 +272,11 @@ class FacetService:
         if "status" in filters:
             filter_conditions.append(SearchIndex.status == filters["status"])
         
+        if filters.get("metadata"):
+            filter_conditions.extend(
+                metadata_filter_clauses(SearchIndex.metadata, filters["metadata"])
+            )
+        
         if filter_conditions:
             query = query.where(and_(*filter_conditions))
         
@@ -4,26 +4,40 @@ Handles indexing operations for searchable content.
 """
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterable, List, Optional
 from uuid import UUID, uuid4
 
+import numpy as np
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert
 
+from app.core.cache import SearchCache, get_search_cache
+from app.core.config import settings
 from app.models.search_index import SearchIndex, DocumentType
 from app.models.index_job import IndexJob, JobType, JobStatus
 from app.schemas.search import IndexDocumentRequest
+from app.services.corpus_stats_service import CorpusStatsService
+from app.services.memory_search_backend import memory_search_backend
+from app.services.semantic_index import semantic_index
 
 
 class IndexingService:
     """Service for handling indexing operations."""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, cache: Optional[SearchCache] = None):
         self.db = db
+        self.cache = cache if cache is not None else get_search_cache()
+        self.corpus_stats = CorpusStatsService(db)
     
     async def index_document(self, request: IndexDocumentRequest) -> SearchIndex:
         """Index a single document."""
+        index = await self._upsert_document(request)
+        await self._invalidate_cache([request.document_type, index.document_type])
+        return index
+    
+    async def _upsert_document(self, request: IndexDocumentRequest) -> SearchIndex:
+        """Create or update the index entry for a document."""
         # Parse published_at if provided
         published_at = None
         if request.published_at:
@@ -40,6 +54,8 @@ class IndexingService:
         existing = result.scalar_one_or_none()
         
         if existing:
+            await self._remove_from_stats(SearchIndex.id == existing.id)
+            
             # Update existing document
             existing.title = request.title
             existing.content = request.content
@@ -51,8 +67,12 @@ class IndexingService:
             existing.published_at = published_at
             existing.updated_at = datetime.utcnow()
             
+            await self.db.flush()
+            await self._add_to_stats(SearchIndex.id == existing.id)
+            embedding = await self._store_embedding(existing)
             await self.db.commit()
             await self.db.refresh(existing)
+            self._mirror(existing, embedding)
             return existing
         else:
             # Create new index
@@ -73,8 +93,12 @@ class IndexingService:
             )
             
             self.db.add(search_index)
+            await self.db.flush()
+            await self._add_to_stats(SearchIndex.id == search_index.id)
+            embedding = await self._store_embedding(search_index)
             await self.db.commit()
             await self.db.refresh(search_index)
+            self._mirror(search_index, embedding)
             return search_index
     
     async def bulk_index(
@@ -99,7 +123,7 @@ class IndexingService:
         
         for doc in documents:
             try:
-                await self.index_document(doc)
+                await self._upsert_document(doc)
                 processed += 1
             except Exception as e:
                 failed += 1
@@ -115,6 +139,9 @@ class IndexingService:
         await self.db.commit()
         await self.db.refresh(job)
         
+        # Invalidate once for the whole batch
+        await self._invalidate_cache(doc.document_type for doc in documents)
+        
         return job
     
     async def update_index(self, document_id: UUID, request: IndexDocumentRequest) -> Optional[SearchIndex]:
@@ -134,6 +161,8 @@ class IndexingService:
             except ValueError:
                 pass
         
+        await self._remove_from_stats(SearchIndex.id == index.id)
+        
         # Update fields
         index.title = request.title
         index.content = request.content
@@ -145,18 +174,35 @@ class IndexingService:
         index.published_at = published_at
         index.updated_at = datetime.utcnow()
         
+        await self.db.flush()
+        await self._add_to_stats(SearchIndex.id == index.id)
+        embedding = await self._store_embedding(index)
         await self.db.commit()
         await self.db.refresh(index)
+        self._mirror(index, embedding)
+        
+        await self._invalidate_cache([index.document_type])
         
         return index
     
     async def delete_from_index(self, document_id: UUID) -> bool:
         """Delete a document from the index."""
-        query = delete(SearchIndex).where(SearchIndex.document_id == document_id)
+        await self._remove_from_stats(SearchIndex.document_id == document_id)
+        
+        query = delete(SearchIndex).where(
+            SearchIndex.document_id == document_id
+        ).returning(SearchIndex.id, SearchIndex.document_type)
         result = await self.db.execute(query)
+        deleted = result.all()
+        deleted_types = [row.document_type for row in deleted]
         await self.db.commit()
+        memory_search_backend.remove(document_id)
+        for row in deleted:
+            semantic_index.remove(row.id)
+        
+        await self._invalidate_cache(deleted_types)
         
-        return result.rowcount > 0
+        return len(deleted_types) > 0
     
     async def reindex_all(self, source_service: Optional[str] = None) -> IndexJob:
         """Re-index all documents (placeholder - would need to fetch from other services)."""
@@ -179,7 +225,14 @@ class IndexingService:
         """Clear all documents from the index."""
         query = delete(SearchIndex)
         result = await self.db.execute(query)
+        if settings.SEARCH_BM25_STATS_ENABLED:
+            await self.corpus_stats.reset()
         await self.db.commit()
+        memory_search_backend.clear()
+        semantic_index.clear()
+        
+        if self.cache is not None:
+            await self.cache.invalidate_all()
         
         return result.rowcount
     
@@ -212,3 +265,32 @@ class IndexingService:
             "by_type": by_type,
             "by_language": by_language
         }
+    
+    async def _invalidate_cache(self, document_types: Iterable[DocumentType]) -> None:
+        """Invalidate cached search results for the written document types."""
+        if self.cache is not None:
+            await self.cache.invalidate(document_types)
+    
+    async def _store_embedding(self, index: SearchIndex) -> Optional[np.ndarray]:
+        """Store the document's embedding when semantic retrieval is enabled."""
+        if not settings.SEARCH_SEMANTIC_ENABLED:
+            return None
+        embedding = semantic_index.embed_document(index.title, index.content)
+        await self.db.execute(semantic_index.upsert_statement([(index.id, embedding)]))
+        return embedding
+    
+    def _mirror(self, index: SearchIndex, embedding: Optional[np.ndarray]) -> None:
+        """Apply a committed write to the in-process indexes."""
+        memory_search_backend.apply(index)
+        if embedding is not None:
+            semantic_index.apply(index.id, embedding)
+    
+    async def _add_to_stats(self, criterion) -> None:
+        """Count written documents into the BM25 corpus statistics."""
+        if settings.SEARCH_BM25_STATS_ENABLED:
+            await self.corpus_stats.add_documents(criterion)
+    
+    async def _remove_from_stats(self, criterion) -> None:
+        """Take documents out of the BM25 corpus statistics before they change."""
+        if settings.SEARCH_BM25_STATS_ENABLED:
+            await self.corpus_stats.remove_documents(criterion)
@@ -0,0 +1,333 @@
+"""Memory Search Backend
+
+Serves searches restricted to small, hot document types (partners,
+projects, campaigns) from an in-process inverted index instead of
+PostgreSQL.
+
+The index is built from search_indexes at startup and kept current by the
+IndexingService writes of this process. Writes handled by other worker
+processes are picked up by a periodic full rebuild, which is cheap at tens
+of thousands of documents.
+"""
+
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.search_index import DocumentType, SearchIndex
+from app.schemas.search import SearchRequest
+from app.search.cursor import SearchCursor
+from app.search.inverted_index import IndexedDocument, InvertedIndex
+from app.search.metadata_filters import matches_metadata
+from app.search.query_parser import ParsedQuery
+from app.search.ranking_profiles import ranking_profiles
+
+logger = logging.getLogger(__name__)
+
+# Sorts the index cannot order like PostgreSQL. SQL ranks relevance within
+# a rank window of stemmed lexemes, while the index scores every match by
+# its unstemmed words. Titles compare by code point here but by the
+# database collation there. Rows and cursors of these sorts would
+# change with the backend that answered.
+SQL_ONLY_SORTS = ("relevance", "title")
+
+
+class MemorySearchBackend:
+    """In-process BM25 search over a fixed set of document types."""
+
+    def __init__(
+        self,
+        document_types: Iterable[DocumentType],
+        session_factory: Callable = AsyncSessionLocal,
+        refresh_interval: float = 300,
+        k1: float = 1.2,
+        b: float = 0.75
+    ):
+        self.document_types = frozenset(DocumentType(value) for value in document_types)
+        self.session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self.k1 = k1
+        self.b = b
+
+        self.index = InvertedIndex(k1=k1, b=b)
+        self.ready = False
+        self.loaded_at: Optional[datetime] = None
+
+        self._started = False
+        self._task: Optional[asyncio.Task] = None
+        # Writes made while a rebuild is reading the table, replayed onto
+        # the new index before it is swapped in
+        self._pending: Optional[List[Tuple[str, Any]]] = None
+
+    def can_serve(self, request: SearchRequest) -> bool:
+        """Whether a request only touches indexed types and needs nothing SQL-only.
+
+        Only sorts ordered the same as in SQL are served, by date or
+        indexing time, so pages and cursors do not depend on the backend
+        (see SQL_ONLY_SORTS). Matching is by the unstemmed words of the
+        index rather than the text search configurations, see
+        app.search.inverted_index.
+        """
+        return (
+            self.ready
+            and bool(request.document_types)
+            and set(request.document_types) <= self.document_types
+            and not request.include_facets
+            and request.sort_by not in SQL_ONLY_SORTS
+        )
+
+    async def start(self) -> None:
+        """Build the index and start the periodic rebuild."""
+        if self._started:
+            return
+        self._started = True
+        await self.load()
+        self._task = asyncio.create_task(self._refresh_loop(), name="memory-index-refresh")
+        logger.info("Memory search backend started")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._started = False
+        self.ready = False
+        self.index = InvertedIndex(k1=self.k1, b=self.b)
+
+    async def load(self) -> None:
+        """Rebuild the index from search_indexes and swap it in."""
+        self._pending = []
+        index = InvertedIndex(k1=self.k1, b=self.b)
+        try:
+            async with self.session_factory() as session:
+                stmt = select(SearchIndex).where(
+                    SearchIndex.document_type.in_(self.document_types)
+                ).execution_options(yield_per=1000)
+                async for row in await session.stream_scalars(stmt):
+                    index.add(self._indexed_document(row), row.content)
+
+            for operation, value in self._pending:
+                if operation == "add":
+                    index.add(*value)
+                elif operation == "remove":
+                    index.remove(value)
+                else:
+                    index.clear()
+        except Exception as e:
+            logger.error(f"Failed to build memory search index: {e}")
+            return
+        finally:
+            self._pending = None
+
+        self.index = index
+        self.ready = True
+        self.loaded_at = datetime.utcnow()
+        logger.info(f"Memory search index built with {len(index)} documents")
+
+    def apply(self, index: SearchIndex) -> None:
+        """Mirror an indexed or updated search_indexes row."""
+        if not self._started:
+            return
+        if index.document_type not in self.document_types:
+            self.remove(index.document_id)
+            return
+
+        value = (self._indexed_document(index), index.content)
+        self.index.add(*value)
+        if self._pending is not None:
+            self._pending.append(("add", value))
+
+    def remove(self, document_id: UUID) -> None:
+        """Mirror a deleted document."""
+        if not self._started:
+            return
+        self.index.remove(document_id)
+        if self._pending is not None:
+            self._pending.append(("remove", document_id))
+
+    def clear(self) -> None:
+        """Mirror clearing the whole search index."""
+        if not self._started:
+            return
+        self.index.clear()
+        if self._pending is not None:
+            self._pending.clear()
+            self._pending.append(("clear", None))
+
+    def search(
+        self,
+        request: SearchRequest,
+        parsed_query: ParsedQuery,
+        cursor: Optional[SearchCursor] = None,
+        reference_time: Optional[datetime] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Return the page rows for a request and the exact number of matches.
+
+        Rows have the same keys as the SQL page query's rows, with the BM25
+        score, decayed by the ranking profile of the document type, as the
+        relevance sort key.
+        """
+        index = self.index
+        if reference_time is None:
+            reference_time = datetime.utcnow()
+        date_from = self._parse_date(request.date_from)
+        date_to = self._parse_date(request.date_to)
+
+        candidates = []
+        for slot, score in index.match(parsed_query).items():
+            document = index.document(slot)
+            if self._matches_filters(document, request, date_from, date_to):
+                decay = ranking_profiles.for_type(document.document_type).decay
+                if decay is not None:
+                    score *= decay.factor(document.published_at, reference_time)
+                candidates.append((document, score))
+        total = len(candidates)
+
+        descending = (
+            request.sort_order == "desc"
+            or request.sort_by not in ("relevance", "date", "title")
+        )
+        # Nulls sort last in both directions, the id breaks ties
+        if descending:
+            def order_key(key, document_id):
+                return (key is not None, key, document_id)
+        else:
+            def order_key(key, document_id):
+                return (key is None, key, document_id)
+
+        def candidate_key(candidate):
+            document, score = candidate
+            return order_key(self._sort_value(request, document, score), document.id)
+
+        offset = 0
+        if cursor is not None:
+            position = order_key(cursor.key, cursor.last_id)
+
+            def after_cursor(candidate):
+                key = candidate_key(candidate)
+                return key < position if descending else key > position
+
+            candidates = [candidate for candidate in candidates if after_cursor(candidate)]
+        else:
+            offset = (request.page - 1) * request.page_size
+
+        # Top-k selection instead of sorting every match
+        select_top = heapq.nlargest if descending else heapq.nsmallest
+        page = select_top(offset + request.page_size, candidates, key=candidate_key)[offset:]
+
+        rows = [
+            {
+                "sort_key": self._sort_value(request, document, score),
+                "id": document.id,
+                "document_id": document.document_id,
+                "document_type": document.document_type,
+                "title": document.title,
+                "language": document.language,
+                "metadata": document.metadata,
+                "author_name": document.author_name,
+                "published_at": document.published_at,
+                "content_prefix": document.content_prefix,
+            }
+            for document, score in page
+        ]
+        return rows, total
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "document_types": sorted(document_type.value for document_type in self.document_types),
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            **self.index.stats(),
+        }
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.load()
+
+    def _indexed_document(self, index: SearchIndex) -> IndexedDocument:
+        return IndexedDocument(
+            id=index.id,
+            document_id=index.document_id,
+            document_type=index.document_type,
+            title=index.title,
+            # One extra character tells whether the snippet was truncated
+            content_prefix=index.content[:settings.SEARCH_SNIPPET_LENGTH + 1],
+            language=index.language,
+            metadata=index.metadata or {},
+            author_id=index.author_id,
+            author_name=index.author_name,
+            status=index.status,
+            published_at=index.published_at,
+            indexed_at=index.indexed_at,
+        )
+
+    def _sort_value(self, request: SearchRequest, document: IndexedDocument, score: float) -> Any:
+        """The value SearchService._sort_key sorts by, with BM25 as the relevance."""
+        if request.sort_by == "relevance":
+            return score
+        elif request.sort_by == "date":
+            return document.published_at
+        elif request.sort_by == "title":
+            return document.title
+        else:
+            return document.indexed_at
+
+    def _matches_filters(
+        self,
+        document: IndexedDocument,
+        request: SearchRequest,
+        date_from: Optional[datetime],
+        date_to: Optional[datetime]
+    ) -> bool:
+        """Same filters as SearchService._apply_filters."""
+        if request.document_types and document.document_type not in request.document_types:
+            return False
+        if request.language and document.language != request.language:
+            return False
+        if request.author_id and document.author_id != request.author_id:
+            return False
+        if request.status and document.status != request.status:
+            return False
+        # Comparisons with a NULL published_at are never true in SQL
+        published_at = document.published_at
+        if date_from is not None and (published_at is None or published_at < date_from):
+            return False
+        if date_to is not None and (published_at is None or published_at > date_to):
+            return False
+        if request.metadata_filters and not matches_metadata(
+            document.metadata, request.metadata_filters
+        ):
+            return False
+        return True
+
+    def _parse_date(self, value: Optional[str]) -> Optional[datetime]:
+        """Parse a date filter like the SQL search; invalid dates are ignored."""
+        if not value:
+            return None
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        # published_at is stored without a time zone, in UTC
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+
+
+memory_search_backend = MemorySearchBackend(
+    document_types=settings.SEARCH_MEMORY_INDEX_TYPES,
+    refresh_interval=settings.SEARCH_MEMORY_INDEX_REFRESH_SECONDS,
+    k1=settings.SEARCH_BM25_K1,
+    b=settings.SEARCH_BM25_B,
+)
@@ -14,6 +14,11 @@ from app.models.search_query import SearchQuery
 from app.models.search_suggestion import SearchSuggestion
 
 
+def is_suggestible(query_text: str) -> bool:
+    """Only track queries that are long enough and don't contain special characters."""
+    return len(query_text) >= 3 and query_text.replace(' ', '').isalnum()
+
+
 class SearchAnalyticsService:
     """Service for tracking and analyzing search behavior."""
     
@@ -52,19 +57,26 @@ class SearchAnalyticsService:
     async def track_click(
         self,
         query_id: UUID,
-        clicked_result_id: UUID
+        clicked_result_id: UUID,
+        user_id: Optional[UUID] = None
     ) -> bool:
-        """Track when a user clicks on a search result."""
-        stmt = select(SearchQuery).where(SearchQuery.id == query_id)
+        """Track when a user clicks on a search result.
+        
+        The click is only recorded if the search returned the result and,
+        for a signed-in user's search, the click is that user's.
+        """
+        stmt = select(SearchQuery).where(SearchQuery.id == query_id).with_for_update()
         result = await self.db.execute(stmt)
         query = result.scalar_one_or_none()
         
-        if query:
-            query.clicked_result_id = clicked_result_id
-            await self.db.commit()
-            return True
+        if query is None or clicked_result_id not in (query.result_ids or []):
+            return False
+        if query.user_id is not None and query.user_id != user_id:
+            return False
         
-        return False
+        query.clicked_result_id = clicked_result_id
+        await self.db.commit()
+        return True
     
     async def get_popular_queries(
         self,
@@ -232,8 +244,7 @@ class SearchAnalyticsService:
         language: str
     ) -> None:
         """Update or create a search suggestion."""
-        # Only track queries that are long enough and don't contain special characters
-        if len(query_text) < 3 or not query_text.replace(' ', '').isalnum():
+        if not is_suggestible(query_text):
             return
         
         stmt = select(SearchSuggestion).where(
@@ -3,78 +3,806 @@
 Core search functionality using PostgreSQL full-text search.
 """
 
+import asyncio
+import json
+import re
 import time
-from typing import List, Optional, Dict, Any, Tuple
+from typing import AsyncIterator, Callable, List, Optional, Dict, Any, Mapping, Tuple, Union
 from uuid import UUID
 from datetime import datetime
 
-from sqlalchemy import select, func, and_, or_, desc, asc, text
+from sqlalchemy import (
+    select, func, and_, or_, any_, case, desc, asc, text, bindparam, cast, exists, literal, Text
+)
+from sqlalchemy.dialects.postgresql import ARRAY, REGCONFIG
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import SearchCache, get_search_cache, request_fingerprint
+from app.core.config import settings
+from app.core.single_flight import SingleFlight
+from app.core.timing import StageTimer, observe_stages
+from app.db.session import AsyncSessionLocal, statement_timeout
+from app.models.corpus_stats import SearchTermStat
 from app.models.search_index import SearchIndex, DocumentType
-from app.schemas.search import SearchRequest, SearchResponse, SearchResult
+from app.schemas.search import MultiSearchError, SearchRequest, SearchResponse, SearchResult
+from app.search.click_boosts import click_boost
+from app.search.cursor import (
+    InvalidCursorError,
+    SearchCursor,
+    check_cursor,
+    decode_cursor,
+    encode_cursor,
+)
+from app.search.fusion import reciprocal_rank_fusion
+from app.search.languages import LANGUAGE_REGCONFIGS
+from app.search.metadata_filters import metadata_filter_clauses
+from app.search.query_parser import ParsedQuery, parse_query, replace_words
+from app.search.ranking_profiles import ranking_profiles
+from app.services.analytics_pipeline import SearchEvent, analytics_pipeline
+from app.services.facet_service import FacetService
+from app.services.memory_search_backend import memory_search_backend
 from app.services.search_analytics_service import SearchAnalyticsService
+from app.services.semantic_index import semantic_index
+from app.services.slow_query_recorder import slow_query_recorder
+from app.services.spelling_corrector import spelling_corrector
+
+
+# Shared by every SearchService in the process
+search_flight = SingleFlight()
+
+# Searches of msearch calls each hold a pooled connection while they run
+msearch_slots = asyncio.Semaphore(settings.SEARCH_MSEARCH_CONCURRENCY)
+
+# Exports hold a pooled connection for as long as they stream
+export_slots = asyncio.Semaphore(settings.SEARCH_EXPORT_CONCURRENCY)
+
+# SQLSTATE of statements cancelled by statement_timeout
+QUERY_CANCELED = "57014"
+
+# Request fields that do not change which rows follow a cursor
+CURSOR_FREE_FIELDS = (
+    "page",
+    "page_size",
+    "cursor",
+    "highlight",
+    "track_total_hits",
+    "include_facets",
+    "facet_fields",
+    "include_timings",
+)
+
+
+class SearchTimeoutError(Exception):
+    """Raised when a search cannot return a page within SEARCH_TIMEOUT_SECONDS."""
+
+
+def is_statement_timeout(error: DBAPIError) -> bool:
+    return getattr(error.orig, "sqlstate", None) == QUERY_CANCELED
+
+
+def cursor_scope(request: SearchRequest) -> str:
+    """Short hash of the query, filters and ranking (profile included) a cursor continues."""
+    scoped = request.model_copy(update={
+        name: SearchRequest.model_fields[name].get_default(call_default_factory=True)
+        for name in CURSOR_FREE_FIELDS
+    })
+    return request_fingerprint(scoped)[:16]
 
 
 class SearchService:
     """Service for handling search operations."""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        cache: Optional[SearchCache] = None,
+        session_factory: Callable = AsyncSessionLocal
+    ):
         self.db = db
         self.analytics_service = SearchAnalyticsService(db)
+        self.cache = cache if cache is not None else get_search_cache()
+        self.session_factory = session_factory
+        self.timer = StageTimer()
+        # Time relevance decay is measured from
+        self._reference_time = datetime.utcnow()
     
     async def search(
         self,
         request: SearchRequest,
         user_id: Optional[UUID] = None
     ) -> SearchResponse:
-        """Universal search across all content types."""
+        """Universal search across all content types.
+        
+        Time spent per stage is collected in ``self.timer``, recorded in the
+        stage histograms and, with ``include_timings``, returned in the
+        response.
+        """
         start_time = time.time()
+        self.timer = StageTimer()
         
-        # Build the base query
-        query = select(SearchIndex)
+        # Decode keyset cursor if the client is paging with one
+        cursor = None
+        if request.cursor:
+            with self.timer.stage("parse"):
+                cursor = decode_cursor(request.cursor)
+                check_cursor(cursor, request.sort_by, request.sort_order, cursor_scope(request))
+        # Later pages decay from the first page's time, so scores match the cursor
+        self._reference_time = datetime.utcnow()
+        if cursor is not None and cursor.reference_time:
+            self._reference_time = cursor.reference_time
         
-        # Apply search vector filter
-        search_query = self._prepare_search_query(request.query, request.language or "english")
-        query = query.where(
-            SearchIndex.search_vector.op('@@')(func.to_tsquery(search_query))
-        )
+        if not self._is_hybrid(request) and memory_search_backend.can_serve(request):
+            # Answered in-process faster than a cache lookup, so not cached
+            response = self._execute_memory_search(request, cursor, start_time)
+        elif settings.SEARCH_COALESCE_REQUESTS:
+            # Identical concurrent searches share one execution
+            with self.timer.stage("coalesce"):
+                response, shared = await search_flight.do(
+                    request_fingerprint(request),
+                    lambda: self._shared_search(request, cursor, start_time)
+                )
+            if shared:
+                response = response.model_copy(deep=True)
+                response.query = request.query
+                response.execution_time = (time.time() - start_time) * 1000
+                response.timings = None
+                response.query_id = None
+        else:
+            response = await self._cached_search(request, cursor, start_time)
         
-        # Apply filters
-        query = self._apply_filters(query, request)
+        if self._wants_spelling_suggestion(response):
+            with self.timer.stage("spelling"):
+                response.did_you_mean = await spelling_corrector.did_you_mean(
+                    self.db, parse_query(request.query, request.language, request.all_languages)
+                )
         
-        # Count total results
-        count_query = select(func.count()).select_from(query.subquery())
-        total_count = (await self.db.execute(count_query)).scalar_one()
+        # Track analytics, per caller even when the search was shared
+        with self.timer.stage("analytics"):
+            await self._track_search(request, response, user_id)
+        
+        observe_stages(self.timer.timings)
+        if request.include_timings:
+            response.timings = self.timer.rounded()
+        
+        return response
+    
+    async def warm(self, request: SearchRequest) -> SearchResponse:
+        """Run a search only to fill the result cache and the database buffers.
         
-        # Apply sorting
-        query = self._apply_sorting(query, request, search_query)
+        Unlike search(), it is not recorded in analytics, and it always
+        runs against the database: a response already cached (say in a
+        Redis shared with older workers) would leave the buffers cold.
+        """
+        return await self._cached_search(request, None, time.time(), read_cache=False)
+    
+    async def _shared_search(
+        self,
+        request: SearchRequest,
+        cursor: Optional[SearchCursor],
+        start_time: float
+    ) -> SearchResponse:
+        """Run _cached_search on a session of its own.
+        
+        A coalesced execution outlives the request that started it when
+        that request is cancelled, and the request's session is closed then,
+        so it cannot run on ``self.db``.
+        """
+        async with self.session_factory() as session:
+            service = SearchService(session, self.cache, self.session_factory)
+            service.timer = self.timer
+            service._reference_time = self._reference_time
+            return await service._cached_search(request, cursor, start_time)
+    
+    async def _cached_search(
+        self,
+        request: SearchRequest,
+        cursor: Optional[SearchCursor],
+        start_time: float,
+        read_cache: bool = True
+    ) -> SearchResponse:
+        """Answer from the result cache, or run the search and cache it.
+        
+        Without ``read_cache`` the search is always run, and its response
+        replaces the cached one.
+        """
+        if self.cache is not None and read_cache:
+            with self.timer.stage("cache"):
+                response = await self.cache.get_response(request)
+            if response is not None:
+                response.query = request.query
+                response.execution_time = (time.time() - start_time) * 1000
+                return response
+        
+        if self._is_hybrid(request):
+            response = await self._execute_hybrid_search(request, start_time)
+        else:
+            response = await self._execute_search(request, cursor, start_time)
+            if self._wants_typo_fallback(request, cursor, response):
+                response = await self._typo_fallback(request, response, start_time)
+        # A degraded response would be served until the TTL runs out
+        if self.cache is not None and not response.timed_out:
+            with self.timer.stage("cache"):
+                await self.cache.set_response(request, response)
+        return response
+    
+    async def _execute_search(
+        self,
+        request: SearchRequest,
+        cursor: Optional[SearchCursor],
+        start_time: float,
+        deadline: Optional[float] = None
+    ) -> SearchResponse:
+        """Run the search against the database.
+        
+        All statements share a SEARCH_TIMEOUT_SECONDS budget (or run until
+        ``deadline``, a time.monotonic() value) enforced with
+        statement_timeout. Separate counts and facets get smaller budgets of
+        their own; when they run out the page is still returned, without
+        them and flagged ``timed_out``. A count folded into the page query
+        gets half of what is left, the other half going to the page alone
+        should it run out.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + settings.SEARCH_TIMEOUT_SECONDS
+        self._deadline = deadline
+        timed_out = False
+        
+        with self.timer.stage("parse"):
+            parsed_query = parse_query(request.query, request.language, request.all_languages)
+            query = self._matched_query(request, parsed_query)
+        
+        # Count total results, capped at the requested total_hits limit
+        hits_limit = self._total_hits_limit(request)
+        rank_window = self._rank_window(request)
+        if rank_window is not None and hits_limit is not None:
+            # Count at least past the window to tell whether it truncated the ranking
+            hits_limit = max(hits_limit, rank_window)
+        offset = 0 if cursor is not None else (request.page - 1) * request.page_size
+        matched_query = query
+        total_hits = None
+        facets = None
+        
+        if request.include_facets:
+            # The facet aggregation also counts every match exactly, so the
+            # page query needs no count of its own
+            try:
+                async with self._statement_timeout(settings.SEARCH_FACET_TIMEOUT_SECONDS):
+                    with self.timer.stage("count"):
+                        total_hits, facet_options = await FacetService(self.db).aggregate_facets(
+                            matched_query, request.facet_fields, query_text=request.query
+                        )
+            except DBAPIError as e:
+                if not is_statement_timeout(e):
+                    raise
+                # Go on without facets, counting the usual way
+                timed_out = True
+            else:
+                facets = {
+                    field: [option.model_dump() for option in options]
+                    for field, options in facet_options.items()
+                }
+                hits_limit = None
+        
+        single_roundtrip = facets is None and settings.SEARCH_SINGLE_ROUNDTRIP and hits_limit != 0
+        
+        if facets is None and not settings.SEARCH_SINGLE_ROUNDTRIP and hits_limit != 0:
+            total_hits = await self._count(matched_query, hits_limit, request)
+            timed_out = timed_out or total_hits is None
+        
+        # Two-phase ranking: a cheap ordering picks the candidates, and only
+        # those are ranked
+        if rank_window is not None:
+            candidates = matched_query.order_by(
+                *self._candidate_order(parsed_query)
+            ).limit(rank_window)
+            query = select(SearchIndex.id).where(SearchIndex.id.in_(candidates))
+        
+        # Apply sorting (and the seek predicate when paging by cursor)
+        query = self._apply_sorting(query, request, parsed_query, cursor)
         
         # Apply pagination
-        offset = (request.page - 1) * request.page_size
-        query = query.offset(offset).limit(request.page_size)
+        if offset:
+            query = query.offset(offset)
+        query = query.limit(request.page_size)
         
-        # Execute query
-        result = await self.db.execute(query)
-        search_indexes = result.scalars().all()
+        rows = None
+        if single_roundtrip:
+            # Fold the count into the page query so both come back in one statement
+            if hits_limit is None and cursor is None and rank_window is None:
+                total_column = func.count().over()
+            else:
+                # Count the whole match (not just rows after the cursor, or the
+                # rank window's candidates) as an InitPlan
+                total_column = self._count_statement(matched_query, hits_limit).scalar_subquery()
+            counted_query = self._page_query(
+                query.add_columns(total_column.label("total_hits")), request, parsed_query
+            )
+            try:
+                # Leave half the budget for fetching the page alone
+                async with self._statement_timeout((self._deadline - time.monotonic()) / 2):
+                    result = await self._execute(counted_query, "fetch", request)
+                    rows = [row._mapping for row in result.all()]
+            except DBAPIError as e:
+                if not is_statement_timeout(e):
+                    raise
+                # Counting made the page too slow; fetch it on its own
+                timed_out = True
         
-        # Convert to search results with highlighting
-        results = [
-            self._to_search_result(index, request.query, request.highlight)
-            for index in search_indexes
-        ]
+        if rows is None:
+            # Fetch result columns, snippets and highlights for the page rows
+            try:
+                async with self._statement_timeout():
+                    result = await self._execute(
+                        self._page_query(query, request, parsed_query), "fetch", request
+                    )
+                    rows = [row._mapping for row in result.all()]
+            except DBAPIError as e:
+                if is_statement_timeout(e):
+                    raise SearchTimeoutError(
+                        f"Search exceeded its {settings.SEARCH_TIMEOUT_SECONDS}s budget"
+                    ) from e
+                raise
+        elif rows:
+            total_hits = rows[0]["total_hits"]
+        elif offset == 0 and cursor is None:
+            total_hits = 0
+        else:
+            # Paged past the end, so no row carried the count
+            total_hits = await self._count(matched_query, hits_limit, request)
+            timed_out = timed_out or total_hits is None
         
-        execution_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+        total_count, total_relation = self._resolve_total(
+            total_hits, hits_limit, offset + len(rows)
+        )
+        rank_truncated = None
+        if rank_window is not None and total_hits is not None:
+            rank_truncated = total_hits > rank_window
         
-        # Track analytics
-        await self.analytics_service.track_search(
-            query_text=request.query,
-            language=request.language,
+        return self._build_response(
+            request, rows, parsed_query, total_count, start_time,
+            total_relation=total_relation, facets=facets,
+            rank_truncated=rank_truncated, timed_out=timed_out
+        )
+    
+    async def _execute_hybrid_search(
+        self,
+        request: SearchRequest,
+        start_time: float
+    ) -> SearchResponse:
+        """Fuse full-text and vector candidates with reciprocal rank fusion.
+        
+        Each retriever contributes its best SEARCH_HYBRID_CANDIDATES
+        documents and the fused list is paged by offset. Vector candidates
+        come from the in-process ANN index and are filtered in SQL
+        afterwards, so filters narrow them rather than reach further into
+        the index. The relevance score is the fused score.
+        """
+        self._deadline = time.monotonic() + settings.SEARCH_TIMEOUT_SECONDS
+        request = request.model_copy(update={"sort_order": "desc"})
+        candidates = settings.SEARCH_HYBRID_CANDIDATES
+        
+        with self.timer.stage("parse"):
+            parsed_query = parse_query(request.query, request.language, request.all_languages)
+        
+        with self.timer.stage("vector"):
+            neighbours = semantic_index.search(request.query, candidates)
+        
+        try:
+            async with self._statement_timeout():
+                lexical_ids = []
+                if not parsed_query.is_empty:
+                    matched_query = self._matched_query(request, parsed_query)
+                    rank_window = self._rank_window(request)
+                    if rank_window is not None:
+                        candidate_order = self._candidate_order(parsed_query)
+                        matched_query = select(SearchIndex.id).where(SearchIndex.id.in_(
+                            matched_query.order_by(*candidate_order).limit(rank_window)
+                        ))
+                    lexical = self._apply_sorting(
+                        matched_query, request, parsed_query
+                    ).limit(candidates)
+                    result = await self._execute(lexical, "fetch", request)
+                    lexical_ids = [row.id for row in result.all()]
+                
+                vector_ids = []
+                if neighbours:
+                    allowed = self._apply_filters(
+                        select(SearchIndex.id).where(
+                            SearchIndex.id.in_([document_id for document_id, _ in neighbours])
+                        ),
+                        request
+                    )
+                    allowed_ids = set(
+                        (await self._execute(allowed, "fetch", request)).scalars().all()
+                    )
+                    vector_ids = [
+                        document_id for document_id, _ in neighbours if document_id in allowed_ids
+                    ]
+                
+                fused = reciprocal_rank_fusion([lexical_ids, vector_ids], settings.SEARCH_RRF_K)
+                offset = (request.page - 1) * request.page_size
+                page = dict(fused[offset:offset + request.page_size])
+                
+                rows = []
+                if page:
+                    page_query = select(
+                        SearchIndex.id,
+                        case(page, value=SearchIndex.id).label("sort_key")
+                    ).where(SearchIndex.id.in_(list(page)))
+                    result = await self._execute(
+                        self._page_query(page_query, request, parsed_query), "fetch", request
+                    )
+                    rows = [row._mapping for row in result.all()]
+        except DBAPIError as e:
+            if is_statement_timeout(e):
+                raise SearchTimeoutError(
+                    f"Search exceeded its {settings.SEARCH_TIMEOUT_SECONDS}s budget"
+                ) from e
+            raise
+        
+        # Either list may have been cut off at the candidate limit
+        truncated = candidates in (len(lexical_ids), len(neighbours))
+        return self._build_response(
+            request, rows, parsed_query, len(fused), start_time,
+            total_relation="gte" if truncated else "eq",
+            paginate_by_cursor=False
+        )
+    
+    async def _count(
+        self,
+        matched_query,
+        hits_limit: Optional[int],
+        request: SearchRequest
+    ) -> Optional[int]:
+        """Count the matches within SEARCH_COUNT_TIMEOUT_SECONDS; None when it ran out."""
+        count_query = self._count_statement(matched_query, hits_limit)
+        try:
+            async with self._statement_timeout(settings.SEARCH_COUNT_TIMEOUT_SECONDS):
+                result = await self._execute(count_query, "count", request)
+                return result.scalar_one()
+        except DBAPIError as e:
+            if not is_statement_timeout(e):
+                raise
+            return None
+    
+    def _remaining_budget(self) -> float:
+        """Seconds left of the search budget; raises SearchTimeoutError once it ran out."""
+        remaining = self._deadline - time.monotonic()
+        if remaining <= 0:
+            raise SearchTimeoutError(
+                f"Search exceeded its {settings.SEARCH_TIMEOUT_SECONDS}s budget"
+            )
+        return remaining
+    
+    def _statement_timeout(self, timeout: Optional[float] = None):
+        """Limit the block's statements to ``timeout`` seconds or what is left of the budget.
+        
+        The statement_timeout is set once for the block, which runs in a
+        transaction (or savepoint) of its own rolled back when it ends;
+        see app.db.session.statement_timeout.
+        """
+        remaining = self._remaining_budget()
+        return statement_timeout(self.db, remaining if timeout is None else min(timeout, remaining))
+    
+    async def _execute(self, statement, stage: str, request: SearchRequest):
+        """Execute a statement as a timed stage, handing it to the slow-query recorder.
+        
+        The statement runs under the statement_timeout of its block (see
+        _statement_timeout) and is not started once the search budget ran
+        out. Statements cancelled by the timeout, or by the request being
+        cancelled, are handed over too, flagged as cancelled.
+        """
+        self._remaining_budget()
+        started = time.perf_counter()
+        try:
+            with self.timer.stage(stage):
+                result = await self.db.execute(statement)
+        except asyncio.CancelledError:
+            self._observe_statement(statement, request, started, cancelled=True)
+            raise
+        except DBAPIError as e:
+            if is_statement_timeout(e):
+                self._observe_statement(statement, request, started, cancelled=True)
+            raise
+        self._observe_statement(statement, request, started)
+        return result
+    
+    def _observe_statement(
+        self,
+        statement,
+        request: SearchRequest,
+        started: float,
+        cancelled: bool = False
+    ) -> None:
+        slow_query_recorder.observe(
+            "search",
+            statement,
+            (time.perf_counter() - started) * 1000,
+            request.query,
             filters=self._get_filters_dict(request),
-            results_count=total_count,
-            user_id=user_id,
-            execution_time=execution_time
+            timings=self.timer.rounded(),
+            cancelled=cancelled
         )
+    
+    def _matched_query(self, request: SearchRequest, parsed_query: ParsedQuery):
+        """Select the ids of the rows matching the query and filters.
+        
+        Only ids are carried through matching and sorting; the result
+        columns are fetched for the returned rows only.
+        """
+        query = select(SearchIndex.id).where(
+            SearchIndex.search_vector.op('@@')(parsed_query.to_tsquery())
+        )
+        return self._apply_filters(query, request)
+    
+    def _is_hybrid(self, request: SearchRequest) -> bool:
+        """Whether the request runs as a hybrid search.
+        
+        Hybrid ranking is a fused relevance, so other sorts, cursors (which
+        only continue lexical searches) and a semantic index that is not
+        built yet all fall back to lexical retrieval.
+        """
+        return (
+            (request.mode or settings.SEARCH_MODE) == "hybrid"
+            and request.sort_by == "relevance"
+            and not request.cursor
+            and semantic_index.ready
+        )
+    
+    def _wants_spelling_suggestion(self, response: SearchResponse) -> bool:
+        """Suggest respellings of searches that found (next to) nothing and were not corrected."""
+        return (
+            spelling_corrector.ready
+            and response.corrected_query is None
+            and response.total_count <= settings.SPELLING_SUGGEST_MAX_HITS
+        )
+    
+    def _wants_typo_fallback(
+        self,
+        request: SearchRequest,
+        cursor: Optional[SearchCursor],
+        response: SearchResponse
+    ) -> bool:
+        """Retry only first-time misses; cursor pages continue a search that matched."""
+        return (
+            settings.SEARCH_TYPO_FALLBACK
+            and cursor is None
+            and not response.results
+            and response.total_count == 0
+            and not response.timed_out
+        )
+    
+    async def _typo_fallback(
+        self,
+        request: SearchRequest,
+        response: SearchResponse,
+        start_time: float
+    ) -> SearchResponse:
+        """Retry a search that matched nothing, tolerating typos.
+        
+        Misspelled words are first corrected against the lexeme dictionary
+        (search_term_stats, seeded from ts_stat) and the corrected query is
+        searched; corrected_query shows it with the words the lexemes were
+        indexed as, known once the spelling dictionary is loaded. If that
+        finds nothing either, titles are matched by pg_trgm word similarity
+        to the query. Both use trigram indexes,
+        count and rank at most SEARCH_TYPO_CANDIDATES rows and share a
+        SEARCH_TYPO_TIMEOUT_SECONDS budget; when it runs out the original
+        empty response is returned.
+        
+        Fallback responses carry no next_cursor, since a cursor would page
+        through the query as typed.
+        """
+        parsed_query = parse_query(request.query, request.language, request.all_languages)
+        words = [
+            word for word, _ in parsed_query.positive_words
+            if len(word) >= settings.SEARCH_TYPO_MIN_WORD_LENGTH
+        ]
+        if not words:
+            return response
+        
+        deadline = time.monotonic() + settings.SEARCH_TYPO_TIMEOUT_SECONDS
+        corrected_query = None
+        try:
+            if settings.SEARCH_TYPO_LEXEME_CORRECTION:
+                corrections = await self._lexeme_corrections(request, parsed_query, words, deadline)
+                if corrections:
+                    # Lexemes are searched, the words they were indexed as are shown
+                    corrected_query = replace_words(request.query, {
+                        word: spelling_corrector.surface_form(lexeme) or lexeme
+                        for word, lexeme in corrections.items()
+                    })
+                    corrected = await self._execute_search(
+                        self._typo_request(request, replace_words(request.query, corrections)),
+                        None, start_time, deadline
+                    )
+                    if corrected.results:
+                        return self._typo_response(corrected, request, corrected_query, "corrected")
+            
+            fallback = await self._title_similarity_search(
+                request, parsed_query, words, start_time, deadline
+            )
+        except SearchTimeoutError:
+            return response
+        except DBAPIError as e:
+            if not is_statement_timeout(e):
+                raise
+            return response
+        
+        if fallback is None:
+            return response
+        return self._typo_response(fallback, request, corrected_query, "title_similarity")
+    
+    async def _lexeme_corrections(
+        self,
+        request: SearchRequest,
+        parsed_query: ParsedQuery,
+        words: List[str],
+        deadline: float
+    ) -> Dict[str, str]:
+        """Map misspelled words to the most similar known lexeme.
+        
+        A word is known when one of its lexemes under the query's
+        configuration is in the dictionary; unknown words are replaced by the
+        most similar lexeme above SEARCH_TYPO_LEXEME_SIMILARITY, the more
+        frequent one on ties. One statement covers all words.
+        """
+        word = func.unnest(literal(words, ARRAY(Text))).table_valued("word").render_derived("w")
+        word_lexemes = func.tsvector_to_array(
+            func.to_tsvector(cast(parsed_query.regconfig, REGCONFIG), word.c.word)
+        )
+        known = exists().where(SearchTermStat.lexeme == any_(word_lexemes))
+        similarity = func.similarity(SearchTermStat.lexeme, word.c.word)
+        best = select(SearchTermStat.lexeme).where(
+            SearchTermStat.lexeme.op("%")(word.c.word)
+        ).order_by(
+            similarity.desc(), SearchTermStat.document_count.desc()
+        ).limit(1).scalar_subquery()
+        statement = select(word.c.word, best.label("correction")).where(~known)
+        
+        self._deadline = deadline
+        async with self._statement_timeout():
+            threshold = float(settings.SEARCH_TYPO_LEXEME_SIMILARITY)
+            await self.db.execute(text(f"SET LOCAL pg_trgm.similarity_threshold = {threshold}"))
+            result = await self._execute(statement, "typo", request)
+            return {
+                row.word: row.correction
+                for row in result.all()
+                if row.correction is not None
+            }
+    
+    def _typo_request(self, request: SearchRequest, query: str) -> SearchRequest:
+        """The request for a corrected query, ranking at most SEARCH_TYPO_CANDIDATES matches."""
+        candidates = settings.SEARCH_TYPO_CANDIDATES
+        hits_limit = self._total_hits_limit(request)
+        return request.model_copy(update={
+            "query": query,
+            "track_total_hits": candidates if hits_limit is None else min(hits_limit, candidates),
+            "two_phase": True,
+            "rank_candidates": candidates,
+        })
+    
+    async def _title_similarity_search(
+        self,
+        request: SearchRequest,
+        parsed_query: ParsedQuery,
+        words: List[str],
+        start_time: float,
+        deadline: float
+    ) -> Optional[SearchResponse]:
+        """Match titles by trigram word similarity to the query words, most similar first.
+        
+        Returns None when no title is similar enough.
+        """
+        request = request.model_copy(update={"sort_by": "relevance", "sort_order": "desc"})
+        query_text = " ".join(words)
+        similarity = func.word_similarity(query_text, SearchIndex.title)
+        candidates = self._apply_filters(
+            select(SearchIndex.id, similarity.label("sort_key")).where(
+                literal(query_text).op("<%")(SearchIndex.title)
+            ),
+            request
+        ).order_by(
+            similarity.desc(), SearchIndex.id.desc()
+        ).limit(settings.SEARCH_TYPO_CANDIDATES).subquery("candidates")
+        
+        page = select(
+            candidates.c.id,
+            candidates.c.sort_key,
+            func.count().over().label("total_hits"),
+        ).order_by(candidates.c.sort_key.desc(), candidates.c.id.desc())
+        offset = (request.page - 1) * request.page_size
+        if offset:
+            page = page.offset(offset)
+        page = page.limit(request.page_size)
+        
+        self._deadline = deadline
+        async with self._statement_timeout():
+            threshold = float(settings.SEARCH_TYPO_TITLE_SIMILARITY)
+            await self.db.execute(text(
+                f"SET LOCAL pg_trgm.word_similarity_threshold = {threshold}"
+            ))
+            result = await self._execute(
+                self._page_query(page, request, parsed_query), "typo", request
+            )
+            rows = [row._mapping for row in result.all()]
+        
+        if not rows:
+            return None
+        return self._build_response(request, rows, parsed_query, rows[0]["total_hits"], start_time)
+    
+    def _typo_response(
+        self,
+        response: SearchResponse,
+        request: SearchRequest,
+        corrected_query: Optional[str],
+        fallback: str
+    ) -> SearchResponse:
+        response.query = request.query
+        response.corrected_query = corrected_query
+        response.typo_fallback = fallback
+        response.next_cursor = None
+        return response
+    
+    def _execute_memory_search(
+        self,
+        request: SearchRequest,
+        cursor: Optional[SearchCursor],
+        start_time: float
+    ) -> SearchResponse:
+        """Run the search against the in-process index."""
+        with self.timer.stage("parse"):
+            parsed_query = parse_query(request.query, request.language, request.all_languages)
+        with self.timer.stage("fetch"):
+            rows, total_count = memory_search_backend.search(
+                request, parsed_query, cursor, self._reference_time
+            )
+        return self._build_response(request, rows, parsed_query, total_count, start_time)
+    
+    def _build_response(
+        self,
+        request: SearchRequest,
+        rows: List[Mapping[str, Any]],
+        parsed_query: ParsedQuery,
+        total_count: int,
+        start_time: float,
+        total_relation: str = "eq",
+        facets: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        rank_truncated: Optional[bool] = None,
+        timed_out: bool = False,
+        paginate_by_cursor: bool = True
+    ) -> SearchResponse:
+        """Turn page rows into a SearchResponse.
+        
+        ``paginate_by_cursor`` False leaves out next_cursor, for rankings a
+        cursor cannot continue.
+        """
+        # Convert to search results with highlighting
+        with self.timer.stage("hydrate"):
+            results = [
+                self._to_search_result(row, request, parsed_query)
+                for row in rows
+            ]
+        
+        # A full page means there may be more rows after it
+        next_cursor = None
+        if paginate_by_cursor and rows and len(rows) == request.page_size:
+            last_row = rows[-1]
+            decays = (
+                request.sort_by == "relevance"
+                and ranking_profiles.decays(request.document_types)
+            )
+            next_cursor = encode_cursor(
+                request.sort_by,
+                request.sort_order,
+                last_row["sort_key"],
+                last_row["id"],
+                reference_time=self._reference_time if decays else None,
+                scope=cursor_scope(request)
+            )
+        
+        execution_time = (time.time() - start_time) * 1000  # Convert to milliseconds
         
         total_pages = (total_count + request.page_size - 1) // request.page_size
         
@@ -85,8 +813,131 @@ class SearchService:
             page=request.page,
             page_size=request.page_size,
             total_pages=total_pages,
-            execution_time=execution_time
+            execution_time=execution_time,
+            facets=facets,
+            total_relation=total_relation,
+            next_cursor=next_cursor,
+            rank_truncated=rank_truncated,
+            timed_out=timed_out
+        )
+    
+    async def _track_search(
+        self,
+        request: SearchRequest,
+        response: SearchResponse,
+        user_id: Optional[UUID]
+    ) -> None:
+        """Record the search, through the background pipeline when it is running.
+        
+        The recorded search's id is returned as ``query_id``, for reporting
+        clicks on its results; the ids of the results are recorded with it
+        so that clicks on anything else are rejected.
+        """
+        result_ids = [result.id for result in response.results]
+        if analytics_pipeline.running:
+            event = SearchEvent(
+                query_text=request.query,
+                language=request.language,
+                filters=self._get_filters_dict(request),
+                results_count=response.total_count,
+                user_id=user_id,
+                execution_time=response.execution_time,
+                result_ids=result_ids
+            )
+            if analytics_pipeline.submit(event):
+                response.query_id = event.id
+            return
+        
+        search_query = await self.analytics_service.track_search(
+            query_text=request.query,
+            language=request.language,
+            filters=self._get_filters_dict(request),
+            results_count=response.total_count,
+            user_id=user_id,
+            execution_time=response.execution_time,
+            result_ids=result_ids
+        )
+        response.query_id = search_query.id
+    
+    async def msearch(
+        self,
+        requests: List[SearchRequest],
+        user_id: Optional[UUID] = None
+    ) -> List[Union[SearchResponse, MultiSearchError]]:
+        """Run several searches concurrently, returning responses in request order.
+        
+        Each search runs on its own pooled session (a session cannot run
+        statements concurrently). At most SEARCH_MSEARCH_CONCURRENCY searches
+        of all msearch calls of the process run at a time; the rest wait.
+        A search rejected for its own cursor or out of time gets an error in
+        its place and the others are still answered; any other failure
+        cancels the searches still running and is raised.
+        """
+        async def run(request: SearchRequest) -> Union[SearchResponse, MultiSearchError]:
+            async with msearch_slots:
+                async with self.session_factory() as session:
+                    service = SearchService(session, self.cache, self.session_factory)
+                    try:
+                        return await service.search(request, user_id)
+                    except InvalidCursorError as e:
+                        return MultiSearchError(status=400, type="invalid_cursor", detail=str(e))
+                    except SearchTimeoutError as e:
+                        return MultiSearchError(status=504, type="search_timeout", detail=str(e))
+        
+        tasks = [asyncio.create_task(run(request)) for request in requests]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return [task.result() for task in tasks]
+    
+    async def export(self, request: SearchRequest) -> AsyncIterator[str]:
+        """Stream the first SEARCH_EXPORT_MAX_ROWS matches as NDJSON, one SearchResult per line.
+        
+        Rows come from a server-side cursor in batches of
+        SEARCH_EXPORT_BATCH_SIZE, so memory stays flat however many rows
+        match. Paging fields of the request are ignored; filters, sorting and
+        highlighting apply as in search(). Each fetch runs under a
+        statement_timeout of SEARCH_EXPORT_TIMEOUT_SECONDS. When more rows
+        matched, a last line ``{"truncated": true, "max_rows": N}`` says so.
+        
+        The export runs on its own session because it outlives the
+        request's. The caller holds one of the export_slots for it.
+        """
+        max_rows = settings.SEARCH_EXPORT_MAX_ROWS
+        parsed_query = parse_query(request.query, request.language, request.all_languages)
+        query = self._apply_sorting(
+            self._matched_query(request, parsed_query), request, parsed_query
+        ).limit(max_rows + 1)
+        query = self._page_query(query, request, parsed_query).execution_options(
+            yield_per=settings.SEARCH_EXPORT_BATCH_SIZE
         )
+        
+        exported = 0
+        truncated = False
+        async with self.session_factory() as session:
+            async with session.begin():
+                timeout_ms = int(settings.SEARCH_EXPORT_TIMEOUT_SECONDS * 1000)
+                await session.execute(text(f"SET LOCAL statement_timeout = {timeout_ms}"))
+                result = await session.stream(query)
+                async for rows in result.partitions():
+                    if exported + len(rows) > max_rows:
+                        # The query fetches one row past the limit to tell
+                        rows = rows[:max_rows - exported]
+                        truncated = True
+                    exported += len(rows)
+                    if rows:
+                        yield "".join(
+                            self._to_search_result(
+                                row._mapping, request, parsed_query
+                            ).model_dump_json() + "\n"
+                            for row in rows
+                        )
+        if truncated:
+            yield json.dumps({"truncated": True, "max_rows": max_rows}) + "\n"
     
     async def search_by_type(
         self,
@@ -99,21 +950,42 @@ class SearchService:
         request.document_types = [document_type]
         return await self.search(request, user_id)
     
-    def _prepare_search_query(self, query: str, language: str = "english") -> str:
-        """Prepare search query for PostgreSQL tsquery."""
-        # Map language codes to PostgreSQL text search configurations
-        lang_map = {
-            "en": "english",
-            "es": "spanish",
-            "fr": "french",
-            "pt": "portuguese"
-        }
-        
-        # Clean and prepare query
-        terms = query.strip().split()
-        # Add prefix matching for each term
-        tsquery_terms = [f"{term}:*" for term in terms if term]
-        return " & ".join(tsquery_terms) if tsquery_terms else "*"
+    def _total_hits_limit(self, request: SearchRequest) -> Optional[int]:
+        """Resolve how far matches are counted.
+        
+        Returns None to count exactly, 0 to skip counting, or N to stop
+        counting after N matches.
+        """
+        track_total_hits = request.track_total_hits
+        if track_total_hits is None:
+            track_total_hits = settings.SEARCH_TRACK_TOTAL_HITS
+        
+        if track_total_hits is True:
+            return None
+        if track_total_hits is False:
+            return 0
+        return track_total_hits
+    
+    def _count_statement(self, query, hits_limit: Optional[int]):
+        """Build a count over the matched rows, reading at most hits_limit + 1 of them."""
+        matched = query.with_only_columns(SearchIndex.id)
+        if hits_limit is not None:
+            matched = matched.limit(hits_limit + 1)
+        return select(func.count()).select_from(matched.subquery())
+    
+    def _resolve_total(
+        self,
+        total_hits: Optional[int],
+        hits_limit: Optional[int],
+        rows_seen: int
+    ) -> Tuple[int, str]:
+        """Turn a (possibly capped or skipped) count into total_count and its relation."""
+        if total_hits is None:
+            # Counting was skipped; all we know is what has been returned so far
+            return rows_seen, "gte"
+        if hits_limit is not None and total_hits > hits_limit:
+            return hits_limit, "gte"
+        return total_hits, "eq"
     
     def _apply_filters(
         self,
@@ -129,7 +1001,7 @@ class SearchService:
         
         # Language filter
         if request.language:
-            filters.append(SearchIndex.language == request.language)
+            filters.append(SearchIndex.language == self._language_literal(request.language))
         
         # Author filter
         if request.author_id:
@@ -156,89 +1028,261 @@ class SearchService:
         
         # Metadata filters
         if request.metadata_filters:
-            for key, value in request.metadata_filters.items():
-                filters.append(
-                    SearchIndex.metadata[key].astext == str(value)
-                )
+            filters.extend(
+                metadata_filter_clauses(SearchIndex.metadata, request.metadata_filters)
+            )
         
         if filters:
             query = query.where(and_(*filters))
         
         return query
     
-    def _apply_sorting(
+    def _language_literal(self, language: str):
+        """Language value for the filter.
+        
+        Known language codes are rendered inline rather than bound, so the
+        planner can match the per-language partial GIN index even when the
+        statement runs with a generic prepared plan.
+        """
+        if language in LANGUAGE_REGCONFIGS:
+            return bindparam("language", language, literal_execute=True)
+        return language
+    
+    def _ranking(self, request: SearchRequest) -> str:
+        """Relevance ranking for the request: ts_rank, ts_rank_cd or bm25."""
+        return request.ranking or settings.SEARCH_RANKING
+    
+    def _rank_window(self, request: SearchRequest) -> Optional[int]:
+        """Number of candidates ranked per search, or None to rank every match.
+        
+        BM25 is computed per row, so it always ranks a bounded set.
+        """
+        if request.sort_by != "relevance":
+            return None
+        two_phase = request.two_phase
+        if two_phase is None:
+            two_phase = settings.SEARCH_TWO_PHASE_RANKING
+        if not two_phase and self._ranking(request) != "bm25":
+            return None
+        return request.rank_candidates or settings.SEARCH_RANK_CANDIDATES
+    
+    def _candidate_order(self, parsed_query: ParsedQuery) -> List[Any]:
+        """Cheap ordering picking the candidates for two-phase ranking."""
+        recency = [SearchIndex.published_at.desc().nulls_last(), SearchIndex.id.desc()]
+        if settings.SEARCH_CANDIDATE_ORDER == "recent":
+            return recency
+        
+        # Rows with a query word in the title (weight A) first; a boolean
+        # match per row, no ranking
+        title_hit = SearchIndex.search_vector.op('@@')(
+            parsed_query.to_tsquery(parsed_query.any_word_tsquery("A"))
+        )
+        return [title_hit.desc(), *recency]
+    
+    def _sort_key(
         self,
-        query,
         request: SearchRequest,
-        search_query: str
-    ):
-        """Apply sorting to search query."""
+        parsed_query: ParsedQuery
+    ) -> Tuple[Any, bool]:
+        """Return the sort key expression and whether it can be NULL.
+        
+        Relevance is ranked by the ranking profiles of the requested document
+        types, which weight, normalize and decay it per type, and multiplied
+        by the click boosts of the query.
+        """
         if request.sort_by == "relevance":
-            # Sort by relevance score
-            rank = func.ts_rank(
-                SearchIndex.search_vector,
-                func.to_tsquery(search_query)
+            rank = ranking_profiles.sort_key(
+                self._ranking(request), parsed_query, request.document_types, self._reference_time
             )
-            if request.sort_order == "desc":
-                query = query.order_by(desc(rank))
-            else:
-                query = query.order_by(asc(rank))
+            if settings.SEARCH_CLICK_BOOSTS_ENABLED:
+                rank = rank * click_boost(request.query)
+            return rank, False
         elif request.sort_by == "date":
-            if request.sort_order == "desc":
-                query = query.order_by(desc(SearchIndex.published_at))
-            else:
-                query = query.order_by(asc(SearchIndex.published_at))
+            return SearchIndex.published_at, True
         elif request.sort_by == "title":
-            if request.sort_order == "desc":
-                query = query.order_by(desc(SearchIndex.title))
-            else:
-                query = query.order_by(asc(SearchIndex.title))
+            return SearchIndex.title, False
         else:
-            # Default to indexed_at desc
-            query = query.order_by(desc(SearchIndex.indexed_at))
+            # Default to indexed_at
+            return SearchIndex.indexed_at, False
+    
+    def _apply_sorting(
+        self,
+        query,
+        request: SearchRequest,
+        parsed_query: ParsedQuery,
+        cursor: Optional[SearchCursor] = None
+    ):
+        """Apply sorting to search query.
         
-        return query
+        Rows are ordered by the sort key with the primary key as a
+        tiebreaker, so the order is total and a cursor can seek past the
+        last row of the previous page. The sort key is selected as
+        ``sort_key`` so the next cursor can be built from the last row.
+        """
+        sort_key, nullable = self._sort_key(request, parsed_query)
+        descending = self._is_descending(request)
+        
+        query = query.add_columns(sort_key.label("sort_key"))
+        
+        if cursor is not None:
+            query = query.where(
+                self._seek_predicate(sort_key, nullable, descending, cursor)
+            )
+        
+        return query.order_by(
+            *self._order_clauses(sort_key, SearchIndex.id, nullable, descending)
+        )
+    
+    def _is_descending(self, request: SearchRequest) -> bool:
+        """Unknown sorts fall back to indexed_at desc."""
+        return request.sort_order == "desc" or request.sort_by not in ("relevance", "date", "title")
+    
+    def _order_clauses(self, sort_key, id_column, nullable: bool, descending: bool) -> List[Any]:
+        """ORDER BY the sort key (NULLs last) with the id as tiebreaker."""
+        direction = desc if descending else asc
+        order_key = direction(sort_key)
+        if nullable:
+            order_key = order_key.nulls_last()
+        return [order_key, direction(id_column)]
+    
+    def _seek_predicate(
+        self,
+        sort_key,
+        nullable: bool,
+        descending: bool,
+        cursor: SearchCursor
+    ):
+        """Build the keyset predicate selecting rows after the cursor position."""
+        def after(column, value):
+            return column < value if descending else column > value
+        
+        id_after = after(SearchIndex.id, cursor.last_id)
+        
+        # NULL keys sort last, so past a NULL only the id tiebreaker remains
+        if cursor.key is None:
+            return and_(sort_key.is_(None), id_after)
+        
+        predicate = or_(
+            after(sort_key, cursor.key),
+            and_(sort_key == cursor.key, id_after)
+        )
+        if nullable:
+            predicate = or_(predicate, sort_key.is_(None))
+        
+        return predicate
+    
+    def _page_query(
+        self,
+        page_query,
+        request: SearchRequest,
+        parsed_query: ParsedQuery
+    ):
+        """Join the ranked page of ids back to search_indexes for the result columns.
+        
+        Only the columns SearchResult needs are selected, the content is cut
+        down to a snippet in SQL, and ts_headline runs on the page rows only
+        rather than on every match.
+        """
+        page = page_query.subquery("page")
+        _, nullable = self._sort_key(request, parsed_query)
+        
+        columns = [
+            page.c.sort_key,
+            SearchIndex.id,
+            SearchIndex.document_id,
+            SearchIndex.document_type,
+            SearchIndex.title,
+            SearchIndex.language,
+            SearchIndex.metadata.label("metadata"),
+            SearchIndex.author_name,
+            SearchIndex.published_at,
+            # One extra character tells whether the snippet was truncated
+            func.left(
+                SearchIndex.content, settings.SEARCH_SNIPPET_LENGTH + 1
+            ).label("content_prefix"),
+        ]
+        if "total_hits" in page.c:
+            columns.append(page.c.total_hits)
+        
+        if request.highlight and settings.SEARCH_SQL_HIGHLIGHT and not parsed_query.is_empty:
+            tsquery = parsed_query.to_tsquery()
+            regconfig = cast(parsed_query.regconfig, REGCONFIG)
+            columns.append(
+                func.ts_headline(
+                    regconfig,
+                    SearchIndex.title,
+                    tsquery,
+                    settings.SEARCH_TITLE_HEADLINE_OPTIONS
+                ).label("highlighted_title")
+            )
+            columns.append(
+                func.ts_headline(
+                    regconfig,
+                    func.left(SearchIndex.content, settings.SEARCH_HEADLINE_SOURCE_CHARS),
+                    tsquery,
+                    settings.SEARCH_HEADLINE_OPTIONS
+                ).label("highlighted_content")
+            )
+        
+        return select(*columns).join_from(
+            page, SearchIndex, SearchIndex.id == page.c.id
+        ).order_by(
+            *self._order_clauses(
+                page.c.sort_key, SearchIndex.id, nullable, self._is_descending(request)
+            )
+        )
     
     def _to_search_result(
         self,
-        index: SearchIndex,
-        query: str,
-        highlight: bool = True
+        row: Mapping[str, Any],
+        request: SearchRequest,
+        parsed_query: ParsedQuery
     ) -> SearchResult:
-        """Convert SearchIndex to SearchResult with highlighting."""
-        # Create content snippet (first 200 chars)
-        content_snippet = index.content[:200] + "..." if len(index.content) > 200 else index.content
+        """Convert a page row to SearchResult with highlighting."""
+        # Create content snippet
+        content_prefix = row["content_prefix"]
+        if len(content_prefix) > settings.SEARCH_SNIPPET_LENGTH:
+            content_snippet = content_prefix[:settings.SEARCH_SNIPPET_LENGTH] + "..."
+        else:
+            content_snippet = content_prefix
         
         result = SearchResult(
-            id=index.id,
-            document_id=index.document_id,
-            document_type=index.document_type,
-            title=index.title,
+            id=row["id"],
+            document_id=row["document_id"],
+            document_type=row["document_type"],
+            title=row["title"],
             content_snippet=content_snippet,
-            language=index.language,
-            metadata=index.metadata or {},
-            author_name=index.author_name,
-            published_at=index.published_at,
+            language=row["language"],
+            metadata=row["metadata"] or {},
+            author_name=row["author_name"],
+            published_at=row["published_at"],
+            relevance_score=row["sort_key"] if request.sort_by == "relevance" else None,
         )
         
         # Add highlighting if requested
-        if highlight:
-            result.highlighted_title = self._highlight_text(index.title, query)
-            result.highlighted_content = self._highlight_text(content_snippet, query)
+        if request.highlight:
+            if "highlighted_title" in row:
+                result.highlighted_title = row["highlighted_title"]
+                result.highlighted_content = row["highlighted_content"]
+            else:
+                terms = parsed_query.terms
+                with self.timer.stage("highlight"):
+                    result.highlighted_title = self._highlight_text(result.title, terms)
+                    result.highlighted_content = self._highlight_text(content_snippet, terms)
         
         return result
     
-    def _highlight_text(self, text: str, query: str) -> str:
+    def _highlight_text(self, text: str, terms: Tuple[str, ...]) -> str:
         """Highlight search terms in text."""
-        terms = query.lower().split()
         highlighted = text
         
         for term in terms:
             if term:
                 # Simple case-insensitive highlighting
-                import re
                 pattern = re.compile(re.escape(term), re.IGNORECASE)
-                highlighted = pattern.sub(f"<mark>{term}</mark>", highlighted)
+                highlighted = pattern.sub(
+                    lambda match: f"<mark>{match.group(0)}</mark>", highlighted
+                )
         
         return highlighted
     
@@ -0,0 +1,168 @@
+"""Search Warm-up
+
+Warms a freshly started worker before it reports ready, so the first
+minutes after a deploy do not hit cold PostgreSQL buffers and empty caches:
+
+1. Optionally loads SEARCH_WARMUP_PREWARM_RELATIONS (the full-text GIN
+   index by default) into shared buffers with pg_prewarm, which needs the
+   pg_prewarm extension.
+2. Replays the SEARCH_WARMUP_QUERIES most popular queries of the last
+   SEARCH_WARMUP_DAYS, at most SEARCH_WARMUP_CONCURRENCY at a time, each on
+   its own connection. Every replay runs the search against the database,
+   even when its response is cached, refreshing the result cache, and the
+   autocomplete lookup for the query. Replays are not recorded in
+   analytics, so they do not make their own queries more popular.
+
+Warm-up runs in the background after startup and /ready answers 503 until
+it is over. It never blocks readiness for longer than
+SEARCH_WARMUP_TIMEOUT_SECONDS, and failures only make it end early.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import cast, func, select
+from sqlalchemy.dialects.postgresql import REGCLASS
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.schemas.search import SearchRequest
+from app.services.autocomplete_service import AutoCompleteService
+from app.services.search_analytics_service import SearchAnalyticsService
+from app.services.search_service import SearchService
+
+logger = logging.getLogger(__name__)
+
+
+class SearchWarmup:
+    """Replays popular searches at startup and tracks whether that is done."""
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        queries: int = 50,
+        days: int = 7,
+        concurrency: int = 4,
+        prewarm_relations: Optional[List[str]] = None,
+        timeout: float = 60.0
+    ):
+        self.session_factory = session_factory
+        self.queries = queries
+        self.days = days
+        self.concurrency = concurrency
+        self.prewarm_relations = prewarm_relations or []
+        self.timeout = timeout
+
+        # Ready unless a warm-up was started and has not finished
+        self.ready = True
+        self.finished_at: Optional[datetime] = None
+        self.duration_ms: Optional[float] = None
+        self.replayed = 0
+        self.failed = 0
+        self.prewarmed: Dict[str, int] = {}
+        self.timed_out = False
+
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Warm up in the background; ``ready`` turns true when it is over."""
+        if self._task is not None:
+            return
+        self.ready = False
+        self._task = asyncio.create_task(self.run(), name="search-warmup")
+        logger.info("Search warm-up started")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self) -> None:
+        """Prewarm and replay, within the time limit, then report ready."""
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._warm(), self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out = True
+            logger.warning(f"Search warm-up cut short after {self.timeout}s")
+        except Exception as e:
+            logger.error(f"Search warm-up failed: {e}")
+        finally:
+            self.duration_ms = (time.perf_counter() - started) * 1000
+            self.finished_at = datetime.utcnow()
+            self.ready = True
+        logger.info(
+            f"Search warm-up done in {self.duration_ms:.0f}ms: "
+            f"{self.replayed} queries replayed, {self.failed} failed"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration_ms": round(self.duration_ms, 1) if self.duration_ms is not None else None,
+            "replayed": self.replayed,
+            "failed": self.failed,
+            "prewarmed_blocks": dict(self.prewarmed),
+            "timed_out": self.timed_out,
+        }
+
+    async def _warm(self) -> None:
+        if self.prewarm_relations:
+            await self._prewarm()
+
+        async with self.session_factory() as session:
+            popular = await SearchAnalyticsService(session).get_popular_queries(
+                limit=self.queries, days=self.days
+            )
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def replay(query: str) -> None:
+            async with semaphore:
+                try:
+                    await self._replay(query)
+                except Exception as e:
+                    self.failed += 1
+                    logger.debug(f"Warm-up replay of {query!r} failed: {e}")
+                else:
+                    self.replayed += 1
+
+        await asyncio.gather(*(replay(entry["query"]) for entry in popular))
+
+    async def _prewarm(self) -> None:
+        """Load relations into shared buffers; a missing extension only skips this."""
+        async with self.session_factory() as session:
+            for relation in self.prewarm_relations:
+                try:
+                    self.prewarmed[relation] = await session.scalar(
+                        select(func.pg_prewarm(cast(relation, REGCLASS)))
+                    )
+                except Exception as e:
+                    logger.warning(f"pg_prewarm of {relation} failed: {e}")
+                    await session.rollback()
+
+    async def _replay(self, query: str) -> None:
+        async with self.session_factory() as session:
+            await SearchService(session).warm(SearchRequest(query=query))
+            await AutoCompleteService(session).get_suggestions(
+                query[:100], limit=settings.AUTOCOMPLETE_MAX_SUGGESTIONS
+            )
+
+
+search_warmup = SearchWarmup(
+    queries=settings.SEARCH_WARMUP_QUERIES,
+    days=settings.SEARCH_WARMUP_DAYS,
+    concurrency=settings.SEARCH_WARMUP_CONCURRENCY,
+    prewarm_relations=(
+        settings.SEARCH_WARMUP_PREWARM_RELATIONS if settings.SEARCH_WARMUP_PREWARM else None
+    ),
+    timeout=settings.SEARCH_WARMUP_TIMEOUT_SECONDS,
+)
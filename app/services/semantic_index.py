@@ -0,0 +1,403 @@
+"""Semantic Index
+
+In-process approximate-nearest-neighbour index over the document
+embeddings in search_embeddings, for hybrid retrieval.
+
+Embeddings are written by IndexingService along with the documents; rows
+indexed before semantic retrieval was enabled (or by another embedder) are
+backfilled when the index is built, by one worker at a time and off the
+event loop. The IVF index is rebuilt periodically in the background, which
+also picks up other workers' writes. Between rebuilds this process's writes
+are kept in a small side buffer that is searched exactly, and superseded or
+deleted vectors are skipped.
+
+With SEARCH_SEMANTIC_INDEX_PATH set, the workers of a host share one build:
+they take turns through a lock file there, and a worker whose turn comes
+less than a refresh interval after another's build maps that build in
+read-only (sharing its pages) instead of building its own. Only the latest
+build is kept on disk, and a restarted worker starts from it.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.search_embedding import SearchEmbedding
+from app.models.search_index import SearchIndex
+from app.search.ann import IVFIndex
+from app.search.embeddings import HashingEmbedder, document_text, vector_from_bytes, vector_to_bytes
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_xact_lock key serializing backfill batches across workers
+BACKFILL_LOCK_KEY = 0x5EA7E3BD
+
+
+class SemanticIndex:
+    """ANN index of document embeddings, kept current in-process."""
+
+    def __init__(
+        self,
+        embedder: HashingEmbedder,
+        session_factory: Callable = AsyncSessionLocal,
+        path: Optional[str] = None,
+        refresh_interval: float = 900,
+        n_lists: int = 0,
+        n_probe: int = 8,
+        batch_size: int = 1000
+    ):
+        self.embedder = embedder
+        self.session_factory = session_factory
+        self.path = Path(path) if path else None
+        self.refresh_interval = refresh_interval
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.batch_size = batch_size
+
+        self.ann = self._empty_index()
+        self.ready = False
+        self.loaded_at: Optional[datetime] = None
+
+        # Writes since the build: new vectors, and ids whose built vector is stale
+        self._added: Dict[UUID, np.ndarray] = {}
+        self._removed: Set[UUID] = set()
+        # When each of those was written, to tell which a shared build has
+        self._written_at: Dict[UUID, float] = {}
+        self._cleared_at = 0.0
+
+        self._started = False
+        self._task: Optional[asyncio.Task] = None
+        self._saved: Optional[Path] = None
+        # Writes made while a rebuild is reading the table, replayed onto
+        # the new index once it is swapped in
+        self._pending: Optional[List[Tuple[str, Any]]] = None
+
+    async def start(self) -> None:
+        """Serve the last saved build, if any, and build in the background."""
+        if self._started:
+            return
+        self._started = True
+        self._load_saved()
+        self._task = asyncio.create_task(self._refresh_loop(), name="semantic-index-refresh")
+        logger.info("Semantic index started")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._started = False
+        self.ready = False
+        self.ann = self._empty_index()
+        self._clear_writes()
+        self._saved = None
+
+    async def load(self, force: bool = False) -> None:
+        """Backfill missing embeddings, rebuild the ANN index and swap it in.
+
+        With a path, a build saved there by another worker less than a
+        refresh interval ago is mapped in instead, unless ``force``.
+        """
+        if self.path is None:
+            await self._build()
+            return
+
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            lock = open(self.path / "build.lock", "a")
+        except OSError as e:
+            logger.error(f"Failed to open semantic index path: {e}")
+            return
+        with lock:
+            await asyncio.to_thread(fcntl.flock, lock, fcntl.LOCK_EX)
+            try:
+                if force or not self._load_recent():
+                    await self._build()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    async def _build(self) -> None:
+        started = time.time()
+        self._pending = []
+        try:
+            async with self.session_factory() as session:
+                await self.backfill(session)
+                ids, vectors = await self._read_embeddings(session)
+            ann = await asyncio.to_thread(IVFIndex.build, ids, vectors, self.n_lists)
+            if self.path is not None:
+                ann = await asyncio.to_thread(self._save, ann, started)
+        except Exception as e:
+            logger.error(f"Failed to build semantic index: {e}")
+            self._pending = None
+            return
+
+        pending, self._pending = self._pending, None
+        self.ann = ann
+        self._clear_writes()
+        for operation, value in pending:
+            if operation == "add":
+                self._add(*value)
+            elif operation == "remove":
+                self._remove(value)
+            else:
+                self._clear()
+
+        self.ready = True
+        self.loaded_at = datetime.utcnow()
+        logger.info(f"Semantic index built with {len(ann)} vectors")
+
+    async def backfill(self, session) -> int:
+        """Embed documents with no embedding from the current embedder; returns how many.
+
+        Each batch is a transaction holding an advisory lock; a worker that
+        finds another one backfilling leaves the rest to it. Embedding runs
+        in a thread, so searches go on meanwhile.
+        """
+        missing = select(SearchIndex.id, SearchIndex.title, SearchIndex.content).outerjoin(
+            SearchEmbedding,
+            and_(
+                SearchEmbedding.id == SearchIndex.id,
+                SearchEmbedding.model == self.embedder.name
+            )
+        ).where(SearchEmbedding.id.is_(None)).limit(self.batch_size)
+
+        embedded = 0
+        while True:
+            async with session.begin():
+                locked = await session.scalar(
+                    select(func.pg_try_advisory_xact_lock(BACKFILL_LOCK_KEY))
+                )
+                if not locked:
+                    return embedded
+                rows = (await session.execute(missing)).all()
+                if not rows:
+                    return embedded
+
+                embeddings = await asyncio.to_thread(self._embed_rows, rows)
+                await session.execute(self.upsert_statement(embeddings))
+            embedded += len(rows)
+
+    def embed_document(self, title: str, content: str) -> np.ndarray:
+        return self.embedder.embed(document_text(title, content))
+
+    def _embed_rows(self, rows) -> List[Tuple[UUID, np.ndarray]]:
+        return [(row.id, self.embed_document(row.title, row.content)) for row in rows]
+
+    def upsert_statement(self, embeddings: Sequence[Tuple[UUID, np.ndarray]]):
+        """INSERT ... ON CONFLICT storing the given embeddings."""
+        statement = insert(SearchEmbedding).values([
+            {
+                "id": document_id,
+                "model": self.embedder.name,
+                "dimensions": self.embedder.dimensions,
+                "vector": vector_to_bytes(vector),
+            }
+            for document_id, vector in embeddings
+        ])
+        return statement.on_conflict_do_update(
+            index_elements=[SearchEmbedding.id],
+            set_={
+                "model": statement.excluded.model,
+                "dimensions": statement.excluded.dimensions,
+                "vector": statement.excluded.vector,
+                "updated_at": func.now(),
+            }
+        )
+
+    def apply(self, document_id: UUID, vector: np.ndarray) -> None:
+        """Mirror a stored embedding of a search_indexes row."""
+        if not self._started:
+            return
+        self._add(document_id, vector)
+        if self._pending is not None:
+            self._pending.append(("add", (document_id, vector)))
+
+    def remove(self, document_id: UUID) -> None:
+        """Mirror a deleted search_indexes row."""
+        if not self._started:
+            return
+        self._remove(document_id)
+        if self._pending is not None:
+            self._pending.append(("remove", document_id))
+
+    def clear(self) -> None:
+        """Mirror clearing the whole search index."""
+        if not self._started:
+            return
+        self._clear()
+        if self._pending is not None:
+            self._pending.clear()
+            self._pending.append(("clear", None))
+
+    def search(self, text: str, k: int) -> List[Tuple[UUID, float]]:
+        """The k documents most similar to the text, by cosine similarity, most similar first."""
+        query = self.embedder.embed(text)
+        if not query.any():
+            return []
+
+        results = self.ann.search(query, k, self.n_probe, exclude=self._removed)
+        if self._added:
+            added_ids = list(self._added)
+            scores = np.stack([self._added[document_id] for document_id in added_ids]) @ query
+            results.extend(zip(added_ids, scores.tolist()))
+            results.sort(key=lambda result: result[1], reverse=True)
+        return results[:k]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "embedder": self.embedder.name,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "vectors": len(self.ann),
+            "lists": len(self.ann.centroids),
+            "probes": self.n_probe,
+            "pending_writes": len(self._added) + len(self._removed),
+            "memory_mapped": isinstance(self.ann.vectors, np.memmap),
+        }
+
+    def _add(self, document_id: UUID, vector: np.ndarray) -> None:
+        self._added[document_id] = vector
+        self._removed.add(document_id)
+        self._written_at[document_id] = time.time()
+
+    def _remove(self, document_id: UUID) -> None:
+        self._added.pop(document_id, None)
+        self._removed.add(document_id)
+        self._written_at[document_id] = time.time()
+
+    def _clear(self) -> None:
+        self.ann = self._empty_index()
+        self._clear_writes()
+        self._cleared_at = time.time()
+
+    def _clear_writes(self) -> None:
+        self._added = {}
+        self._removed = set()
+        self._written_at = {}
+
+    def _empty_index(self) -> IVFIndex:
+        return IVFIndex.build([], np.zeros((0, self.embedder.dimensions), dtype=np.float32))
+
+    async def _read_embeddings(self, session) -> Tuple[List[UUID], np.ndarray]:
+        stmt = select(SearchEmbedding.id, SearchEmbedding.vector).where(
+            SearchEmbedding.model == self.embedder.name
+        ).execution_options(yield_per=self.batch_size)
+
+        ids: List[UUID] = []
+        vectors = []
+        result = await session.stream(stmt)
+        async for rows in result.partitions():
+            for row in rows:
+                ids.append(row.id)
+                vectors.append(vector_from_bytes(row.vector))
+        if not vectors:
+            return ids, np.zeros((0, self.embedder.dimensions), dtype=np.float32)
+        return ids, np.stack(vectors)
+
+    def _save(self, ann: IVFIndex, started: float) -> IVFIndex:
+        """Save a build made from the table as of ``started`` and map it back in.
+
+        ``current`` is switched to it atomically, and every other saved
+        build, including those of workers that have exited, is removed.
+        Called with the build lock held, so no other build is being saved.
+        """
+        directory = self.path / f"ivf-{int(started * 1000)}-{os.getpid()}"
+        ann.save(directory)
+
+        link = self.path / f"current.{os.getpid()}.tmp"
+        if link.is_symlink():
+            link.unlink()
+        link.symlink_to(directory.name)
+        os.replace(link, self.path / "current")
+
+        # Workers still mapping an older build keep a valid mapping
+        for saved in self.path.glob("ivf-*"):
+            if saved != directory:
+                shutil.rmtree(saved, ignore_errors=True)
+        self._saved = directory
+        return IVFIndex.load(directory, mmap=True)
+
+    def _current(self) -> Optional[Tuple[Path, float]]:
+        """The directory ``current`` points to and when its build read the table."""
+        try:
+            directory = self.path / os.readlink(self.path / "current")
+            built_at = int(directory.name.split("-")[1]) / 1000
+        except (OSError, IndexError, ValueError):
+            return None
+        return directory, built_at
+
+    def _map(self, directory: Path) -> bool:
+        try:
+            ann = IVFIndex.load(directory, mmap=True)
+        except Exception as e:
+            logger.warning(f"Could not load saved semantic index: {e}")
+            return False
+        if ann.dimensions != self.embedder.dimensions:
+            return False
+        self.ann = ann
+        self._saved = directory
+        return True
+
+    def _load_recent(self) -> bool:
+        """Serve the saved build if it is less than a refresh interval old.
+
+        Writes of this process from before that build read the table are
+        in it, so they leave the side buffer.
+        """
+        current = self._current()
+        if current is None:
+            return False
+        directory, built_at = current
+        if built_at < max(time.time() - self.refresh_interval, self._cleared_at):
+            return False
+        if directory == self._saved:
+            return True
+        if not self._map(directory):
+            return False
+
+        for document_id, written_at in list(self._written_at.items()):
+            if written_at < built_at:
+                del self._written_at[document_id]
+                self._added.pop(document_id, None)
+                self._removed.discard(document_id)
+        self.ready = True
+        self.loaded_at = datetime.utcnow()
+        logger.info(f"Semantic index mapped in with {len(self.ann)} vectors")
+        return True
+
+    def _load_saved(self) -> None:
+        if self.path is None:
+            return
+        current = self._current()
+        if current is not None and self._map(current[0]):
+            self.ready = True
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self.load()
+            await asyncio.sleep(self.refresh_interval)
+
+
+semantic_index = SemanticIndex(
+    HashingEmbedder(settings.SEARCH_EMBEDDING_DIMENSIONS),
+    path=settings.SEARCH_SEMANTIC_INDEX_PATH,
+    refresh_interval=settings.SEARCH_SEMANTIC_REFRESH_SECONDS,
+    n_lists=settings.SEARCH_ANN_LISTS,
+    n_probe=settings.SEARCH_ANN_PROBES,
+)
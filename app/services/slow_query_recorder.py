@@ -0,0 +1,203 @@
+"""Slow Query Recorder
+
+Captures search, facet and autocomplete statements that ran longer than
+SLOW_QUERY_THRESHOLD_MS, together with their rendered SQL, the normalized
+query text, filters and stage timings, in a bounded ring buffer.
+
+A sample of them is re-run under EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) in
+the background, at most once per SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS, on a
+session of its own and under a statement timeout. Only SELECTs are ever
+recorded, so re-running them is side-effect free.
+
+Statements cancelled by their statement_timeout (or by the request going
+away) are recorded too, flagged ``cancelled``. They would most likely run
+out of time again under ANALYZE, so only their plan is explained.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) of a select statement, or without ANALYZE."""
+
+    inherit_cache = False
+
+    def __init__(self, statement, analyze: bool = True):
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if element.analyze else "FORMAT JSON"
+    return f"EXPLAIN ({options}) " + compiler.process(element.statement, **kw)
+
+
+@dataclass
+class SlowQuery:
+    """A statement that exceeded the threshold."""
+    kind: str  # search, facets or autocomplete
+    query_text: str
+    duration_ms: float
+    sql: str
+    filters: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    cancelled: bool = False  # Cancelled before it finished; duration_ms is when
+    plan: Optional[Any] = None
+    explain_status: str = "skipped"  # skipped, pending, done or failed
+    recorded_at: datetime = field(default_factory=datetime.utcnow)
+
+
+class SlowQueryRecorder:
+    """Ring buffer of slow statements with sampled, rate-limited EXPLAINs."""
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        enabled: bool = True,
+        threshold_ms: float = 500.0,
+        explain_sample_rate: float = 1.0,
+        explain_interval: float = 60.0,
+        explain_timeout: float = 30.0,
+        capacity: int = 100
+    ):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_interval = explain_interval
+        self.explain_timeout = explain_timeout
+
+        self.entries: deque = deque(maxlen=capacity)
+        self._last_explain: Optional[float] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.recorded = 0
+        self.explained = 0
+
+    def observe(
+        self,
+        kind: str,
+        statement,
+        duration_ms: float,
+        query_text: str,
+        filters: Optional[Dict[str, Any]] = None,
+        timings: Optional[Dict[str, float]] = None,
+        cancelled: bool = False
+    ) -> Optional[SlowQuery]:
+        """Record the statement if it was slow; returns the entry when recorded.
+
+        ``cancelled`` statements did not finish; they are recorded if they
+        ran past the threshold before being cancelled.
+        """
+        if not self.enabled or duration_ms < self.threshold_ms:
+            return None
+
+        entry = SlowQuery(
+            kind=kind,
+            query_text=" ".join(query_text.lower().split()),
+            duration_ms=round(duration_ms, 3),
+            sql=self._render_sql(statement),
+            filters=dict(filters or {}),
+            timings=dict(timings or {}),
+            cancelled=cancelled,
+        )
+        self.entries.append(entry)
+        self.recorded += 1
+
+        if self._should_explain():
+            entry.explain_status = "pending"
+            task = asyncio.create_task(self._explain(entry, statement))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        return entry
+
+    async def stop(self) -> None:
+        """Cancel EXPLAINs still running."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def list(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Recorded entries, newest first."""
+        entries = list(reversed(self.entries))
+        if limit is not None:
+            entries = entries[:limit]
+        return [asdict(entry) for entry in entries]
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "buffered": len(self.entries),
+            "recorded": self.recorded,
+            "explained": self.explained,
+        }
+
+    def _should_explain(self) -> bool:
+        now = time.monotonic()
+        if self._last_explain is not None and now - self._last_explain < self.explain_interval:
+            return False
+        if random.random() >= self.explain_sample_rate:
+            return False
+        self._last_explain = now
+        return True
+
+    async def _explain(self, entry: SlowQuery, statement) -> None:
+        try:
+            async with self.session_factory() as session:
+                await session.execute(
+                    text(f"SET LOCAL statement_timeout = {int(self.explain_timeout * 1000)}")
+                )
+                plan = (await session.execute(
+                    Explain(statement, analyze=not entry.cancelled)
+                )).scalar_one()
+                await session.rollback()
+            entry.plan = json.loads(plan) if isinstance(plan, str) else plan
+            entry.explain_status = "done"
+            self.explained += 1
+        except Exception as e:
+            entry.explain_status = "failed"
+            logger.warning(f"EXPLAIN of slow {entry.kind} query failed: {e}")
+
+    def _render_sql(self, statement) -> str:
+        """The statement as Postgres SQL, with parameters inlined where possible."""
+        dialect = postgresql.dialect()
+        try:
+            return str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+        except Exception:
+            compiled = statement.compile(dialect=dialect)
+            return f"{compiled}\n-- parameters: {compiled.params}"
+
+
+slow_query_recorder = SlowQueryRecorder(
+    enabled=settings.SLOW_QUERY_ENABLED,
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    explain_interval=settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+    explain_timeout=settings.SLOW_QUERY_EXPLAIN_TIMEOUT_SECONDS,
+    capacity=settings.SLOW_QUERY_BUFFER_SIZE,
+)
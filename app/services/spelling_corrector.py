@@ -0,0 +1,231 @@
+"""Spelling Corrector
+
+"Did you mean" suggestions from the indexed vocabulary.
+
+The indexed lexemes come from ts_stat over the stored search vectors,
+so nothing is tokenized again. Suggestions are always surface words,
+never stems: each lexeme is suggested as the word its documents' titles
+most often spell it with, and lexemes no title contains are known but
+never suggested. The words are loaded into a symmetric-delete dictionary
+so a lookup takes microseconds. It is built in the background and rebuilt
+periodically to pick up newly indexed words; every build reads each
+document's search vector, so the interval is long and the build runs
+under a statement_timeout of its own.
+
+A query word is only corrected when it is unknown, and known means that
+its lexeme under the query's configuration was indexed, so inflections
+of indexed words ("gardens" when only "garden" was indexed) are left
+alone. Words not found in the dictionary as written are stemmed with one
+statement that reads no table.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import Text, cast, func, literal, select, text
+from sqlalchemy.dialects.postgresql import ARRAY, REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, statement_timeout
+from app.search.query_parser import ParsedQuery, replace_words
+from app.search.symspell import Suggestion, SymSpellDictionary
+
+logger = logging.getLogger(__name__)
+
+# Indexed lexemes and how many documents contain each
+LEXICON_QUERY = text(
+    "SELECT word AS lexeme, ndoc FROM ts_stat('SELECT search_vector FROM search_indexes')"
+)
+
+# Title words with the lexeme each stems to under its document's language,
+# and how many titles of that language contain it
+SURFACE_FORMS_QUERY = text(r"""
+    SELECT word, lexeme, ndoc FROM (
+        SELECT word,
+               (tsvector_to_array(to_tsvector(search_regconfig(language), word)))[1] AS lexeme,
+               ndoc
+        FROM (
+            SELECT lower(w) AS word, language, count(DISTINCT id) AS ndoc
+            FROM search_indexes, regexp_split_to_table(title, '\W+') AS w
+            WHERE w <> ''
+            GROUP BY 1, 2
+        ) words
+    ) stemmed
+    WHERE lexeme IS NOT NULL
+""")
+
+
+class SpellingCorrector:
+    """Symmetric-delete dictionary of the indexed words, rebuilt periodically."""
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        refresh_interval: float = 3600,
+        max_edit_distance: int = 2,
+        prefix_length: int = 7,
+        min_count: int = 1,
+        min_word_length: int = 4,
+        load_timeout: float = 300
+    ):
+        self.session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        self.min_count = min_count
+        self.min_word_length = min_word_length
+        self.load_timeout = load_timeout
+
+        self.dictionary = SymSpellDictionary(max_edit_distance, prefix_length)
+        self.lexemes: Set[str] = set()
+        # Most frequent title word of each indexed lexeme
+        self.surface_forms: Dict[str, str] = {}
+        self.ready = False
+        self.loaded_at: Optional[datetime] = None
+
+        self._started = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Build the dictionary in the background, then rebuild it periodically."""
+        if self._started:
+            return
+        self._started = True
+        self._task = asyncio.create_task(self._refresh_loop(), name="spelling-dictionary-refresh")
+        logger.info("Spelling corrector started")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._started = False
+        self.ready = False
+        self.dictionary = SymSpellDictionary(self.max_edit_distance, self.prefix_length)
+        self.lexemes = set()
+        self.surface_forms = {}
+
+    async def load(self) -> None:
+        """Rebuild the dictionary from the indexed lexemes and swap it in."""
+        surface_counts: Dict[str, Dict[str, int]] = {}
+        try:
+            async with self.session_factory() as session:
+                async with statement_timeout(session, self.load_timeout):
+                    lexicon = dict((await session.execute(LEXICON_QUERY)).all())
+                    result = await session.execute(SURFACE_FORMS_QUERY)
+                    for word, lexeme, count in result.all():
+                        words = surface_counts.setdefault(lexeme, {})
+                        words[word] = words.get(word, 0) + count
+        except Exception as e:
+            logger.error(f"Failed to build spelling dictionary: {e}")
+            return
+
+        surface_forms = {
+            lexeme: max(words, key=lambda word: (words[word], word))
+            for lexeme, words in surface_counts.items()
+            if lexeme in lexicon
+        }
+        # Each lexeme is suggested as its surface word, as often as it was indexed
+        dictionary = SymSpellDictionary(self.max_edit_distance, self.prefix_length)
+        for lexeme, word in surface_forms.items():
+            if lexicon[lexeme] >= self.min_count:
+                dictionary.add(word, lexicon[lexeme])
+
+        self.dictionary = dictionary
+        self.lexemes = set(lexicon)
+        self.surface_forms = surface_forms
+        self.ready = True
+        self.loaded_at = datetime.utcnow()
+        logger.info(f"Spelling dictionary built with {len(dictionary)} words")
+
+    def surface_form(self, lexeme: str) -> Optional[str]:
+        """The word most often indexed for ``lexeme``, if any."""
+        return self.surface_forms.get(lexeme)
+
+    async def corrections(
+        self,
+        db: AsyncSession,
+        parsed_query: ParsedQuery,
+        limit: int = 5
+    ) -> Dict[str, List[Suggestion]]:
+        """Suggestions for each unknown word of the query's positive clauses."""
+        dictionary = self.dictionary
+        corrections = {}
+        for word in await self._unknown_words(db, parsed_query):
+            suggestions = dictionary.lookup(word, limit=limit)
+            if suggestions:
+                corrections[word] = suggestions
+        return corrections
+
+    async def did_you_mean(self, db: AsyncSession, parsed_query: ParsedQuery) -> Optional[str]:
+        """The query with each unknown word replaced by its best suggestion, if any."""
+        return self.respell(parsed_query, await self.corrections(db, parsed_query, limit=1))
+
+    def respell(
+        self,
+        parsed_query: ParsedQuery,
+        corrections: Dict[str, List[Suggestion]]
+    ) -> Optional[str]:
+        """The query with each corrected word replaced by its first suggestion."""
+        if not corrections:
+            return None
+        return replace_words(
+            parsed_query.text,
+            {word: suggestions[0].term for word, suggestions in corrections.items()}
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "lexemes": len(self.lexemes),
+            **self.dictionary.stats(),
+        }
+
+    async def _unknown_words(self, db: AsyncSession, parsed_query: ParsedQuery) -> List[str]:
+        """Positive words of the query none of whose lexemes were indexed.
+
+        Words indexed as written are known without asking the database; the
+        rest are stemmed under the query's configuration in one statement.
+        Stop words have no lexeme and count as known.
+        """
+        words = [
+            word for word, _ in parsed_query.positive_words
+            if len(word) >= self.min_word_length
+            and not word.isdigit()
+            and word not in self.dictionary
+        ]
+        if not words or not self.lexemes:
+            return []
+
+        word = func.unnest(literal(words, ARRAY(Text))).table_valued("word").render_derived("w")
+        lexemes = func.tsvector_to_array(
+            func.to_tsvector(cast(parsed_query.regconfig, REGCONFIG), word.c.word)
+        )
+        result = await db.execute(select(word.c.word, lexemes.label("lexemes")))
+        lexemes = self.lexemes
+        return [
+            row.word for row in result.all()
+            if row.lexemes and not any(lexeme in lexemes for lexeme in row.lexemes)
+        ]
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self.load()
+            await asyncio.sleep(self.refresh_interval)
+
+
+spelling_corrector = SpellingCorrector(
+    refresh_interval=settings.SPELLING_REFRESH_SECONDS,
+    max_edit_distance=settings.SPELLING_MAX_EDIT_DISTANCE,
+    prefix_length=settings.SPELLING_PREFIX_LENGTH,
+    min_count=settings.SPELLING_MIN_DOCUMENT_COUNT,
+    min_word_length=settings.SEARCH_TYPO_MIN_WORD_LENGTH,
+    load_timeout=settings.SPELLING_LOAD_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,135 @@
+"""Synonym Loader
+
+Loads synonym rules from the search_synonyms table and the optional
+SEARCH_SYNONYMS_FILE into the query parser's synonym dictionary, at startup
+and then every SEARCH_SYNONYMS_REFRESH_SECONDS, so edits take effect
+without a restart (and reach every worker).
+
+When the rules change, cached search results are invalidated too: they were
+computed with the old expansions. The cache keeps the digest of the rules it
+was invalidated for, so restarts and other workers loading the same rules
+leave it alone.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.cache import get_search_cache
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.search_synonym import SearchSynonym
+from app.search.languages import regconfig_for
+from app.search.synonyms import SynonymDictionary, parse_synonym_rules, synonym_dictionary
+
+logger = logging.getLogger(__name__)
+
+
+class SynonymLoader:
+    """Keeps a SynonymDictionary in line with the configured rule sources."""
+
+    def __init__(
+        self,
+        dictionary: SynonymDictionary,
+        session_factory: Callable = AsyncSessionLocal,
+        path: Optional[str] = None,
+        refresh_interval: float = 300
+    ):
+        self.dictionary = dictionary
+        self.session_factory = session_factory
+        self.path = path
+        self.refresh_interval = refresh_interval
+
+        self.loaded_at: Optional[datetime] = None
+        self.rules = 0
+
+        self._started = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Load the rules and start the periodic reload."""
+        if self._started:
+            return
+        self._started = True
+        await self.load()
+        self._task = asyncio.create_task(self._refresh_loop(), name="synonym-reload")
+        logger.info("Synonym loader started")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._started = False
+
+    async def load(self) -> bool:
+        """Reload the rules; returns whether the expansions changed.
+
+        A source that cannot be read or holds a malformed rule leaves the
+        current expansions in place.
+        """
+        try:
+            rules = self._file_rules() + await self._table_rules()
+            mapping = parse_synonym_rules(rules)
+        except Exception as e:
+            logger.error(f"Failed to load synonyms: {e}")
+            return False
+
+        self.rules = len(rules)
+        self.loaded_at = datetime.utcnow()
+        changed = self.dictionary.replace(mapping)
+        if changed:
+            logger.info(
+                f"Synonyms loaded: {len(self.dictionary)} expanded terms, "
+                f"version {self.dictionary.version}"
+            )
+            cache = get_search_cache()
+            if cache is not None:
+                await cache.invalidate_on_change("synonyms", self.dictionary.digest())
+        return changed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rules": self.rules,
+            "expanded_terms": len(self.dictionary),
+            "version": self.dictionary.version,
+            "file": self.path,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+        }
+
+    def _file_rules(self) -> List[Tuple[str, Optional[str]]]:
+        if not self.path:
+            return []
+        lines = Path(self.path).read_text(encoding="utf-8").splitlines()
+        return [(line, None) for line in lines]
+
+    async def _table_rules(self) -> List[Tuple[str, Optional[str]]]:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(SearchSynonym.rule, SearchSynonym.language).where(
+                    SearchSynonym.is_active.is_(True)
+                )
+            )
+            return [
+                (rule, regconfig_for(language) if language else None)
+                for rule, language in result.all()
+            ]
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.load()
+
+
+synonym_loader = SynonymLoader(
+    synonym_dictionary,
+    path=settings.SEARCH_SYNONYMS_FILE,
+    refresh_interval=settings.SEARCH_SYNONYMS_REFRESH_SECONDS,
+)
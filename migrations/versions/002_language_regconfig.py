@@ -0,0 +1,88 @@
+"""Map language codes to text search configurations
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+# Language codes with a dedicated partial GIN index
+LANGUAGES = ['en', 'es', 'fr', 'pt']
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    # Documents store language codes ('en', 'es', ...), which are not valid
+    # regconfig names; map them explicitly. IMMUTABLE so it can be used in
+    # index expressions.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION search_regconfig(lang text) RETURNS regconfig AS $$
+          SELECT CASE lower(COALESCE(lang, 'en'))
+            WHEN 'en' THEN 'english'
+            WHEN 'english' THEN 'english'
+            WHEN 'es' THEN 'spanish'
+            WHEN 'spanish' THEN 'spanish'
+            WHEN 'fr' THEN 'french'
+            WHEN 'french' THEN 'french'
+            WHEN 'pt' THEN 'portuguese'
+            WHEN 'portuguese' THEN 'portuguese'
+            ELSE 'simple'
+          END::regconfig
+        $$ LANGUAGE sql IMMUTABLE;
+        
+        CREATE OR REPLACE FUNCTION search_indexes_trigger() RETURNS trigger AS $$
+        begin
+          new.search_vector :=
+            setweight(to_tsvector(search_regconfig(new.language), COALESCE(new.title, '')), 'A') ||
+            setweight(to_tsvector(search_regconfig(new.language), COALESCE(new.content, '')), 'B') ||
+            setweight(to_tsvector(search_regconfig(new.language), COALESCE(new.author_name, '')), 'C');
+          return new;
+        end
+        $$ LANGUAGE plpgsql;
+    """)
+    
+    # Rebuild vectors that were stemmed with the wrong configuration
+    op.execute("""
+        UPDATE search_indexes SET search_vector =
+            setweight(to_tsvector(search_regconfig(language), COALESCE(title, '')), 'A') ||
+            setweight(to_tsvector(search_regconfig(language), COALESCE(content, '')), 'B') ||
+            setweight(to_tsvector(search_regconfig(language), COALESCE(author_name, '')), 'C');
+    """)
+    
+    # Per-language partial GIN indexes, used when a search filters by language
+    for language in LANGUAGES:
+        op.create_index(
+            f'idx_search_vector_{language}',
+            'search_indexes',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_where=sa.text(f"language = '{language}'")
+        )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    for language in LANGUAGES:
+        op.drop_index(f'idx_search_vector_{language}', table_name='search_indexes')
+    
+    op.execute("""
+        CREATE OR REPLACE FUNCTION search_indexes_trigger() RETURNS trigger AS $$
+        begin
+          new.search_vector :=
+            setweight(to_tsvector(COALESCE(new.language, 'english')::regconfig, COALESCE(new.title, '')), 'A') ||
+            setweight(to_tsvector(COALESCE(new.language, 'english')::regconfig, COALESCE(new.content, '')), 'B') ||
+            setweight(to_tsvector(COALESCE(new.language, 'english')::regconfig, COALESCE(new.author_name, '')), 'C');
+          return new;
+        end
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("DROP FUNCTION IF EXISTS search_regconfig(text);")
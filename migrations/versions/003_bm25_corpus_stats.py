@@ -0,0 +1,99 @@
+"""Add document lengths and corpus statistics for BM25 ranking
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    op.add_column(
+        'search_indexes',
+        sa.Column('document_length', sa.Integer(), nullable=False, server_default='0')
+    )
+    
+    # The trigger now also records the number of lexeme positions
+    op.execute("""
+        CREATE OR REPLACE FUNCTION search_indexes_trigger() RETURNS trigger AS $$
+        begin
+          new.search_vector :=
+            setweight(to_tsvector(search_regconfig(new.language), COALESCE(new.title, '')), 'A') ||
+            setweight(to_tsvector(search_regconfig(new.language), COALESCE(new.content, '')), 'B') ||
+            setweight(to_tsvector(search_regconfig(new.language), COALESCE(new.author_name, '')), 'C');
+          new.document_length := (
+            SELECT COALESCE(sum(COALESCE(array_length(positions, 1), 1)), 0)
+            FROM unnest(new.search_vector)
+          );
+          return new;
+        end
+        $$ LANGUAGE plpgsql;
+    """)
+    
+    op.execute("""
+        UPDATE search_indexes SET document_length = (
+            SELECT COALESCE(sum(COALESCE(array_length(positions, 1), 1)), 0)
+            FROM unnest(search_vector)
+        );
+    """)
+    
+    op.create_table(
+        'search_term_stats',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False, server_default=sa.text('gen_random_uuid()')),
+        sa.Column('lexeme', sa.String(collation='C'), nullable=False),
+        sa.Column('document_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('lexeme')
+    )
+    
+    op.create_table(
+        'search_corpus_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_count', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('total_length', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('id')
+    )
+    
+    # Initial statistics; IndexingService keeps them current from here on
+    op.execute("""
+        INSERT INTO search_term_stats (lexeme, document_count)
+        SELECT word, ndoc FROM ts_stat('SELECT search_vector FROM search_indexes');
+    """)
+    op.execute("""
+        INSERT INTO search_corpus_stats (id, document_count, total_length, updated_at)
+        SELECT 1, count(*), COALESCE(sum(document_length), 0), now() FROM search_indexes;
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_table('search_corpus_stats')
+    op.drop_table('search_term_stats')
+    
+    op.execute("""
+        CREATE OR REPLACE FUNCTION search_indexes_trigger() RETURNS trigger AS $$
+        begin
+          new.search_vector :=
+            setweight(to_tsvector(search_regconfig(new.language), COALESCE(new.title, '')), 'A') ||
+            setweight(to_tsvector(search_regconfig(new.language), COALESCE(new.content, '')), 'B') ||
+            setweight(to_tsvector(search_regconfig(new.language), COALESCE(new.author_name, '')), 'C');
+          return new;
+        end
+        $$ LANGUAGE plpgsql;
+    """)
+    
+    op.drop_column('search_indexes', 'document_length')
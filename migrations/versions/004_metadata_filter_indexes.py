@@ -0,0 +1,42 @@
+"""Add indexes for metadata containment and budget range filters
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    # jsonb_path_ops only supports @> (and jsonpath) but is smaller and
+    # faster for it than the jsonb_ops idx_metadata, which stays for key
+    # existence operators
+    op.create_index(
+        'idx_metadata_path_ops',
+        'search_indexes',
+        ['metadata'],
+        postgresql_using='gin',
+        postgresql_ops={'metadata': 'jsonb_path_ops'}
+    )
+    
+    # Range filters compare metadata -> 'budget' as jsonb
+    op.create_index(
+        'idx_metadata_budget',
+        'search_indexes',
+        [sa.text("(metadata -> 'budget')")]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index('idx_metadata_budget', table_name='search_indexes')
+    op.drop_index('idx_metadata_path_ops', table_name='search_indexes')
@@ -0,0 +1,41 @@
+"""Add trigram indexes for the typo fallback
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    # pg_trgm is installed by 001
+    op.create_index(
+        'idx_title_trgm',
+        'search_indexes',
+        ['title'],
+        postgresql_using='gin',
+        postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+    
+    # search_term_stats doubles as the lexeme dictionary words are corrected against
+    op.create_index(
+        'idx_search_term_stats_lexeme_trgm',
+        'search_term_stats',
+        ['lexeme'],
+        postgresql_using='gin',
+        postgresql_ops={'lexeme': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index('idx_search_term_stats_lexeme_trgm', table_name='search_term_stats')
+    op.drop_index('idx_title_trgm', table_name='search_indexes')
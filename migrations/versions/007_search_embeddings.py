@@ -0,0 +1,37 @@
+"""Add search_embeddings side table for semantic retrieval
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    # Vectors are searched in-process; the table only stores them
+    op.create_table(
+        'search_embeddings',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('dimensions', sa.Integer(), nullable=False),
+        sa.Column('vector', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.ForeignKeyConstraint(['id'], ['search_indexes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_table('search_embeddings')
@@ -0,0 +1,31 @@
+"""Add a per-type recency index for ranking profiles
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    # Ranks themselves depend on the query and cannot be indexed; the
+    # recency input of decaying profiles can, per document type
+    op.create_index(
+        'idx_document_type_published_at',
+        'search_indexes',
+        ['document_type', sa.text('published_at DESC NULLS LAST'), sa.text('id DESC')]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index('idx_document_type_published_at', table_name='search_indexes')
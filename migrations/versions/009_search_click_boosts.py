@@ -0,0 +1,48 @@
+"""Add search_click_boosts table for click-through ranking boosts
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    # Rebuilt from search_queries by the aggregator; searches only look
+    # boosts up by primary key
+    op.create_table(
+        'search_click_boosts',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('query_key', sa.String(length=500), nullable=False),
+        sa.Column('clicks', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('searches', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('boost', sa.Float(), nullable=False, server_default='1'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.ForeignKeyConstraint(['id'], ['search_indexes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id', 'query_key')
+    )
+    
+    # Aggregation scans recent searches with a click
+    op.create_index(
+        'idx_search_queries_clicked_created',
+        'search_queries',
+        ['created_at'],
+        postgresql_where=sa.text('clicked_result_id IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index('idx_search_queries_clicked_created', table_name='search_queries')
+    op.drop_table('search_click_boosts')
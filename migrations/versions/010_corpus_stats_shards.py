@@ -0,0 +1,50 @@
+"""Spread corpus statistics over shard rows and drop unused lexemes
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    # The existing row becomes shard 1; writers add further shards as needed
+    op.alter_column(
+        'search_corpus_stats', 'updated_at',
+        type_=sa.DateTime(timezone=True),
+        existing_nullable=False,
+        existing_server_default=sa.text('now()')
+    )
+
+    # Lexemes whose documents were all removed or changed
+    op.execute("DELETE FROM search_term_stats WHERE document_count <= 0")
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.execute("""
+        INSERT INTO search_corpus_stats (id, document_count, total_length, updated_at)
+        SELECT 1, COALESCE(sum(document_count), 0), COALESCE(sum(total_length), 0), now()
+        FROM search_corpus_stats
+        ON CONFLICT (id) DO UPDATE SET
+          document_count = excluded.document_count,
+          total_length = excluded.total_length,
+          updated_at = excluded.updated_at;
+    """)
+    op.execute("DELETE FROM search_corpus_stats WHERE id <> 1")
+
+    op.alter_column(
+        'search_corpus_stats', 'updated_at',
+        type_=sa.DateTime(),
+        existing_nullable=False,
+        existing_server_default=sa.text('now()')
+    )
@@ -0,0 +1,40 @@
+"""Keep returned result ids for click checks and the click boost rebuild time
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    # Clicks are only recorded on results the search returned
+    op.add_column(
+        'search_queries',
+        sa.Column('result_ids', postgresql.ARRAY(postgresql.UUID(as_uuid=True)), nullable=True)
+    )
+
+    # Single row; search_click_boosts can be empty after a rebuild
+    op.create_table(
+        'search_click_boost_rebuilds',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('boosts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rebuilt_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_table('search_click_boost_rebuilds')
+    op.drop_column('search_queries', 'result_ids')
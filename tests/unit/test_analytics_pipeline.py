@@ -0,0 +1,137 @@
+"""Unit tests for the background analytics pipeline."""
+
+from typing import Any, Callable, List, Optional
+from uuid import uuid4
+
+from app.services.analytics_pipeline import AnalyticsPipeline, SearchEvent
+
+
+class FakeSession:
+    """Records executed statements instead of talking to a database."""
+    
+    def __init__(self, log: List[Any], on_commit: Optional[Callable[[], None]] = None):
+        self.log = log
+        self.on_commit = on_commit
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *args):
+        return False
+    
+    async def execute(self, statement, params=None):
+        self.log.append(params if params is not None else statement)
+    
+    async def commit(self):
+        if self.on_commit is not None:
+            self.on_commit()
+            self.on_commit = None
+        self.log.append("commit")
+
+
+def make_event(query_text: str = "clean water", **fields) -> SearchEvent:
+    values = dict(
+        query_text=query_text,
+        language="en",
+        filters={},
+        results_count=3,
+        user_id=None,
+        execution_time=4.2,
+    )
+    values.update(fields)
+    return SearchEvent(**values)
+
+
+class TestAnalyticsPipeline:
+    """Test queueing, batching and shedding of analytics events."""
+    
+    async def test_drains_on_stop(self):
+        """Test that queued events are flushed in one batch on shutdown."""
+        log: List[Any] = []
+        pipeline = AnalyticsPipeline(
+            session_factory=lambda: FakeSession(log),
+            flush_interval=60,
+        )
+        await pipeline.start()
+        
+        for _ in range(3):
+            assert pipeline.submit(make_event())
+        await pipeline.stop()
+        
+        inserted_rows = log[0]
+        assert len(inserted_rows) == 3
+        assert log[-1] == "commit"
+        assert pipeline.stats()["flushed"] == 3
+    
+    async def test_drops_when_full(self):
+        """Test that events are dropped once the queue is full."""
+        pipeline = AnalyticsPipeline(
+            session_factory=lambda: FakeSession([]),
+            max_queue_size=2,
+            overflow_policy="drop",
+            flush_interval=60,
+        )
+        await pipeline.start()
+        
+        results = [pipeline.submit(make_event()) for _ in range(10)]
+        
+        # The flusher may already hold one event, so at most three fit
+        assert results.count(True) <= 3
+        assert pipeline.dropped == results.count(False)
+        await pipeline.stop()
+    
+    async def test_submit_when_stopped(self):
+        """Test that events are rejected when the pipeline is not running."""
+        pipeline = AnalyticsPipeline(session_factory=lambda: FakeSession([]))
+        
+        assert not pipeline.submit(make_event())
+        assert pipeline.dropped == 1
+    
+    def test_suggestion_increments_are_aggregated(self):
+        """Test that repeated queries become one suggestion upsert row."""
+        pipeline = AnalyticsPipeline(session_factory=lambda: FakeSession([]))
+        events = [make_event("clean water"), make_event("clean water"), make_event("a!")]
+        
+        increments = pipeline._suggestion_increments(events)
+        
+        assert len(increments) == 1
+        assert increments[0]["suggestion_text"] == "clean water"
+        assert increments[0]["usage_count"] == 2
+    
+    async def test_click_on_a_queued_search_is_written_with_it(self):
+        """Test that a search's query_id can be clicked before its row is written."""
+        log: List[Any] = []
+        pipeline = AnalyticsPipeline(session_factory=lambda: FakeSession(log), flush_interval=60)
+        await pipeline.start()
+        result_id, user_id = uuid4(), uuid4()
+        event = make_event(result_ids=[result_id], user_id=user_id)
+        pipeline.submit(event)
+        
+        assert pipeline.record_click(event.id, uuid4(), user_id) is False
+        assert pipeline.record_click(event.id, result_id, uuid4()) is False
+        assert pipeline.record_click(event.id, result_id, user_id) is True
+        await pipeline.stop()
+        
+        assert log[0][0]["clicked_result_id"] == result_id
+        # Written, so clicks are looked up in the database again
+        assert pipeline.record_click(event.id, result_id, user_id) is None
+    
+    async def test_click_during_the_flush_is_applied_after_it(self):
+        """Test that a click landing while the batch is written is not lost."""
+        log: List[Any] = []
+        result_id = uuid4()
+        event = make_event(result_ids=[result_id])
+        pipeline = AnalyticsPipeline(
+            session_factory=lambda: FakeSession(
+                log, on_commit=lambda: pipeline.record_click(event.id, result_id)
+            ),
+            flush_interval=60,
+        )
+        await pipeline.start()
+        pipeline.submit(event)
+        await pipeline.stop()
+        
+        assert log[0][0]["clicked_result_id"] is None
+        update = str(log[-2])
+        assert update.startswith("UPDATE search_queries SET clicked_result_id")
+        assert log[-1] == "commit"
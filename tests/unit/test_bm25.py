@@ -0,0 +1,34 @@
+"""Unit tests for BM25 ranking expressions."""
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models.search_index import SearchIndex
+from app.search.bm25 import bm25_score
+from app.search.query_parser import parse_query
+
+
+class TestBM25:
+    """Test the BM25 score expression."""
+
+    def test_positive_words_skip_negations(self):
+        """Positive words are scored once each; only a term's last word keeps its prefix."""
+        parsed = parse_query('"clean water" well OR pump -drought water')
+
+        assert list(parsed.positive_words) == [
+            ("clean", False),
+            ("water", False),
+            ("well", True),
+            ("pump", True),
+            ("water", True),
+        ]
+
+    def test_score_uses_corpus_statistics(self):
+        """Document frequencies and lengths come from the statistics tables."""
+        statement = select(SearchIndex.id, bm25_score(parse_query("water")))
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+
+        assert "search_term_stats" in sql
+        assert "search_corpus_stats" in sql
+        assert "unnest(search_indexes.search_vector)" in sql
+        assert "search_indexes.document_length" in sql
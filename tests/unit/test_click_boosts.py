@@ -0,0 +1,226 @@
+"""Unit tests for click-through ranking boosts."""
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.models.search_click_boost import SearchClickBoost
+from app.models.search_index import SearchIndex
+from app.schemas.search import SearchRequest, SearchResponse
+from app.search.click_boosts import click_boost, normalize_query
+from app.search.query_parser import parse_query
+from app.services import click_boost_aggregator as aggregator_module
+from app.services import search_service as search_service_module
+from app.services.click_boost_aggregator import _COLUMNS, ClickBoostAggregator
+from app.services.search_analytics_service import SearchAnalyticsService
+from app.services.search_service import SearchService
+
+NOW = datetime(2026, 10, 18)
+
+
+def compile_sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def empty_response() -> SearchResponse:
+    return SearchResponse(
+        query="water", results=[], total_count=0, page=1, page_size=20,
+        total_pages=0, execution_time=1.0
+    )
+
+
+class AggregationSession:
+    """Answers the rebuild's queries; ``checksums`` are returned before and after it."""
+
+    def __init__(self, checksums=(None, None), rebuilt_at=None):
+        self.checksums = list(checksums)
+        self.rebuilt_at = rebuilt_at
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    @asynccontextmanager
+    async def begin(self):
+        yield
+
+    async def scalar(self, statement):
+        sql = compile_sql(statement)
+        if "pg_try_advisory_xact_lock" in sql:
+            return True
+        if "FROM search_click_boost_rebuilds" in sql:
+            return self.rebuilt_at
+        return self.checksums.pop(0)
+
+    async def execute(self, statement):
+        self.statements.append(compile_sql(statement))
+        return SimpleNamespace(rowcount=2)
+
+
+class FakeCache:
+    def __init__(self):
+        self.invalidations = 0
+
+    async def invalidate_all(self):
+        self.invalidations += 1
+
+
+class ClickSession:
+    """Holds one recorded search for track_click."""
+
+    def __init__(self, query):
+        self.query = query
+        self.commits = 0
+
+    async def execute(self, statement):
+        return SimpleNamespace(scalar_one_or_none=lambda: self.query)
+
+    async def commit(self):
+        self.commits += 1
+
+
+class TestClickBoost:
+    """Test the rank multiplier looked up per ranked row."""
+
+    def test_normalize_query(self):
+        assert normalize_query("  Clean   WATER\twells ") == "clean water wells"
+
+    def test_query_and_document_boosts_by_primary_key(self):
+        statement = select(SearchIndex.id, click_boost("Clean  Water"))
+        sql = compile_sql(statement)
+
+        assert sql.count("FROM search_click_boosts") == 2
+        assert "search_click_boosts.id = search_indexes.id" in sql
+        assert "count(" not in sql
+        assert {"clean water", ""} <= set(statement.compile().params.values())
+
+    def test_empty_query_only_has_document_boost(self):
+        assert compile_sql(select(click_boost("   "))).count("FROM search_click_boosts") == 1
+
+    def test_sort_key_applies_boosts_when_enabled(self, monkeypatch):
+        service = SearchService(db=None, cache=None)
+        request = SearchRequest(query="water")
+
+        sort_key, _ = service._sort_key(request, parse_query("water"))
+        assert "search_click_boosts" not in compile_sql(select(sort_key))
+
+        monkeypatch.setattr(settings, "SEARCH_CLICK_BOOSTS_ENABLED", True)
+        sort_key, _ = service._sort_key(request, parse_query("water"))
+        assert "search_click_boosts" in compile_sql(select(sort_key))
+
+
+class TestClickBoostAggregator:
+    """Test the statements rebuilding search_click_boosts."""
+
+    def test_query_boosts_are_smoothed_and_capped(self):
+        aggregator = ClickBoostAggregator(min_clicks=3, prior_searches=10, max_boost=2.0)
+        statement = insert(SearchClickBoost).from_select(
+            _COLUMNS, aggregator.query_boosts(NOW, NOW)
+        )
+        sql = compile_sql(statement)
+
+        assert sql.startswith("WITH recent AS")
+        assert "least(" in sql
+        assert "HAVING count(*) >=" in sql
+        assert "JOIN search_indexes ON search_indexes.id = clicks.id" in sql
+
+    def test_document_boosts_are_relative_to_the_most_clicked(self):
+        statement = ClickBoostAggregator().document_boosts(NOW, NOW)
+        sql = compile_sql(insert(SearchClickBoost).from_select(_COLUMNS, statement))
+
+        assert "max(clicks.clicks) OVER ()" in sql
+        assert "ln(" in sql
+
+
+    async def test_unchanged_rebuild_keeps_the_cache(self, monkeypatch):
+        cache = FakeCache()
+        monkeypatch.setattr(aggregator_module, "get_search_cache", lambda: cache)
+        session = AggregationSession(checksums=["abc", "abc"])
+
+        assert await ClickBoostAggregator(session_factory=lambda: session).aggregate()
+
+        assert cache.invalidations == 0
+        assert session.statements[-1].startswith("INSERT INTO search_click_boost_rebuilds")
+
+    async def test_changed_rebuild_invalidates_the_cache(self, monkeypatch):
+        cache = FakeCache()
+        monkeypatch.setattr(aggregator_module, "get_search_cache", lambda: cache)
+        session = AggregationSession(checksums=[None, "abc"])
+
+        assert await ClickBoostAggregator(session_factory=lambda: session).aggregate()
+
+        assert cache.invalidations == 1
+
+    async def test_recent_rebuild_without_boosts_is_fresh(self):
+        session = AggregationSession(rebuilt_at=datetime.utcnow() - timedelta(minutes=5))
+
+        assert not await ClickBoostAggregator(session_factory=lambda: session).aggregate()
+        assert session.statements == []
+
+
+class TestTrackClick:
+    """Test that clicks are only recorded on results their search returned."""
+
+    async def test_click_on_a_returned_result(self):
+        result_id = uuid4()
+        query = SimpleNamespace(result_ids=[result_id], user_id=None, clicked_result_id=None)
+        session = ClickSession(query)
+
+        assert await SearchAnalyticsService(session).track_click(uuid4(), result_id)
+        assert query.clicked_result_id == result_id
+        assert session.commits == 1
+
+    async def test_click_on_another_result_is_rejected(self):
+        query = SimpleNamespace(result_ids=[uuid4()], user_id=None, clicked_result_id=None)
+        session = ClickSession(query)
+
+        assert not await SearchAnalyticsService(session).track_click(uuid4(), uuid4())
+        assert query.clicked_result_id is None
+        assert session.commits == 0
+
+    async def test_click_on_another_users_search_is_rejected(self):
+        result_id = uuid4()
+        query = SimpleNamespace(result_ids=[result_id], user_id=uuid4(), clicked_result_id=None)
+        analytics = SearchAnalyticsService(ClickSession(query))
+
+        assert not await analytics.track_click(uuid4(), result_id)
+        assert not await analytics.track_click(uuid4(), result_id, uuid4())
+        assert await analytics.track_click(uuid4(), result_id, query.user_id)
+
+    async def test_unknown_search(self):
+        assert not await SearchAnalyticsService(ClickSession(None)).track_click(uuid4(), uuid4())
+
+
+class TestQueryId:
+    """Test that responses carry the id their clicks are reported with."""
+
+    async def test_pipeline_event_id(self, monkeypatch):
+        submitted = []
+        pipeline = SimpleNamespace(
+            running=True, submit=lambda event: submitted.append(event) or True
+        )
+        monkeypatch.setattr(search_service_module, "analytics_pipeline", pipeline)
+        response = empty_response()
+
+        service = SearchService(db=None, cache=None)
+        await service._track_search(SearchRequest(query="water"), response, None)
+
+        assert response.query_id == submitted[0].id
+
+    async def test_shed_event_has_no_id(self, monkeypatch):
+        pipeline = SimpleNamespace(running=True, submit=lambda event: False)
+        monkeypatch.setattr(search_service_module, "analytics_pipeline", pipeline)
+        response = empty_response()
+
+        service = SearchService(db=None, cache=None)
+        await service._track_search(SearchRequest(query="water"), response, None)
+
+        assert response.query_id is None
@@ -0,0 +1,41 @@
+"""Unit tests for incremental BM25 corpus statistics."""
+
+from sqlalchemy.dialects import postgresql
+
+from app.models.search_index import SearchIndex
+from app.services.corpus_stats_service import CorpusStatsService
+
+
+class FakeDB:
+    """Keeps the executed statements as Postgres SQL."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+
+
+class TestCorpusStats:
+    """Test the statements keeping the statistics in step with writes."""
+
+    async def test_added_lexemes_are_upserted_in_lexeme_order(self):
+        db = FakeDB()
+
+        await CorpusStatsService(db).add_documents(SearchIndex.status == "active")
+
+        terms, totals = db.statements
+        assert "ORDER BY lexemes.lexeme ON CONFLICT (lexeme)" in terms
+        assert "pg_backend_pid()" in totals
+
+    async def test_removed_lexemes_are_locked_in_order_and_dropped_at_zero(self):
+        db = FakeDB()
+
+        await CorpusStatsService(db).remove_documents(SearchIndex.status == "active")
+
+        lock, decrement, drop, totals = db.statements
+        assert lock.endswith("ORDER BY search_term_stats.lexeme FOR UPDATE")
+        assert decrement.startswith("UPDATE search_term_stats")
+        assert drop.startswith("DELETE FROM search_term_stats")
+        assert "search_term_stats.document_count <=" in drop
+        assert totals.startswith("INSERT INTO search_corpus_stats")
@@ -0,0 +1,87 @@
+"""Unit tests for keyset pagination cursors."""
+
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from app.search.cursor import (
+    InvalidCursorError,
+    check_cursor,
+    decode_cursor,
+    encode_cursor,
+)
+from app.schemas.search import SearchRequest
+from app.services.search_service import cursor_scope
+
+
+class TestSearchCursor:
+    """Test cursor encoding and decoding."""
+    
+    def test_round_trip_rank(self):
+        """Test that a float rank survives encoding exactly."""
+        last_id = uuid4()
+        cursor = decode_cursor(encode_cursor("relevance", "desc", 0.0607927, last_id))
+        
+        assert cursor.sort_by == "relevance"
+        assert cursor.sort_order == "desc"
+        assert cursor.key == 0.0607927
+        assert cursor.last_id == last_id
+    
+    def test_round_trip_datetime(self):
+        """Test that datetime keys are restored as datetimes."""
+        published_at = datetime(2024, 5, 1, 12, 30, 15, 250)
+        cursor = decode_cursor(encode_cursor("date", "asc", published_at, uuid4()))
+        
+        assert cursor.key == published_at
+    
+    def test_round_trip_null_key(self):
+        """Test that NULL sort keys are preserved."""
+        cursor = decode_cursor(encode_cursor("date", "desc", None, uuid4()))
+        
+        assert cursor.key is None
+    
+    def test_decode_garbage(self):
+        """Test that malformed cursors are rejected."""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor("not-a-cursor")
+    
+    def test_sort_mismatch(self):
+        """Test that a cursor cannot be reused with a different sort."""
+        cursor = decode_cursor(encode_cursor("title", "asc", "Alpha", uuid4()))
+        
+        check_cursor(cursor, "title", "asc")
+        with pytest.raises(InvalidCursorError):
+            check_cursor(cursor, "date", "asc")
+    
+    def test_round_trip_reference_time(self):
+        """Test that the decay reference time is kept only when given."""
+        reference_time = datetime(2026, 10, 18, 9, 45, 3, 120)
+        cursor = decode_cursor(encode_cursor("relevance", "desc", 0.25, uuid4(), reference_time))
+        
+        assert cursor.reference_time == reference_time
+        without_time = decode_cursor(encode_cursor("relevance", "desc", 0.25, uuid4()))
+        assert without_time.reference_time is None
+    
+    def test_scope_mismatch(self):
+        """Test that a cursor cannot be reused with a different query, filters or ranking."""
+        request = SearchRequest(query="water", status="active", sort_by="title", sort_order="asc")
+        scope = cursor_scope(request)
+        cursor = decode_cursor(encode_cursor("title", "asc", "Alpha", uuid4(), scope=scope))
+        
+        # Paging and presentation fields may change between pages
+        next_page = request.model_copy(update={"page_size": 50, "highlight": False})
+        check_cursor(cursor, "title", "asc", cursor_scope(next_page))
+        for changed in (
+            {"query": "drought"},
+            {"status": "archived"},
+            {"metadata_filters": {"region": "north"}},
+            {"ranking": "bm25"},
+        ):
+            other = request.model_copy(update=changed)
+            with pytest.raises(InvalidCursorError):
+                check_cursor(cursor, "title", "asc", cursor_scope(other))
+        # Cursors issued without a scope are not accepted for one
+        unscoped = decode_cursor(encode_cursor("title", "asc", "Alpha", uuid4()))
+        with pytest.raises(InvalidCursorError):
+            check_cursor(unscoped, "title", "asc", scope)
@@ -0,0 +1,117 @@
+"""Unit tests for single-statement facet aggregation."""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.models.search_index import DocumentType, SearchIndex
+from app.schemas.search import FacetRequest
+from app.services.facet_service import FacetService
+
+
+def make_row(**values: Any) -> SimpleNamespace:
+    return SimpleNamespace(_mapping=values)
+
+
+class FakeDB:
+    """Returns canned rows and keeps the executed statements."""
+
+    def __init__(self, rows: List[SimpleNamespace]):
+        self.rows = rows
+        self.statements: List[Any] = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return iter(self.rows)
+
+    def in_transaction(self):
+        return False
+
+    @asynccontextmanager
+    async def begin(self):
+        yield self
+
+    async def rollback(self):
+        self.statements.append("ROLLBACK")
+
+
+def grouped(field: str, value: Any, count: int, fields: List[str]) -> SimpleNamespace:
+    values: Dict[str, Any] = {name: None for name in fields}
+    values.update({f"grouping_{name}": 1 for name in fields})
+    values[field] = value
+    values[f"grouping_{field}"] = 0
+    values["count"] = count
+    return make_row(**values)
+
+
+class TestAggregateFacets:
+    """Test the GROUPING SETS facet aggregation."""
+
+    async def test_single_statement_with_grouping_sets(self):
+        """All facets and the total come from one statement."""
+        db = FakeDB([])
+        await FacetService(db).aggregate_facets(
+            select(SearchIndex.id), ["document_type", "language"]
+        )
+
+        assert len(db.statements) == 1
+        sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+        assert "GROUPING SETS((matched.document_type), (matched.language), ())" in sql
+
+    async def test_rows_are_split_per_grouping_set(self):
+        """The empty grouping set is the total; NULL values are skipped."""
+        fields = ["document_type", "author_name"]
+        total = make_row(
+            document_type=None, author_name=None,
+            grouping_document_type=1, grouping_author_name=1, count=7
+        )
+        db = FakeDB([
+            grouped("document_type", DocumentType.PROJECT, 2, fields),
+            grouped("document_type", DocumentType.PARTNER, 5, fields),
+            grouped("author_name", "Ana", 3, fields),
+            grouped("author_name", None, 4, fields),
+            total,
+        ])
+
+        total_results, facets = await FacetService(db).aggregate_facets(
+            select(SearchIndex.id), fields + ["unknown"]
+        )
+
+        assert total_results == 7
+        assert [option.value for option in facets["document_type"]] == ["partner", "project"]
+        assert facets["document_type"][0].label == "Partner"
+        assert [(option.value, option.count) for option in facets["author_name"]] == [("Ana", 3)]
+        assert "unknown" not in facets
+
+    async def test_without_known_fields_only_counts_matches(self):
+        """The matched rows are still counted when no facet field is known."""
+        db = FakeDB([make_row(count=3)])
+
+        total_results, facets = await FacetService(db).aggregate_facets(
+            select(SearchIndex.id).where(SearchIndex.status == "published"), ["unknown"]
+        )
+
+        sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+        assert "FROM (SELECT search_indexes.id" in sql
+        assert "WHERE search_indexes.status" in sql
+        assert total_results == 3
+        assert facets == {}
+
+
+class TestGetFacets:
+    """Test the facets endpoint's aggregation."""
+
+    async def test_aggregation_runs_under_the_facet_timeout(self):
+        """The timeout is set for the aggregation only and rolled back after it."""
+        db = FakeDB([make_row(count=3)])
+
+        response = await FacetService(db).get_facets(FacetRequest(query="water", facet_fields=[]))
+
+        timeout_ms = int(settings.SEARCH_FACET_TIMEOUT_SECONDS * 1000)
+        assert str(db.statements[0]) == f"SET LOCAL statement_timeout = {timeout_ms}"
+        assert db.statements[-1] == "ROLLBACK"
+        assert response.total_results == 3
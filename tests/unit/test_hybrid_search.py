@@ -0,0 +1,340 @@
+"""Unit tests for embeddings, the IVF index, rank fusion and hybrid search."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from uuid import UUID, uuid4
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.schemas.search import SearchRequest
+from app.search.ann import IVFIndex
+from app.search.embeddings import HashingEmbedder, vector_from_bytes, vector_to_bytes
+from app.search.fusion import reciprocal_rank_fusion
+from app.services import search_service as search_service_module
+from app.services.search_service import SearchService
+from app.services.semantic_index import SemanticIndex
+
+
+def clustered_vectors(
+    count: int,
+    dimensions: int = 32,
+    clusters: int = 10,
+    seed: int = 1
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimensions))
+    noise = 0.3 * rng.normal(size=(count, dimensions))
+    vectors = centers[rng.integers(clusters, size=count)] + noise
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+class TestHashingEmbedder:
+    """Test that embeddings are deterministic unit vectors that reflect shared words."""
+    
+    def test_deterministic_and_normalized(self):
+        embedder = HashingEmbedder(64)
+        vector = embedder.embed("Clean water for rural schools")
+        
+        assert vector.dtype == np.float32
+        assert np.isclose(np.linalg.norm(vector), 1.0)
+        assert np.array_equal(vector, HashingEmbedder(64).embed("clean water for rural schools"))
+    
+    def test_related_texts_are_closer(self):
+        embedder = HashingEmbedder(256)
+        query = embedder.embed("water wells")
+        
+        related = embedder.embed("Drilling a water well for the village")
+        unrelated = embedder.embed("Youth football tournament")
+        
+        assert query @ related > query @ unrelated
+    
+    def test_bytes_round_trip(self):
+        vector = HashingEmbedder(16).embed("school")
+        
+        assert np.array_equal(vector_from_bytes(vector_to_bytes(vector)), vector)
+
+
+class TestIVFIndex:
+    """Test that the IVF index finds the nearest neighbours by scanning a few lists."""
+    
+    def test_recall_against_exact_search(self):
+        vectors = clustered_vectors(2000)
+        ids = [uuid4() for _ in vectors]
+        index = IVFIndex.build(ids, vectors, n_lists=20)
+        
+        hits = 0
+        for query in vectors[:50]:
+            exact = {ids[position] for position in np.argsort(-(vectors @ query))[:10]}
+            found = {document_id for document_id, _ in index.search(query, 10, n_probe=4)}
+            hits += len(exact & found)
+        
+        assert hits / 500 > 0.9
+    
+    def test_results_ordered_and_excluded(self):
+        vectors = clustered_vectors(200)
+        ids = [uuid4() for _ in vectors]
+        index = IVFIndex.build(ids, vectors, n_lists=5)
+        
+        results = index.search(vectors[0], 5, n_probe=5, exclude={ids[0]})
+        
+        scores = [score for _, score in results]
+        assert scores == sorted(scores, reverse=True)
+        assert ids[0] not in [document_id for document_id, _ in results]
+        assert len(results) == 5
+    
+    def test_save_and_load_memory_mapped(self, tmp_path):
+        vectors = clustered_vectors(100)
+        ids = [uuid4() for _ in vectors]
+        index = IVFIndex.build(ids, vectors, n_lists=4)
+        
+        index.save(tmp_path / "ivf")
+        loaded = IVFIndex.load(tmp_path / "ivf", mmap=True)
+        
+        assert isinstance(loaded.vectors, np.memmap)
+        assert loaded.search(vectors[3], 3, n_probe=4) == index.search(vectors[3], 3, n_probe=4)
+    
+    def test_empty(self):
+        index = IVFIndex.build([], np.zeros((0, 8), dtype=np.float32))
+        
+        assert index.search(np.ones(8, dtype=np.float32), 5) == []
+
+
+class TestReciprocalRankFusion:
+    """Test that items ranked well by several retrievers come first."""
+    
+    def test_fusion(self):
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d", "a"]], k=60)
+        
+        assert [item for item, _ in fused] == ["a", "c", "b", "d"]
+        assert fused[0][1] == pytest.approx(1 / 61 + 1 / 63)
+
+
+class TestSemanticIndexWrites:
+    """Test that writes between rebuilds are searched and supersede built vectors."""
+    
+    def make_index(self):
+        index = SemanticIndex(HashingEmbedder(64))
+        index._started = True
+        return index
+    
+    def test_added_vectors_are_searched(self):
+        index = self.make_index()
+        document_id = uuid4()
+        index.apply(document_id, index.embed_document("Water well", "Drilling a well"))
+        
+        assert index.search("water well", 5)[0][0] == document_id
+    
+    def test_removed_vectors_are_skipped(self):
+        index = self.make_index()
+        document_id = uuid4()
+        vectors = np.stack([index.embed_document("Water well", "")])
+        index.ann = IVFIndex.build([document_id], vectors)
+        
+        index.remove(document_id)
+        
+        assert index.search("water well", 5) == []
+
+
+class BuildSession:
+    """Holds unembedded documents and stored embeddings, for backfills and builds."""
+    
+    def __init__(self, documents=(), embeddings=(), locked=True):
+        self.documents = list(documents)
+        self.embeddings = list(embeddings)
+        self.locked = locked
+        self.opened = 0
+    
+    async def __aenter__(self):
+        self.opened += 1
+        return self
+    
+    async def __aexit__(self, *args):
+        return False
+    
+    @asynccontextmanager
+    async def begin(self):
+        yield
+    
+    async def scalar(self, statement):
+        return self.locked
+    
+    async def execute(self, statement):
+        if statement.is_insert:
+            # Multi-row VALUES binds id_m0, vector_m0, id_m1, ...
+            params = statement.compile().params
+            rows = range(sum(name.startswith("id_m") for name in params))
+            stored = [(params[f"id_m{i}"], vector_from_bytes(params[f"vector_m{i}"])) for i in rows]
+            self.embeddings.extend(stored)
+            stored_ids = {document_id for document_id, _ in stored}
+            self.documents = [row for row in self.documents if row.id not in stored_ids]
+            return None
+        return FakeResult(self.documents[:2])
+    
+    async def stream(self, statement):
+        rows = [
+            SimpleNamespace(id=document_id, vector=vector_to_bytes(vector))
+            for document_id, vector in self.embeddings
+        ]
+        
+        async def partitions():
+            yield rows
+        return SimpleNamespace(partitions=partitions)
+
+
+def document(title: str):
+    return SimpleNamespace(id=uuid4(), title=title, content="")
+
+
+class TestSemanticIndexBuilds:
+    """Test backfills and builds shared through the saved index."""
+    
+    async def test_backfill_in_batches(self):
+        session = BuildSession([document("Water well"), document("School"), document("Clinic")])
+        index = SemanticIndex(HashingEmbedder(64), batch_size=2)
+        
+        assert await index.backfill(session) == 3
+        
+        assert session.documents == []
+        assert len(session.embeddings) == 3
+        assert np.array_equal(session.embeddings[0][1], index.embed_document("Water well", ""))
+    
+    async def test_backfill_left_to_the_worker_holding_the_lock(self):
+        session = BuildSession([document("Water well")], locked=False)
+        
+        assert await SemanticIndex(HashingEmbedder(64)).backfill(session) == 0
+        assert session.embeddings == []
+    
+    async def test_workers_share_the_saved_build(self, tmp_path):
+        (tmp_path / "ivf-1-99999").mkdir()  # Left by an exited worker
+        embedder = HashingEmbedder(64)
+        session = BuildSession(embeddings=[(uuid4(), embedder.embed("water well"))])
+        builder = SemanticIndex(embedder, session_factory=lambda: session, path=tmp_path)
+        await builder.load()
+        
+        other_session = BuildSession()
+        other = SemanticIndex(embedder, session_factory=lambda: other_session, path=tmp_path)
+        await other.load()
+        
+        assert other_session.opened == 0
+        assert other.ready
+        assert isinstance(other.ann.vectors, np.memmap)
+        assert other._saved == builder._saved
+        assert [path.name for path in tmp_path.glob("ivf-*")] == [builder._saved.name]
+    
+    async def test_mapped_build_takes_over_earlier_writes(self, tmp_path):
+        embedder = HashingEmbedder(64)
+        builder = SemanticIndex(embedder, session_factory=BuildSession, path=tmp_path)
+        other = SemanticIndex(embedder, session_factory=BuildSession, path=tmp_path)
+        other._started = True
+        earlier, later = uuid4(), uuid4()
+        
+        other.apply(earlier, embedder.embed("water"))
+        await asyncio.sleep(0.01)
+        await builder.load()
+        other.apply(later, embedder.embed("well"))
+        await other.load()
+        
+        assert set(other._added) == {later}
+    
+    async def test_forced_load_builds(self, tmp_path):
+        builder = SemanticIndex(HashingEmbedder(64), session_factory=BuildSession, path=tmp_path)
+        await builder.load()
+        session = BuildSession()
+        other = SemanticIndex(HashingEmbedder(64), session_factory=lambda: session, path=tmp_path)
+        
+        await other.load(force=True)
+        
+        assert session.opened == 1
+        assert [path.name for path in tmp_path.glob("ivf-*")] == [other._saved.name]
+
+
+class FakeTransaction:
+    async def rollback(self):
+        pass
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+    
+    def all(self):
+        return self.rows
+    
+    def scalars(self):
+        return self
+
+
+class FakeSession:
+    """Answers the lexical candidates, the vector candidate filter and the page."""
+    
+    def __init__(self, lexical_ids, allowed_ids):
+        self.lexical_ids = lexical_ids
+        self.allowed_ids = allowed_ids
+    
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        if sql.startswith("SET LOCAL"):
+            return FakeResult([])
+        if "CASE search_indexes.id" in sql:
+            # CASE id WHEN :id THEN :score ... binds ids and scores in turn
+            values = [
+                value for value in statement.compile().params.values()
+                if isinstance(value, (UUID, float))
+            ]
+            scores = dict(zip(values[::2], values[1::2]))
+            return FakeResult([
+                SimpleNamespace(_mapping={
+                    "sort_key": score, "id": document_id, "document_id": uuid4(),
+                    "document_type": "project", "title": str(document_id), "language": "en",
+                    "metadata": {}, "author_name": None, "published_at": None, "content_prefix": "",
+                })
+                for document_id, score in sorted(scores.items(), key=lambda item: -item[1])
+            ])
+        if "ts_rank" in sql:
+            return FakeResult([SimpleNamespace(id=document_id) for document_id in self.lexical_ids])
+        return FakeResult(self.allowed_ids)
+    
+    def in_transaction(self):
+        return False
+    
+    @asynccontextmanager
+    async def begin(self):
+        yield FakeTransaction()
+
+
+class TestHybridSearch:
+    """Test that hybrid searches fuse lexical and filtered vector candidates."""
+    
+    async def test_fuses_candidates(self, monkeypatch):
+        lexical = [uuid4(), uuid4()]
+        semantic = SemanticIndex(HashingEmbedder(64))
+        semantic._started = True
+        semantic.ready = True
+        vector_only, filtered_out = uuid4(), uuid4()
+        titles = (
+            (lexical[1], "water well"), (vector_only, "water wells"), (filtered_out, "water well")
+        )
+        for document_id, title in titles:
+            semantic.apply(document_id, semantic.embed_document(title, ""))
+        monkeypatch.setattr(search_service_module, "semantic_index", semantic)
+        
+        service = SearchService(FakeSession(lexical, [lexical[1], vector_only]), cache=None)
+        request = SearchRequest(query="water well", mode="hybrid")
+        response = await service._cached_search(request, None, 0.0)
+        
+        ids = [result.id for result in response.results]
+        assert ids[0] == lexical[1]  # Ranked by both retrievers
+        assert set(ids) == {*lexical, vector_only}
+        assert response.total_count == 3
+        assert response.next_cursor is None
+    
+    async def test_lexical_when_index_not_ready(self, monkeypatch):
+        monkeypatch.setattr(settings, "SEARCH_MODE", "hybrid")
+        semantic = SemanticIndex(HashingEmbedder(64))
+        monkeypatch.setattr(search_service_module, "semantic_index", semantic)
+        
+        service = SearchService(FakeSession([], []), cache=None)
+        assert not service._is_hybrid(SearchRequest(query="water"))
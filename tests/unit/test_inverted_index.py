@@ -0,0 +1,246 @@
+"""Unit tests for the in-process BM25 index and memory search backend."""
+
+from datetime import datetime
+from uuid import uuid4
+
+from app.core.config import settings
+from app.models.search_index import DocumentType
+from app.schemas.search import SearchRequest
+from app.search.cursor import SearchCursor
+from app.search.inverted_index import IndexedDocument, InvertedIndex
+from app.search.query_parser import parse_query
+from app.services.memory_search_backend import MemorySearchBackend
+
+
+def make_document(title: str, **fields) -> IndexedDocument:
+    values = dict(
+        id=uuid4(),
+        document_id=uuid4(),
+        document_type=DocumentType.PROJECT,
+        title=title,
+        content_prefix="",
+        language="en",
+        metadata={},
+        author_id=None,
+        author_name=None,
+        status=None,
+        published_at=None,
+        indexed_at=datetime(2026, 1, 1),
+    )
+    values.update(fields)
+    return IndexedDocument(**values)
+
+
+def build_index(*documents):
+    index = InvertedIndex()
+    added = []
+    for title, content, fields in documents:
+        document = make_document(title, **fields)
+        index.add(document, content)
+        added.append(document)
+    return index, added
+
+
+def matched_titles(index: InvertedIndex, query: str):
+    return sorted(index.document(slot).title for slot in index.match(parse_query(query)))
+
+
+class TestInvertedIndex:
+    """Test matching and scoring."""
+
+    def test_boolean_semantics(self):
+        """AND, OR, negation and prefixes follow the tsquery compiled by the parser."""
+        index, _ = build_index(
+            ("Water well", "A new well for the rural school", {}),
+            ("Clinic", "Clean water for the clinic", {}),
+            ("School garden", "Vegetables for schools", {}),
+        )
+
+        assert matched_titles(index, "water") == ["Clinic", "Water well"]
+        assert matched_titles(index, "water -clinic") == ["Water well"]
+        assert matched_titles(index, "well OR garden") == ["School garden", "Water well"]
+        assert matched_titles(index, "schoo") == ["School garden", "Water well"]
+        assert matched_titles(index, "the") == []
+
+    def test_phrases_need_adjacent_words(self):
+        """Phrases match adjacent words, stopwords keep their position, title and content apart."""
+        index, _ = build_index(
+            ("Clean water", "Wells for villages", {}),
+            ("Water", "Clean the water tanks", {}),
+            ("Report", "water is clean", {}),
+        )
+
+        assert matched_titles(index, '"clean water"') == ["Clean water"]
+        assert matched_titles(index, '"clean the water"') == ["Water"]
+        assert matched_titles(index, '"water wells"') == []
+
+    def test_bm25_prefers_title_and_frequency(self):
+        """Title words weigh more than content words."""
+        index, documents = build_index(
+            ("Water project", "Digging a well", {}),
+            ("Project update", "Water arrived in the village", {}),
+        )
+
+        scores = index.match(parse_query("water"))
+        by_title = {index.document(slot).title: score for slot, score in scores.items()}
+        assert by_title["Water project"] > by_title["Project update"]
+
+    def test_remove_and_replace(self):
+        """Re-adding replaces a document; removals survive compaction."""
+        index, documents = build_index(
+            ("Water well", "", {}),
+            ("Clinic", "", {}),
+            ("Garden", "", {}),
+        )
+
+        replacement = make_document("Solar well", document_id=documents[0].document_id)
+        index.add(replacement, "")
+        assert matched_titles(index, "well") == ["Solar well"]
+
+        index.remove(documents[1].document_id)
+        index.remove(documents[2].document_id)
+        assert len(index) == 1
+        assert matched_titles(index, "well") == ["Solar well"]
+        assert index.stats()["slots"] == 1
+
+
+class TestMemorySearchBackend:
+    """Test filtering, sorting and paging over the index."""
+
+    def make_backend(self, documents):
+        backend = MemorySearchBackend(document_types=["partner", "project"])
+        for document in documents:
+            backend.index.add(document, document.title)
+        backend.ready = True
+        return backend
+
+    def test_can_serve_only_indexed_types(self):
+        backend = self.make_backend([])
+
+        def request(**fields):
+            return SearchRequest(query="x", sort_by="date", **fields)
+
+        assert backend.can_serve(request(document_types=["project"]))
+        assert not backend.can_serve(request())
+        assert not backend.can_serve(request(document_types=["article"]))
+
+    def test_can_serve_only_sorts_ordered_like_sql(self, monkeypatch):
+        backend = self.make_backend([])
+
+        def request(**fields):
+            return SearchRequest(query="x", document_types=["project"], **fields)
+
+        assert not backend.can_serve(request())
+        assert not backend.can_serve(request(ranking="bm25"))
+        assert not backend.can_serve(request(sort_by="title"))
+        assert backend.can_serve(request(sort_by="date"))
+        assert backend.can_serve(request(sort_by="indexed_at"))
+
+        monkeypatch.setattr(settings, "SEARCH_RANKING", "bm25")
+        assert not backend.can_serve(request())
+
+    def test_filters_match_sql_semantics(self):
+        """Filters behave like SearchService._apply_filters."""
+        backend = self.make_backend([
+            make_document("Water A", status="active", metadata={"country": "KE", "budget": 5}),
+            make_document("Water B", status="closed", published_at=datetime(2025, 6, 1)),
+            make_document("Water C", language="es"),
+        ])
+
+        def titles(**filters):
+            request = SearchRequest(query="water", document_types=["project"], **filters)
+            rows, _ = backend.search(request, parse_query(request.query))
+            return sorted(row["title"] for row in rows)
+
+        assert titles(status="active") == ["Water A"]
+        assert titles(language="es") == ["Water C"]
+        assert titles(metadata_filters={"country": "KE"}) == ["Water A"]
+        assert titles(metadata_filters={"budget": 5}) == ["Water A"]
+        assert titles(date_from="2025-01-01") == ["Water B"]
+        assert titles(date_from="not a date") == ["Water A", "Water B", "Water C"]
+
+    def test_sorting_paging_and_cursor(self):
+        """Pages come in sort order with NULLs last, and a cursor continues after the last row."""
+        backend = self.make_backend([
+            make_document("Water 1", published_at=datetime(2025, 1, 1)),
+            make_document("Water 2", published_at=None),
+            make_document("Water 3", published_at=datetime(2025, 3, 1)),
+        ])
+        request = SearchRequest(
+            query="water", document_types=["project"], sort_by="date", page_size=2
+        )
+
+        rows, total = backend.search(request, parse_query(request.query))
+        assert total == 3
+        assert [row["title"] for row in rows] == ["Water 3", "Water 1"]
+
+        request.page = 2
+        rows, _ = backend.search(request, parse_query(request.query))
+        assert [row["title"] for row in rows] == ["Water 2"]
+
+        request.page = 1
+        first_page, _ = backend.search(request, parse_query(request.query))
+        cursor = SearchCursor("date", "desc", first_page[-1]["sort_key"], first_page[-1]["id"])
+        rows, _ = backend.search(request, parse_query(request.query), cursor)
+        assert [row["title"] for row in rows] == ["Water 2"]
+
+    def test_served_sorts_page_like_sql(self):
+        """On a shared corpus, pages follow the SQL ORDER BY, by offset and by cursor alike."""
+        corpus = [
+            make_document(f"Water {i}", published_at=published_at, indexed_at=indexed_at)
+            for i, (published_at, indexed_at) in enumerate([
+                (datetime(2025, 1, 1), datetime(2026, 1, 3)),
+                (None, datetime(2026, 1, 1)),
+                (datetime(2025, 3, 1), datetime(2026, 1, 1)),
+                (datetime(2025, 1, 1), datetime(2026, 1, 2)),
+                (None, datetime(2026, 1, 5)),
+            ])
+        ]
+        corpus.append(make_document("Drought", published_at=datetime(2025, 2, 1)))
+        backend = self.make_backend(corpus)
+        matched = [document for document in corpus if document.title.startswith("Water")]
+
+        def sql_order(key, descending):
+            # ORDER BY key (NULLS LAST), id in the same direction
+            present = sorted(
+                (document for document in matched if key(document) is not None),
+                key=lambda document: (key(document), document.id),
+                reverse=descending
+            )
+            missing = sorted(
+                (document for document in matched if key(document) is None),
+                key=lambda document: document.id,
+                reverse=descending
+            )
+            return [document.id for document in present + missing]
+
+        cases = [
+            ("date", "desc", lambda document: document.published_at),
+            ("date", "asc", lambda document: document.published_at),
+            ("indexed_at", "desc", lambda document: document.indexed_at),
+        ]
+        for sort_by, sort_order, key in cases:
+            request = SearchRequest(
+                query="water", document_types=["project"], sort_by=sort_by,
+                sort_order=sort_order, page_size=2
+            )
+            assert backend.can_serve(request)
+            expected = sql_order(key, sort_order == "desc")
+            parsed_query = parse_query(request.query)
+
+            by_offset = []
+            for page in (1, 2, 3):
+                paged = request.model_copy(update={"page": page})
+                rows, total = backend.search(paged, parsed_query)
+                by_offset.extend(row["id"] for row in rows)
+
+            by_cursor, cursor = [], None
+            while True:
+                rows, _ = backend.search(request, parsed_query, cursor)
+                if not rows:
+                    break
+                by_cursor.extend(row["id"] for row in rows)
+                cursor = SearchCursor(sort_by, sort_order, rows[-1]["sort_key"], rows[-1]["id"])
+
+            assert total == len(matched)
+            assert by_offset == by_cursor == expected
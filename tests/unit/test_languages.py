@@ -0,0 +1,66 @@
+"""Unit tests for language filters and per-language matching."""
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models.search_index import SearchIndex
+from app.schemas.search import SearchRequest
+from app.search.languages import LANGUAGE_REGCONFIGS
+from app.search.query_parser import parse_query
+from app.services.search_service import SearchService
+
+
+def filtered_sql(language: str) -> str:
+    service = SearchService(None, cache=None)
+    query = service._apply_filters(
+        select(SearchIndex.id), SearchRequest(query="agua", language=language)
+    )
+    return str(query.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"render_postcompile": True}
+    ))
+
+
+class TestLanguageFilter:
+    """Test that language filters can use the per-language partial indexes."""
+
+    def test_known_languages_are_inlined(self):
+        assert "search_indexes.language = 'es'" in filtered_sql("es")
+
+    def test_unknown_languages_are_bound(self):
+        assert "search_indexes.language = %(language_1)s" in filtered_sql("xx")
+
+    def test_every_language_has_a_matching_partial_index(self):
+        predicates = {
+            index.name: str(index.dialect_options["postgresql"]["where"])
+            for index in SearchIndex.__table__.indexes
+            if index.name.startswith("idx_search_vector_")
+        }
+
+        assert predicates == {
+            f"idx_search_vector_{language}": f"language = '{language}'"
+            for language in LANGUAGE_REGCONFIGS
+        }
+
+
+class TestMatchAllLanguages:
+    """Test that searches match every language's stems only when asked to."""
+
+    def test_unfiltered_queries_use_the_default_configuration(self):
+        parsed = parse_query("agua potable")
+        compiled = select(parsed.to_tsquery()).compile(dialect=postgresql.dialect())
+
+        assert parsed.regconfig == "english"
+        assert parsed.other_regconfigs == ()
+        assert str(compiled).count("to_tsquery(") == 1
+
+    def test_all_languages_match_every_configuration(self):
+        parsed = parse_query("agua potable", all_languages=True)
+        compiled = select(parsed.to_tsquery()).compile(dialect=postgresql.dialect())
+
+        assert parsed.regconfig == "english"
+        assert set(parsed.other_regconfigs) == {"spanish", "french", "portuguese"}
+        assert str(compiled).count("to_tsquery(") == 4
+        assert {"english", "spanish", "french", "portuguese"} <= set(compiled.params.values())
+
+    def test_a_language_restricts_to_one(self):
+        assert parse_query("agua", "es", all_languages=True).other_regconfigs == ()
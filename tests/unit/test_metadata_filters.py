@@ -0,0 +1,67 @@
+"""Unit tests for JSONB metadata filters."""
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models.search_index import SearchIndex
+from app.schemas.search import FacetRequest, SearchRequest
+from app.search.metadata_filters import matches_metadata, metadata_filter_clauses
+
+
+def compile_filters(filters):
+    statement = select(SearchIndex.id).where(
+        *metadata_filter_clauses(SearchIndex.__table__.c.metadata, filters)
+    )
+    return statement.compile(dialect=postgresql.dialect())
+
+
+class TestMetadataFilters:
+    """Test SQL compilation and the Python equivalent."""
+    
+    def test_equality_filters_share_one_containment(self):
+        compiled = compile_filters({"country": "KE", "tags": ["water"], "budget": 5})
+        sql = str(compiled)
+        
+        assert sql.count("@>") == 1
+        assert "->>" not in sql
+        assert compiled.params["metadata_1"] == {"country": "KE", "tags": ["water"], "budget": 5}
+    
+    def test_range_and_in_filters(self):
+        sql = str(compile_filters({
+            "budget": {"gte": 1000, "lt": 5000},
+            "country": {"in": ["KE", "UG"]},
+        }))
+        
+        assert "jsonb_typeof(search_indexes.metadata -> __[POSTCOMPILE_param_1])" in sql
+        assert "(search_indexes.metadata -> __[POSTCOMPILE_param_1]) >= " in sql
+        assert sql.count("@>") == 2
+    
+    def test_python_matching_follows_jsonb_semantics(self):
+        metadata = {"country": "KE", "tags": ["water", "school"], "budget": 2500, "active": True}
+        
+        assert matches_metadata(metadata, {"country": "KE", "tags": ["school"]})
+        assert not matches_metadata(metadata, {"budget": "2500"})
+        assert not matches_metadata(metadata, {"active": 1})
+        assert not matches_metadata(metadata, {"tags": "water"})
+        assert matches_metadata(metadata, {"budget": {"gte": 1000, "lt": 5000}})
+        assert not matches_metadata(metadata, {"budget": {"gt": 2500}})
+        assert not matches_metadata(metadata, {"country": {"gte": 1}})
+        assert matches_metadata(metadata, {"country": {"in": ["UG", "KE"]}})
+        assert not matches_metadata(metadata, {"region": {"in": ["east"]}})
+    
+    def test_unknown_operators_are_rejected(self):
+        with pytest.raises(ValidationError):
+            SearchRequest(query="water", metadata_filters={"budget": {"between": [1, 2]}})
+        with pytest.raises(ValidationError):
+            SearchRequest(query="water", metadata_filters={"budget": {"gte": [1]}})
+        with pytest.raises(ValidationError):
+            SearchRequest(query="water", metadata_filters={"country": {"in": []}})
+    
+    def test_facet_request_metadata_filters_are_validated(self):
+        FacetRequest(query="water", filters={"metadata": {"budget": {"gte": 1000}}})
+        with pytest.raises(ValidationError):
+            FacetRequest(query="water", filters={"metadata": {"budget": {"between": [1, 2]}}})
+        with pytest.raises(ValidationError):
+            FacetRequest(query="water", filters={"metadata": ["budget"]})
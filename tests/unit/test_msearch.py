@@ -0,0 +1,111 @@
+"""Unit tests for multi-search."""
+
+import asyncio
+
+import pytest
+
+from app.schemas.search import MultiSearchError, SearchRequest, SearchResponse
+from app.search.cursor import InvalidCursorError
+from app.services import search_service
+from app.services.search_service import SearchService, SearchTimeoutError
+
+
+class FakeSession:
+    """Stands in for a pooled session; the searches below never touch it."""
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *args):
+        return False
+
+
+class TestMultiSearch:
+    """Test fan-out, ordering and the concurrency bound."""
+    
+    async def test_responses_in_request_order_with_bounded_concurrency(self, monkeypatch):
+        running = 0
+        peak = 0
+        sessions = []
+        
+        def session_factory():
+            session = FakeSession()
+            sessions.append(session)
+            return session
+        
+        async def fake_search(self, request, user_id=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            # Later requests finish first
+            await asyncio.sleep(0.01 * (10 - len(request.query)))
+            running -= 1
+            return SearchResponse(
+                query=request.query, results=[], total_count=0,
+                page=1, page_size=20, total_pages=0, execution_time=0.0
+            )
+        
+        monkeypatch.setattr(SearchService, "search", fake_search)
+        monkeypatch.setattr(search_service, "msearch_slots", asyncio.Semaphore(2))
+        
+        queries = ["a", "ab", "abc", "abcd", "abcde"]
+        service = SearchService(None, session_factory=session_factory)
+        responses = await service.msearch([SearchRequest(query=query) for query in queries])
+        
+        assert [response.query for response in responses] == queries
+        assert peak == 2
+        assert len(sessions) == len(queries)
+        
+        # The bound holds across concurrent msearch calls
+        peak = 0
+        await asyncio.gather(*(
+            service.msearch([SearchRequest(query=query) for query in queries])
+            for _ in range(3)
+        ))
+        assert peak == 2
+    
+    async def test_searches_failing_on_their_own_get_an_error_in_place(self, monkeypatch):
+        async def fake_search(self, request, user_id=None):
+            if request.query == "cursor":
+                raise InvalidCursorError("Invalid cursor: bad padding")
+            if request.query == "slow":
+                raise SearchTimeoutError("Search exceeded 5.0s")
+            return SearchResponse(
+                query=request.query, results=[], total_count=0,
+                page=1, page_size=20, total_pages=0, execution_time=0.0
+            )
+        
+        monkeypatch.setattr(SearchService, "search", fake_search)
+        
+        service = SearchService(None, session_factory=FakeSession)
+        responses = await service.msearch([
+            SearchRequest(query=query) for query in ["water", "cursor", "slow"]
+        ])
+        
+        assert responses[0].query == "water"
+        assert responses[1] == MultiSearchError(
+            status=400, type="invalid_cursor", detail="Invalid cursor: bad padding"
+        )
+        assert (responses[2].status, responses[2].type) == (504, "search_timeout")
+    
+    async def test_other_failures_cancel_the_remaining_searches(self, monkeypatch):
+        cancelled = []
+        
+        async def fake_search(self, request, user_id=None):
+            if request.query == "fail":
+                raise RuntimeError("database unavailable")
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(request.query)
+                raise
+        
+        monkeypatch.setattr(SearchService, "search", fake_search)
+        
+        service = SearchService(None, session_factory=FakeSession)
+        with pytest.raises(RuntimeError):
+            await service.msearch([
+                SearchRequest(query=query) for query in ["water", "fail", "wells"]
+            ])
+        
+        assert sorted(cancelled) == ["water", "wells"]
@@ -0,0 +1,99 @@
+"""Unit tests for fetching the result columns of a ranked page."""
+
+import re
+from uuid import uuid4
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.models.search_index import SearchIndex
+from app.schemas.search import SearchRequest
+from app.search.query_parser import parse_query
+from app.services.search_service import SearchService
+
+
+def page_sql(request: SearchRequest) -> str:
+    service = SearchService(None, cache=None)
+    parsed_query = parse_query(request.query, request.language)
+    page = service._apply_sorting(select(SearchIndex.id), request, parsed_query).limit(20)
+    statement = service._page_query(page, request, parsed_query)
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def page_row(content_prefix: str, **columns):
+    return {
+        "sort_key": 0.5, "id": uuid4(), "document_id": uuid4(), "document_type": "project",
+        "title": "Clean water", "language": "en", "metadata": None, "author_name": None,
+        "published_at": None, "content_prefix": content_prefix, **columns,
+    }
+
+
+class TestPageQuery:
+    """Test that only the page rows are joined back, snippeted and highlighted."""
+
+    def test_page_is_joined_back_for_result_columns_only(self):
+        sql = page_sql(SearchRequest(query="water", language="en", highlight=False))
+
+        columns = sql.split(" FROM (", 1)[0]
+        assert "FROM (SELECT search_indexes.id" in sql
+        assert "JOIN search_indexes ON search_indexes.id = page.id" in sql
+        # The content only as a snippet-sized prefix
+        assert columns.count("search_indexes.content") == 1
+        assert "left(search_indexes.content, %(left_1)s) AS content_prefix" in columns
+        assert "ts_headline" not in sql
+        assert sql.rstrip().endswith("ORDER BY page.sort_key DESC, search_indexes.id DESC")
+
+    def test_headlines_are_computed_in_sql(self):
+        sql = page_sql(SearchRequest(query="water", language="en"))
+
+        assert sql.count("ts_headline(") == 2
+        assert "AS highlighted_title" in sql
+        assert re.search(
+            r"ts_headline\(CAST\(%\(param_\d+\)s AS REGCONFIG\), left\(search_indexes\.content", sql
+        )
+
+    def test_python_highlighting_when_sql_highlighting_is_off(self, monkeypatch):
+        monkeypatch.setattr(settings, "SEARCH_SQL_HIGHLIGHT", False)
+
+        assert "ts_headline" not in page_sql(SearchRequest(query="water", language="en"))
+
+
+class TestSnippets:
+    """Test that the content prefix becomes a snippet, marked when truncated."""
+
+    def test_truncated_snippet(self, monkeypatch):
+        monkeypatch.setattr(settings, "SEARCH_SNIPPET_LENGTH", 10)
+        service = SearchService(None, cache=None)
+        request = SearchRequest(query="water", highlight=False)
+
+        long = service._to_search_result(page_row("Clean water"), request, parse_query("water"))
+        short = service._to_search_result(page_row("Clean"), request, parse_query("water"))
+        exact = service._to_search_result(page_row("Clean wate"), request, parse_query("water"))
+
+        assert long.content_snippet == "Clean wate..."
+        assert short.content_snippet == "Clean"
+        assert exact.content_snippet == "Clean wate"
+        assert long.metadata == {}
+
+    def test_sql_headlines_are_used_as_is(self):
+        service = SearchService(None, cache=None)
+        row = page_row(
+            "Clean water", highlighted_title="Clean <mark>water</mark>",
+            highlighted_content="<mark>water</mark> for all"
+        )
+
+        result = service._to_search_result(row, SearchRequest(query="water"), parse_query("water"))
+
+        assert result.highlighted_title == "Clean <mark>water</mark>"
+        assert result.highlighted_content == "<mark>water</mark> for all"
+
+    def test_python_highlighting_marks_the_snippet(self):
+        service = SearchService(None, cache=None)
+
+        result = service._to_search_result(
+            page_row("Water for the village"), SearchRequest(query="water"), parse_query("water")
+        )
+
+        assert result.highlighted_title == "Clean <mark>water</mark>"
+        assert result.highlighted_content == "<mark>Water</mark> for the village"
@@ -0,0 +1,62 @@
+"""Unit tests for the search query parser."""
+
+from app.search.query_parser import parse_query
+
+
+class TestQueryParser:
+    """Test compilation of search input to tsquery syntax."""
+    
+    def test_terms_are_prefix_matched(self):
+        """Test that plain terms are ANDed and prefix-matched."""
+        assert parse_query("water well", "en").tsquery == "water:* & well:*"
+    
+    def test_phrase_and_negation(self):
+        """Test quoted phrases and excluded terms."""
+        parsed = parse_query('"clean water" -drought', "en")
+        
+        assert parsed.tsquery == "(clean <-> water) & !drought"
+        assert parsed.terms == ("clean", "water")
+    
+    def test_or_binds_tighter_than_and(self):
+        """Test that OR groups only its neighbours."""
+        parsed = parse_query("rural school OR clinic", "en")
+        
+        assert parsed.tsquery == "rural:* & (school:* | clinic:*)"
+    
+    def test_stopwords_are_not_expanded(self):
+        """Test that stopwords are dropped instead of prefix-expanded."""
+        assert parse_query("the water of life", "en").tsquery == "water:* & life:*"
+        assert parse_query("the", "en").tsquery == "the"
+    
+    def test_short_terms_are_exact(self):
+        """Test that very short terms are not prefix-expanded."""
+        assert parse_query("ab", "en").tsquery == "ab"
+    
+    def test_punctuation_is_sanitized(self):
+        """Test that tsquery operators in the input cannot break the query."""
+        assert parse_query("a:* & (b | !c", "en").tsquery == "(b | c)"
+        assert parse_query("covid-19", "en").tsquery == "(covid <-> 19)"
+    
+    def test_regconfig_per_language(self):
+        """Test that the language code selects the text search configuration."""
+        assert parse_query("agua", "es").regconfig == "spanish"
+        assert parse_query("agua", "pt").regconfig == "portuguese"
+        assert parse_query("agua", "xx").regconfig == "simple"
+    
+    def test_parses_are_memoized(self):
+        """Test that repeated parses return the cached object."""
+        assert parse_query("mission trip", "en") is parse_query("mission trip", "en")
+    
+    def test_empty_query(self):
+        """Test that input without words yields an empty query."""
+        parsed = parse_query("!!! ???", "en")
+        
+        assert parsed.is_empty
+        assert parsed.tsquery == ""
+    
+    def test_any_word_tsquery_restricts_weights(self):
+        """Test that positive words are ORed with the weight restriction; negations are left out."""
+        parsed = parse_query('"clean water" well -drought')
+        
+        assert parsed.any_word_tsquery("A") == "clean:A | water:A | well:*A"
+        assert parsed.any_word_tsquery() == "clean | water | well:*"
@@ -0,0 +1,118 @@
+"""Unit tests for per-document-type ranking profiles."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models.search_index import DocumentType
+from app.search.query_parser import parse_query
+from app.search.ranking_profiles import RankingProfiles, RecencyDecay, parse_profiles
+
+NOW = datetime(2026, 10, 18, 12, 0)
+
+
+def compile_sql(expression) -> str:
+    return str(select(expression).compile(dialect=postgresql.dialect()))
+
+
+class TestParseProfiles:
+    """Test that profiles are compiled from the settings."""
+
+    def test_types_inherit_the_default(self):
+        profiles = parse_profiles({
+            "default": {"weights": {"A": 1.0, "B": 0.5}, "normalization": 32},
+            "notification": {"decay": {"function": "exp", "scale_days": 7}},
+        })
+
+        assert profiles["default"].weights == (1.0, 0.5, 0.2, 0.1)
+        assert profiles["notification"].weights == (1.0, 0.5, 0.2, 0.1)
+        assert profiles["notification"].normalization == 32
+        assert profiles["notification"].decay == RecencyDecay("exp", 7.0)
+        assert profiles["default"].decay is None
+
+    @pytest.mark.parametrize("config", [
+        {"newsletter": {}},
+        {"default": {"weights": {"E": 0.5}}},
+        {"default": {"weights": {"A": 2.0}}},
+        {"default": {"normalization": 64}},
+        {"article": {"decay": {"function": "step", "scale_days": 7}}},
+        {"article": {"decay": {"scale_days": 0}}},
+    ])
+    def test_rejects_malformed_profiles(self, config):
+        with pytest.raises(ValueError):
+            parse_profiles(config)
+
+
+class TestRecencyDecay:
+    """Test that the decay multiplier falls from 1 to the floor with age."""
+
+    def test_exponential_halves_every_scale(self):
+        decay = RecencyDecay("exp", 10.0)
+
+        assert decay.factor(NOW, NOW) == 1.0
+        assert decay.factor(NOW - timedelta(days=10), NOW) == pytest.approx(0.5)
+        assert decay.factor(NOW - timedelta(days=20), NOW) == pytest.approx(0.25)
+
+    def test_floor_and_undated_documents(self):
+        decay = RecencyDecay("linear", 10.0, floor=0.2)
+
+        assert decay.factor(NOW - timedelta(days=5), NOW) == pytest.approx(0.6)
+        assert decay.factor(NOW - timedelta(days=50), NOW) == pytest.approx(0.2)
+        assert decay.factor(None, NOW) == 0.2
+
+    def test_future_dates_do_not_boost(self):
+        assert RecencyDecay("gauss", 10.0).factor(NOW + timedelta(days=3), NOW) == 1.0
+
+
+class TestSortKey:
+    """Test that profiles compile into the relevance sort key."""
+
+    def setup_method(self):
+        self.profiles = RankingProfiles({
+            "default": {"weights": {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}},
+            "notification": {"decay": {"function": "exp", "scale_days": 7, "floor": 0.1}},
+            "project": {"weights": {"A": 1.0, "B": 0.2, "C": 0.0}, "normalization": 1},
+        })
+        self.parsed = parse_query("water well")
+
+    def test_default_profile_keeps_plain_ts_rank(self):
+        types = [DocumentType.ARTICLE, DocumentType.STORY]
+        key = self.profiles.sort_key("ts_rank", self.parsed, types, NOW)
+        sql = compile_sql(key)
+
+        assert "ts_rank(search_indexes.search_vector" in sql
+        assert "CASE" not in sql
+        assert "published_at" not in sql
+
+    def test_weights_are_passed_as_d_c_b_a(self):
+        key = self.profiles.sort_key("ts_rank_cd", self.parsed, [DocumentType.PROJECT], NOW)
+        params = select(key).compile(dialect=postgresql.dialect()).params
+
+        assert "ts_rank_cd(CAST(ARRAY[" in compile_sql(key)
+        weights = [value for value in params.values() if isinstance(value, float)][:4]
+        assert weights == [0.1, 0.0, 0.2, 1.0]
+        assert 1 in params.values()
+
+    def test_mixed_types_compile_to_one_case(self):
+        key = self.profiles.sort_key("ts_rank", self.parsed, None, NOW)
+        sql = compile_sql(key)
+
+        assert sql.count("CASE") == 1
+        assert sql.count("WHEN") == 2
+        assert "EXTRACT(epoch FROM" in sql
+        assert "ELSE ts_rank(search_indexes.search_vector" in sql
+
+    def test_bm25_only_decays(self):
+        key = self.profiles.sort_key("bm25", self.parsed, [DocumentType.NOTIFICATION], NOW)
+        sql = compile_sql(key)
+
+        assert "search_term_stats" in sql
+        assert "power(" in sql
+        assert "ts_rank" not in sql
+
+    def test_decays(self):
+        assert self.profiles.decays(None)
+        assert self.profiles.decays([DocumentType.NOTIFICATION])
+        assert not self.profiles.decays([DocumentType.ARTICLE, DocumentType.PROJECT])
@@ -0,0 +1,123 @@
+"""Unit tests for the search result cache."""
+
+import pytest
+
+from app.core.cache import InMemoryCacheBackend, SearchCache
+from app.core.config import settings
+from app.models.search_index import DocumentType
+from app.schemas.search import SearchRequest, SearchResponse
+
+
+def make_response(query: str, total_count: int) -> SearchResponse:
+    return SearchResponse(
+        query=query,
+        results=[],
+        total_count=total_count,
+        page=1,
+        page_size=20,
+        total_pages=1 if total_count else 0,
+        execution_time=12.5,
+    )
+
+
+@pytest.fixture
+def cache() -> SearchCache:
+    return SearchCache(InMemoryCacheBackend(), ttl=300, zero_result_ttl=60)
+
+
+class TestSearchCache:
+    """Test caching and invalidation of search responses."""
+    
+    async def test_round_trip(self, cache: SearchCache):
+        """Test that a stored response is returned for the same request."""
+        request = SearchRequest(query="water project")
+        await cache.set_response(request, make_response("water project", 3))
+        
+        cached = await cache.get_response(request)
+        
+        assert cached is not None
+        assert cached.total_count == 3
+    
+    async def test_normalized_query(self, cache: SearchCache):
+        """Test that case, whitespace and type order do not change the key."""
+        first = SearchRequest(
+            query="Water  Project",
+            document_types=[DocumentType.PROJECT, DocumentType.ARTICLE],
+        )
+        second = SearchRequest(
+            query="water project",
+            document_types=[DocumentType.ARTICLE, DocumentType.PROJECT],
+        )
+        
+        assert cache.fingerprint(first) == cache.fingerprint(second)
+    
+    async def test_different_page_misses(self, cache: SearchCache):
+        """Test that pagination is part of the key."""
+        await cache.set_response(SearchRequest(query="water"), make_response("water", 30))
+        
+        assert await cache.get_response(SearchRequest(query="water", page=2)) is None
+    
+    async def test_zero_results_cached(self, cache: SearchCache):
+        """Test that zero-result answers are cached too."""
+        request = SearchRequest(query="nothing matches")
+        await cache.set_response(request, make_response("nothing matches", 0))
+        
+        cached = await cache.get_response(request)
+        
+        assert cached is not None
+        assert cached.total_count == 0
+    
+    async def test_invalidate_document_type(self, cache: SearchCache):
+        """Test that a write to a searched type invalidates the entry."""
+        request = SearchRequest(query="water", document_types=[DocumentType.PROJECT])
+        await cache.set_response(request, make_response("water", 2))
+        
+        await cache.invalidate([DocumentType.PARTNER])
+        assert await cache.get_response(request) is not None
+        
+        await cache.invalidate([DocumentType.PROJECT])
+        assert await cache.get_response(request) is None
+    
+    async def test_unfiltered_search_invalidated_by_any_type(self, cache: SearchCache):
+        """Test that searches across all types see writes to any type."""
+        request = SearchRequest(query="water")
+        await cache.set_response(request, make_response("water", 2))
+        
+        await cache.invalidate([DocumentType.CAMPAIGN])
+        
+        assert await cache.get_response(request) is None
+    
+    async def test_ranking_settings_change_the_key(self, cache: SearchCache, monkeypatch):
+        """Test that results ranked under other profiles or boosts are not shared."""
+        request = SearchRequest(query="water")
+        await cache.set_response(request, make_response("water", 2))
+        
+        monkeypatch.setattr(settings, "SEARCH_RANKING_PROFILES", {"default": {"normalization": 1}})
+        assert await cache.get_response(request) is None
+        
+        monkeypatch.undo()
+        monkeypatch.setattr(settings, "SEARCH_CLICK_BOOSTS_ENABLED", True)
+        assert await cache.get_response(request) is None
+
+
+class TestInMemoryCacheBackend:
+    """Test the bounds of the process-local backend."""
+    
+    async def test_least_recently_used_entries_are_evicted(self):
+        backend = InMemoryCacheBackend(max_entries=2)
+        await backend.set("a", "1", ttl=60)
+        await backend.set("b", "2", ttl=60)
+        await backend.get("a")
+        
+        await backend.set("c", "3", ttl=60)
+        
+        assert await backend.mget(["a", "b", "c"]) == ["1", None, "3"]
+    
+    async def test_counters_are_never_evicted(self):
+        backend = InMemoryCacheBackend(max_entries=1)
+        await backend.incr("generation")
+        
+        await backend.set("a", "1", ttl=60)
+        await backend.set("b", "2", ttl=60)
+        
+        assert await backend.mget(["generation", "a", "b"]) == ["1", None, "2"]
@@ -0,0 +1,151 @@
+"""Unit tests for the streaming NDJSON export."""
+
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints import search as search_endpoints
+from app.core.config import settings
+from app.schemas.search import SearchRequest
+from app.services.search_service import SearchService, export_slots
+
+
+class FakeStreamResult:
+    def __init__(self, batches):
+        self.batches = batches
+    
+    async def partitions(self):
+        for batch in self.batches:
+            yield batch
+
+
+class FakeSession:
+    """Serves canned row batches and records the executed and streamed statements."""
+    
+    def __init__(self, batches):
+        self.batches = batches
+        self.statements = []
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *args):
+        return False
+    
+    @asynccontextmanager
+    async def begin(self):
+        yield
+    
+    async def execute(self, statement):
+        self.statements.append(statement)
+    
+    async def stream(self, statement):
+        self.statements.append(statement)
+        return FakeStreamResult(self.batches)
+
+
+def make_row(title: str):
+    return SimpleNamespace(_mapping={
+        "sort_key": 0.5,
+        "id": uuid4(),
+        "document_id": uuid4(),
+        "document_type": "project",
+        "title": title,
+        "language": "en",
+        "metadata": {},
+        "author_name": None,
+        "published_at": None,
+        "content_prefix": "Clean water for the village",
+    })
+
+
+class TestSearchExport:
+    """Test streaming every match."""
+    
+    async def test_streams_all_rows_as_ndjson(self):
+        session = FakeSession([[make_row("Water 1"), make_row("Water 2")], [make_row("Water 3")]])
+        service = SearchService(None, session_factory=lambda: session)
+        request = SearchRequest(query="water", status="active", page_size=1, highlight=False)
+        
+        lines = "".join([chunk async for chunk in service.export(request)]).splitlines()
+        
+        assert [json.loads(line)["title"] for line in lines] == ["Water 1", "Water 2", "Water 3"]
+        assert str(session.statements[0]) == "SET LOCAL statement_timeout = 120000"
+        statement = session.statements[1]
+        assert statement.get_execution_options()["yield_per"] > 0
+        compiled = statement.compile(dialect=postgresql.dialect())
+        assert "search_indexes.status = " in str(compiled)
+        # One row past SEARCH_EXPORT_MAX_ROWS tells a truncated export, not the page size
+        assert settings.SEARCH_EXPORT_MAX_ROWS + 1 in compiled.params.values()
+        assert 1 not in compiled.params.values()
+    
+    async def test_truncated_export_ends_with_a_trailer(self, monkeypatch):
+        monkeypatch.setattr(settings, "SEARCH_EXPORT_MAX_ROWS", 2)
+        session = FakeSession([[make_row("Water 1")], [make_row("Water 2"), make_row("Water 3")]])
+        service = SearchService(None, session_factory=lambda: session)
+        request = SearchRequest(query="water", highlight=False)
+        
+        lines = "".join([chunk async for chunk in service.export(request)]).splitlines()
+        
+        assert [json.loads(line).get("title") for line in lines[:2]] == ["Water 1", "Water 2"]
+        assert json.loads(lines[2]) == {"truncated": True, "max_rows": 2}
+    
+    async def test_export_of_exactly_max_rows_has_no_trailer(self, monkeypatch):
+        monkeypatch.setattr(settings, "SEARCH_EXPORT_MAX_ROWS", 2)
+        session = FakeSession([[make_row("Water 1"), make_row("Water 2")]])
+        service = SearchService(None, session_factory=lambda: session)
+        request = SearchRequest(query="water", highlight=False)
+        
+        lines = "".join([chunk async for chunk in service.export(request)]).splitlines()
+        
+        assert [json.loads(line)["title"] for line in lines] == ["Water 1", "Water 2"]
+
+
+class TestExportEndpoint:
+    """Test the export slots taken by the endpoint."""
+    
+    @pytest.fixture(autouse=True)
+    def fake_export(self, monkeypatch):
+        async def export(service, request):
+            yield "{}\n"
+        
+        monkeypatch.setattr(SearchService, "export", export)
+    
+    async def test_slot_is_held_until_the_stream_ends(self):
+        free = export_slots._value
+        
+        response = await search_endpoints.export_search(SearchRequest(query="water"), {})
+        
+        assert export_slots._value == free - 1
+        assert [chunk async for chunk in response.body_iterator] == ["{}\n"]
+        assert export_slots._value == free
+        # The background task after the stream does not release it twice
+        await response.background()
+        assert export_slots._value == free
+    
+    async def test_slot_is_released_when_the_stream_never_starts(self):
+        free = export_slots._value
+        
+        response = await search_endpoints.export_search(SearchRequest(query="water"), {})
+        await response.background()
+        
+        assert export_slots._value == free
+    
+    async def test_answers_429_when_every_slot_is_taken(self):
+        responses = [
+            await search_endpoints.export_search(SearchRequest(query="water"), {})
+            for _ in range(settings.SEARCH_EXPORT_CONCURRENCY)
+        ]
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await search_endpoints.export_search(SearchRequest(query="water"), {})
+        
+        assert exc_info.value.status_code == 429
+        for response in responses:
+            await response.background()
+        assert not export_slots.locked()
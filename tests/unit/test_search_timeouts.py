@@ -0,0 +1,132 @@
+"""Unit tests for search statement budgets and degradation."""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from app.core.config import settings
+from app.schemas.search import SearchRequest
+from app.services import search_service as search_service_module
+from app.services.search_service import SearchService, SearchTimeoutError
+from app.services.slow_query_recorder import SlowQueryRecorder
+
+
+class QueryCanceled(Exception):
+    sqlstate = "57014"
+
+
+class FakeTransaction:
+    def __init__(self, session):
+        self.session = session
+    
+    async def rollback(self):
+        self.session.rolled_back += 1
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+    
+    def all(self):
+        return self.rows
+    
+    def scalar_one(self):
+        return 42
+
+
+class FakeSession:
+    """Cancels statements matching ``slow`` like statement_timeout would."""
+    
+    def __init__(self, slow):
+        self.slow = slow
+        self.timeouts = []
+        self.transactions = 0
+        self.rolled_back = 0
+    
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        if sql.startswith("SET LOCAL statement_timeout"):
+            self.timeouts.append(int(sql.rsplit(" ", 1)[1]))
+            return FakeResult([])
+        if self.slow(sql):
+            raise DBAPIError(sql, {}, QueryCanceled())
+        row = {
+            "sort_key": 0.5, "id": uuid4(), "document_id": uuid4(), "document_type": "project",
+            "title": "Water", "language": "en", "metadata": {}, "author_name": None,
+            "published_at": None, "content_prefix": "Clean water", "total_hits": 7,
+        }
+        return FakeResult([SimpleNamespace(_mapping=row)])
+    
+    def in_transaction(self):
+        return False
+    
+    @asynccontextmanager
+    async def begin(self):
+        self.transactions += 1
+        yield FakeTransaction(self)
+
+
+def make_service(slow) -> SearchService:
+    return SearchService(FakeSession(slow), cache=None)
+
+
+class TestSearchTimeouts:
+    """Test that slow counts degrade and slow pages fail fast."""
+    
+    async def execute(self, service, request):
+        return await service._execute_search(request, None, 0.0)
+    
+    async def test_separate_count_timeout_returns_page(self, monkeypatch):
+        monkeypatch.setattr(settings, "SEARCH_SINGLE_ROUNDTRIP", False)
+        service = make_service(lambda sql: "count(*)" in sql)
+        
+        response = await self.execute(service, SearchRequest(query="water"))
+        
+        assert response.timed_out
+        assert len(response.results) == 1
+        assert (response.total_count, response.total_relation) == (1, "gte")
+        assert service.db.timeouts[0] == settings.SEARCH_COUNT_TIMEOUT_SECONDS * 1000
+    
+    async def test_timeout_is_set_once_and_rolled_back(self):
+        service = make_service(lambda sql: False)
+        
+        await self.execute(service, SearchRequest(query="water"))
+        
+        assert len(service.db.timeouts) == 1
+        assert service.db.transactions == service.db.rolled_back == 1
+    
+    async def test_folded_count_timeout_refetches_page_alone(self):
+        service = make_service(lambda sql: "count(*)" in sql)
+        
+        response = await self.execute(service, SearchRequest(query="water"))
+        
+        assert response.timed_out
+        assert len(response.results) == 1
+        assert response.total_relation == "gte"
+    
+    async def test_statements_within_budget_are_not_flagged(self):
+        service = make_service(lambda sql: False)
+        
+        response = await self.execute(service, SearchRequest(query="water"))
+        
+        assert not response.timed_out
+        assert response.total_count == 7
+    
+    async def test_page_timeout_raises(self):
+        service = make_service(lambda sql: "ts_rank" in sql)
+        
+        with pytest.raises(SearchTimeoutError):
+            await self.execute(service, SearchRequest(query="water"))
+    
+    async def test_cancelled_statements_are_recorded(self, monkeypatch):
+        recorder = SlowQueryRecorder(threshold_ms=0, explain_sample_rate=0)
+        monkeypatch.setattr(search_service_module, "slow_query_recorder", recorder)
+        service = make_service(lambda sql: "ts_rank" in sql)
+        
+        with pytest.raises(SearchTimeoutError):
+            await self.execute(service, SearchRequest(query="water"))
+        
+        assert [entry.cancelled for entry in recorder.entries][-1]
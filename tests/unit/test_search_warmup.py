@@ -0,0 +1,147 @@
+"""Unit tests for the startup warm-up and readiness."""
+
+import asyncio
+
+from fastapi.responses import JSONResponse
+
+from app.api.v1.endpoints import health
+from app.schemas.search import SearchRequest, SearchResponse
+from app.services import search_warmup as search_warmup_module
+from app.services.search_service import SearchService
+from app.services.search_warmup import SearchWarmup
+
+
+class FakeSession:
+    """Stands in for a pooled session; the services below never touch it."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeResult:
+    def scalar(self):
+        return 1
+
+
+class FakeDB:
+    async def execute(self, statement):
+        return FakeResult()
+
+
+class FakeCache:
+    """Always has a cached response; records what is stored."""
+
+    def __init__(self):
+        self.stored = []
+
+    async def get_response(self, request):
+        return make_response(total_count=1)
+
+    async def set_response(self, request, response):
+        self.stored.append(response)
+
+
+def make_response(total_count: int) -> SearchResponse:
+    return SearchResponse(
+        query="water", results=[], total_count=total_count, page=1, page_size=20,
+        total_pages=1, execution_time=1.0
+    )
+
+
+def patch_services(monkeypatch, queries, search_delay=0.0, fail=()):
+    """Replace the popular-query lookup, search and autocomplete; returns the calls made."""
+    calls = {"searched": [], "autocompleted": [], "running": 0, "peak": 0}
+
+    async def get_popular_queries(self, limit=20, days=30):
+        return [{"query": query, "count": 1, "avg_results": 1} for query in queries[:limit]]
+
+    async def warm(self, request):
+        calls["running"] += 1
+        calls["peak"] = max(calls["peak"], calls["running"])
+        await asyncio.sleep(search_delay)
+        calls["running"] -= 1
+        if request.query in fail:
+            raise RuntimeError("boom")
+        calls["searched"].append(request.query)
+
+    async def get_suggestions(self, query, language=None, limit=10):
+        calls["autocompleted"].append(query)
+        return []
+
+    module = search_warmup_module
+    monkeypatch.setattr(module.SearchAnalyticsService, "get_popular_queries", get_popular_queries)
+    monkeypatch.setattr(module.SearchService, "warm", warm)
+    monkeypatch.setattr(module.AutoCompleteService, "get_suggestions", get_suggestions)
+    return calls
+
+
+class TestSearchWarmup:
+    """Test that popular queries are replayed with bounded concurrency before ready."""
+
+    async def test_replays_popular_queries(self, monkeypatch):
+        queries = ["water", "wells", "schools", "clinics", "bibles"]
+        calls = patch_services(monkeypatch, queries, search_delay=0.01, fail={"clinics"})
+        warmup = SearchWarmup(session_factory=FakeSession, queries=4, concurrency=2)
+
+        await warmup.start()
+        assert not warmup.ready
+        await warmup._task
+
+        assert warmup.ready
+        assert sorted(calls["searched"]) == ["schools", "water", "wells"]
+        assert calls["peak"] == 2
+        assert warmup.replayed == 3
+        assert warmup.failed == 1
+        assert sorted(calls["autocompleted"]) == ["schools", "water", "wells"]
+
+    async def test_timeout_still_reports_ready(self, monkeypatch):
+        patch_services(monkeypatch, ["water"], search_delay=1.0)
+        warmup = SearchWarmup(session_factory=FakeSession, timeout=0.01)
+
+        await warmup.run()
+
+        assert warmup.ready
+        assert warmup.timed_out
+        assert warmup.replayed == 0
+
+
+class TestWarmSearch:
+    """Test that a replay reaches the database even when its response is cached."""
+
+    async def test_warm_skips_the_cache_read(self, monkeypatch):
+        executed = []
+
+        async def execute_search(self, request, cursor, start_time, deadline=None):
+            executed.append(request.query)
+            return make_response(total_count=2)
+
+        monkeypatch.setattr(SearchService, "_execute_search", execute_search)
+        cache = FakeCache()
+
+        response = await SearchService(None, cache=cache).warm(SearchRequest(query="water"))
+
+        assert executed == ["water"]
+        assert response.total_count == 2
+        assert cache.stored == [response]
+
+
+class TestReadiness:
+    """Test that /ready answers 503 until the warm-up is over."""
+
+    async def test_not_ready_during_warmup(self, monkeypatch):
+        warmup = SearchWarmup()
+        warmup.ready = False
+        monkeypatch.setattr(health, "search_warmup", warmup)
+
+        response = await health.readiness_check(FakeDB())
+
+        assert isinstance(response, JSONResponse)
+        assert response.status_code == 503
+
+        warmup.ready = True
+        checks = await health.readiness_check(FakeDB())
+        assert checks["status"] == "ready"
+        assert checks["checks"]["warmup"] == "complete"
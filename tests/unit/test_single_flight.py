@@ -0,0 +1,130 @@
+"""Unit tests for request coalescing."""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.core.single_flight import SingleFlight
+from app.schemas.search import SearchRequest, SearchResponse
+from app.services import search_service as search_module
+from app.services.search_service import SearchService
+
+
+class FakeSession:
+    """A session opened for the shared execution."""
+    
+    name = "own session"
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *args):
+        return False
+
+
+class TestSingleFlight:
+    """Test sharing of in-flight calls."""
+    
+    async def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+        
+        async def work(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key.upper()
+        
+        results = await asyncio.gather(
+            *(flight.do(key, lambda key=key: work(key)) for key in ["a", "a", "a", "b"])
+        )
+        
+        assert calls == ["a", "b"]
+        assert [result for result, _ in results] == ["A", "A", "A", "B"]
+        assert [shared for _, shared in results] == [False, True, True, False]
+        assert flight.stats()["coalescing_ratio"] == 0.5
+        assert flight.stats()["in_flight"] == 0
+        
+        # Completed calls are not kept
+        await flight.do("a", lambda: work("a"))
+        assert calls == ["a", "b", "a"]
+    
+    async def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+        
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("database unavailable")
+        
+        results = await asyncio.gather(
+            flight.do("a", fail), flight.do("a", fail), return_exceptions=True
+        )
+        
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+
+class TestSearchCoalescing:
+    """Test that searches share executions but not responses or analytics."""
+    
+    async def test_identical_searches_share_one_execution(self, monkeypatch):
+        executions = []
+        tracked = []
+        
+        async def fake_execute(self, request, cursor, start_time):
+            executions.append((request.query, self.db.name))
+            await asyncio.sleep(0.01)
+            return SearchResponse(
+                query=request.query, results=[], total_count=3,
+                page=1, page_size=20, total_pages=1, execution_time=1.0
+            )
+        
+        async def fake_track(self, request, response, user_id):
+            tracked.append((request.query, user_id))
+        
+        monkeypatch.setattr(SearchService, "_execute_search", fake_execute)
+        monkeypatch.setattr(SearchService, "_track_search", fake_track)
+        monkeypatch.setattr(search_module, "search_flight", SingleFlight())
+        
+        responses = await asyncio.gather(
+            SearchService(None, session_factory=FakeSession).search(
+                SearchRequest(query="Clean water"), "user-1"
+            ),
+            SearchService(None, session_factory=FakeSession).search(
+                SearchRequest(query="clean  water"), "user-2"
+            ),
+        )
+        
+        assert executions == [("Clean water", "own session")]
+        assert [response.query for response in responses] == ["Clean water", "clean  water"]
+        assert responses[0] is not responses[1]
+        assert tracked == [("Clean water", "user-1"), ("clean  water", "user-2")]
+    
+    async def test_leader_cancellation_does_not_fail_followers(self, monkeypatch):
+        """The shared execution runs on its own session, so the leader can go away."""
+        async def fake_execute(self, request, cursor, start_time):
+            await asyncio.sleep(0.02)
+            assert self.db.name == "own session"
+            return SearchResponse(
+                query=request.query, results=[], total_count=1,
+                page=1, page_size=20, total_pages=1, execution_time=1.0
+            )
+        
+        async def fake_track(self, request, response, user_id):
+            pass
+        
+        monkeypatch.setattr(SearchService, "_execute_search", fake_execute)
+        monkeypatch.setattr(SearchService, "_track_search", fake_track)
+        monkeypatch.setattr(search_module, "search_flight", SingleFlight())
+        
+        leader = asyncio.create_task(
+            SearchService(SimpleNamespace(name="leader"), session_factory=FakeSession).search(
+                SearchRequest(query="water")
+            )
+        )
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(
+            SearchService(None, session_factory=FakeSession).search(SearchRequest(query="water"))
+        )
+        await asyncio.sleep(0.005)
+        leader.cancel()
+        
+        response = await follower
+        assert response.total_count == 1
@@ -0,0 +1,86 @@
+"""Unit tests for the slow-query recorder."""
+
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models.search_index import SearchIndex
+from app.services.slow_query_recorder import Explain, SlowQueryRecorder
+
+
+class FakeResult:
+    def scalar_one(self):
+        return '[{"Plan": {"Node Type": "Bitmap Heap Scan"}}]'
+
+
+class FakeSession:
+    """Records executed statements and returns a canned plan."""
+    
+    def __init__(self, log):
+        self.log = log
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *args):
+        return False
+    
+    async def execute(self, statement):
+        self.log.append(statement)
+        return FakeResult()
+    
+    async def rollback(self):
+        pass
+
+
+def make_statement():
+    return select(SearchIndex.id).where(SearchIndex.status == "active")
+
+
+class TestSlowQueryRecorder:
+    """Test thresholds, rate limiting and the ring buffer."""
+    
+    async def test_slow_queries_are_explained_once_per_interval(self):
+        log = []
+        recorder = SlowQueryRecorder(
+            session_factory=lambda: FakeSession(log),
+            threshold_ms=100,
+            explain_interval=60,
+            capacity=2
+        )
+        
+        assert recorder.observe("search", make_statement(), 50, "water") is None
+        first = recorder.observe(
+            "search", make_statement(), 150, "  Clean   WATER ", {"status": "active"}
+        )
+        second = recorder.observe("search", make_statement(), 200, "well")
+        recorder.observe("autocomplete", make_statement(), 300, "wel")
+        await asyncio.sleep(0)
+        await asyncio.gather(*recorder._tasks)
+        
+        assert first.query_text == "clean water"
+        assert "'active'" in first.sql
+        assert first.explain_status == "done"
+        assert first.plan[0]["Plan"]["Node Type"] == "Bitmap Heap Scan"
+        assert second.explain_status == "skipped"
+        assert [entry["kind"] for entry in recorder.list()] == ["autocomplete", "search"]
+        assert recorder.stats()["recorded"] == 3
+        assert isinstance(log[1], Explain)
+    
+    def test_explain_wraps_the_statement(self):
+        sql = str(Explain(make_statement()).compile(dialect=postgresql.dialect()))
+        
+        assert sql.startswith("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT search_indexes.id")
+    
+    async def test_cancelled_statements_are_only_planned(self):
+        log = []
+        recorder = SlowQueryRecorder(session_factory=lambda: FakeSession(log), threshold_ms=100)
+        
+        entry = recorder.observe("search", make_statement(), 5000, "water", cancelled=True)
+        await asyncio.gather(*recorder._tasks)
+        
+        assert entry.cancelled
+        assert entry.explain_status == "done"
+        sql = str(log[1].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
@@ -0,0 +1,220 @@
+"""Unit tests for the symmetric-delete spelling dictionary and corrector."""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from app.search.query_parser import parse_query
+from app.search.symspell import SymSpellDictionary, edit_distance
+from app.services.spelling_corrector import LEXICON_QUERY, SpellingCorrector
+
+
+def build_dictionary(**counts) -> SymSpellDictionary:
+    dictionary = SymSpellDictionary(max_edit_distance=2, prefix_length=7)
+    for word, count in counts.items():
+        dictionary.add(word, count)
+    return dictionary
+
+
+class TestEditDistance:
+    """Test that the bounded optimal string alignment distance is exact within the bound."""
+    
+    @pytest.mark.parametrize("source,target,distance", [
+        ("water", "water", 0),
+        ("watr", "water", 1),
+        ("wtaer", "water", 1),  # Transposition
+        ("wader", "water", 1),
+        ("wadr", "water", 2),
+    ])
+    def test_distances(self, source, target, distance):
+        assert edit_distance(source, target, 2) == distance
+    
+    def test_stops_past_bound(self):
+        assert edit_distance("school", "clinic", 2) == 3
+
+
+class TestSymSpellDictionary:
+    """Test that lookups find close words, nearest and most frequent first."""
+    
+    def test_known_word_is_its_own_suggestion(self):
+        dictionary = build_dictionary(water=10)
+        
+        assert [s.term for s in dictionary.lookup("water")] == ["water"]
+        assert dictionary.lookup("water")[0].distance == 0
+    
+    def test_typos_within_distance(self):
+        dictionary = build_dictionary(water=10, wader=1, school=5)
+        
+        suggestions = dictionary.lookup("watr")
+        
+        assert [(s.term, s.distance) for s in suggestions] == [("water", 1), ("wader", 2)]
+    
+    def test_ties_prefer_frequent_words(self):
+        dictionary = build_dictionary(well=3, wall=9)
+        
+        assert [s.term for s in dictionary.lookup("wbll")] == ["wall", "well"]
+    
+    def test_long_words_past_prefix(self):
+        dictionary = build_dictionary(construction=4)
+        
+        assert dictionary.lookup("constructoin")[0].term == "construction"
+        assert dictionary.lookup("cnstructon", max_distance=1) == []
+    
+    def test_adding_known_word_adds_count(self):
+        dictionary = build_dictionary(water=1)
+        dictionary.add("water", 2)
+        
+        assert dictionary.words == {"water": 3}
+        assert len(dictionary) == 1
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+    
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Stems the looked up words with a canned stemmer."""
+    
+    def __init__(self, stems):
+        self.stems = stems
+        self.looked_up = []
+    
+    async def execute(self, statement, params=None):
+        words = [
+            value for value in statement.compile().params.values() if isinstance(value, list)
+        ][0]
+        self.looked_up.extend(words)
+        return FakeResult([
+            SimpleNamespace(word=word, lexemes=[self.stems.get(word, word)])
+            for word in words
+        ])
+
+
+class TestSpellingCorrector:
+    """Test that queries get their unknown words respelled with indexed words."""
+    
+    def make_corrector(self, surface_forms, **counts) -> SpellingCorrector:
+        corrector = SpellingCorrector(min_word_length=4)
+        corrector.dictionary = build_dictionary(**counts)
+        corrector.lexemes = set(surface_forms)
+        corrector.surface_forms = surface_forms
+        corrector.ready = True
+        return corrector
+    
+    async def test_did_you_mean_keeps_query_syntax(self):
+        corrector = self.make_corrector({"water": "water", "well": "well"}, water=10, well=4)
+        
+        parsed_query = parse_query('"Watr well" -drought')
+        did_you_mean = await corrector.did_you_mean(FakeSession({}), parsed_query)
+        
+        assert did_you_mean == '"water well" -drought'
+    
+    async def test_known_and_short_words_are_left(self):
+        corrector = self.make_corrector({"water": "water", "well": "well"}, water=10, well=4)
+        session = FakeSession({})
+        
+        assert await corrector.did_you_mean(session, parse_query("water wel")) is None
+        assert session.looked_up == []
+    
+    async def test_inflections_of_indexed_words_are_known(self):
+        """Words are known by their lexeme, so they are never respelled to a stem."""
+        corrector = self.make_corrector(
+            {"communiti": "community", "garden": "garden"}, community=6, garden=3
+        )
+        session = FakeSession({"gardens": "garden", "communities": "communiti"})
+        
+        assert await corrector.did_you_mean(session, parse_query("community gardens")) is None
+        assert await corrector.did_you_mean(session, parse_query("communities")) is None
+        assert session.looked_up == ["gardens", "communities"]
+    
+    async def test_suggestions_are_surface_words(self):
+        corrector = self.make_corrector(
+            {"communiti": "community", "garden": "garden"}, community=6, garden=3
+        )
+        
+        did_you_mean = await corrector.did_you_mean(FakeSession({}), parse_query("comunity gardn"))
+        
+        assert did_you_mean == "community garden"
+    
+    async def test_corrections_list_suggestions(self):
+        corrector = self.make_corrector(
+            {"school": "school", "schola": "schola"}, school=5, schola=1
+        )
+        
+        corrections = await corrector.corrections(FakeSession({}), parse_query("schol"))
+        
+        assert [s.term for s in corrections["schol"]] == ["school", "schola"]
+
+
+class LexiconSession:
+    """Answers ts_stat with ``lexicon`` and the title words with ``titles``."""
+    
+    def __init__(self, lexicon, titles):
+        self.lexicon = lexicon
+        self.titles = titles
+        self.statements = []
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *args):
+        return False
+    
+    def in_transaction(self):
+        return False
+    
+    @asynccontextmanager
+    async def begin(self):
+        yield self
+    
+    async def rollback(self):
+        pass
+    
+    async def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        if statement is LEXICON_QUERY:
+            return FakeResult(list(self.lexicon.items()))
+        if str(statement).startswith("SET LOCAL"):
+            return FakeResult([])
+        return FakeResult(self.titles)
+
+
+class TestSpellingDictionaryLoad:
+    """Test that the dictionary is built from the indexed lexemes."""
+    
+    async def test_lexemes_are_suggested_as_title_words(self):
+        session = LexiconSession(
+            {"communiti": 6, "garden": 1, "irrig": 4},
+            [
+                ("community", "communiti", 2),
+                ("communities", "communiti", 1),
+                ("garden", "garden", 1),
+            ]
+        )
+        corrector = SpellingCorrector(lambda: session, min_count=2, load_timeout=60)
+        
+        await corrector.load()
+        
+        assert session.statements[0] == "SET LOCAL statement_timeout = 60000"
+        assert corrector.dictionary.words == {"community": 6}
+        assert corrector.surface_forms == {"communiti": "community", "garden": "garden"}
+        assert corrector.lexemes == {"communiti", "garden", "irrig"}
+        assert corrector.ready
+    
+    async def test_start_does_not_wait_for_the_build(self):
+        built = []
+        corrector = SpellingCorrector(lambda: None)
+        
+        async def load():
+            built.append(True)
+        
+        corrector.load = load
+        await corrector.start()
+        
+        assert built == []
+        await corrector.stop()
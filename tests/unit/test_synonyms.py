@@ -0,0 +1,159 @@
+"""Unit tests for synonym rules and their expansion into queries."""
+
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.core.cache import InMemoryCacheBackend, SearchCache
+from app.models.search_index import DocumentType
+from app.search.query_parser import parse_query
+from app.search.synonyms import SynonymDictionary, parse_synonym_rules, synonym_dictionary
+from app.services import synonym_loader as synonym_loader_module
+from app.services.synonym_loader import SynonymLoader
+
+
+@pytest.fixture
+def synonyms():
+    """Install rules in the shared dictionary for the test."""
+    previous = synonym_dictionary.mapping
+    
+    def install(*rules):
+        synonym_dictionary.replace(parse_synonym_rules((rule, None) for rule in rules))
+    
+    yield install
+    synonym_dictionary.replace(previous)
+
+
+class TestParseSynonymRules:
+    """Test that Solr-format rules compile to phrase expansions."""
+    
+    def test_equivalent_terms_expand_to_each_other(self):
+        mapping = parse_synonym_rules([("NGO, non-profit, ministry  # comment", None)])
+        
+        assert mapping[None][("ngo",)] == (("non", "profit"), ("ministry",))
+        assert mapping[None][("non", "profit")] == (("ngo",), ("ministry",))
+    
+    def test_explicit_mapping_is_one_way(self):
+        mapping = parse_synonym_rules([
+            ("unicef => unicef, united nations children's fund", "english")
+        ])
+        
+        expansion = ("united", "nations", "children", "s", "fund")
+        assert mapping["english"] == {("unicef",): (expansion,)}
+    
+    def test_rules_merge(self):
+        mapping = parse_synonym_rules([("ngo, ministry", None), ("ngo, mission", None)])
+        
+        assert mapping[None][("ngo",)] == (("ministry",), ("mission",))
+    
+    def test_malformed_rule(self):
+        with pytest.raises(ValueError):
+            parse_synonym_rules([("ngo => ", None)])
+    
+    def test_replace_bumps_version_on_change_only(self):
+        dictionary = SynonymDictionary()
+        mapping = parse_synonym_rules([("ngo, ministry", None)])
+        
+        assert dictionary.replace(mapping)
+        assert not dictionary.replace(parse_synonym_rules([("ngo, ministry", None)]))
+        assert dictionary.version == 1
+
+
+class TestSynonymExpansion:
+    """Test that the parser expands unquoted positive terms into OR groups."""
+    
+    def test_term_becomes_or_group(self, synonyms):
+        synonyms("ngo, non-profit, mission")
+        
+        tsquery = parse_query("ngo water", "en").tsquery
+        assert tsquery == "(ngo:* | non <-> profit | mission) & water:*"
+    
+    def test_quoted_and_negated_terms_are_not_expanded(self, synonyms):
+        synonyms("ngo, mission")
+        
+        assert parse_query('"ngo" -ngo', "en").tsquery == "ngo & !ngo"
+    
+    def test_expansion_joins_explicit_or(self, synonyms):
+        synonyms("ngo, mission")
+        
+        assert parse_query("school OR ngo", "en").tsquery == "(school:* | ngo:* | mission)"
+    
+    def test_reload_takes_effect_despite_parse_cache(self, synonyms):
+        assert parse_query("ngo", "en").tsquery == "ngo:*"
+        
+        synonyms("ngo, mission")
+        
+        assert parse_query("ngo", "en").tsquery == "(ngo:* | mission)"
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+    
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+    
+    async def execute(self, statement):
+        return FakeResult(self.rows)
+
+
+def session_factory(rows):
+    @asynccontextmanager
+    async def factory():
+        yield FakeSession(rows)
+    return factory
+
+
+class TestSynonymLoader:
+    """Test that rules load from the file and the table."""
+    
+    async def test_loads_file_and_table(self, tmp_path):
+        path = tmp_path / "synonyms.txt"
+        path.write_text("# Organizations\nngo, mission\n")
+        dictionary = SynonymDictionary()
+        loader = SynonymLoader(
+            dictionary, session_factory([("ministerio, misión", "es")]), path=str(path)
+        )
+        
+        assert await loader.load()
+        
+        assert dictionary.expand("english", ("ngo",)) == (("mission",),)
+        assert dictionary.expand("spanish", ("ministerio",)) == (("misión",),)
+        assert dictionary.expand("english", ("ministerio",)) == ()
+        assert loader.stats()["rules"] == 3
+    
+    async def test_malformed_rules_keep_current_expansions(self, tmp_path):
+        path = tmp_path / "synonyms.txt"
+        path.write_text("ngo, mission\n")
+        dictionary = SynonymDictionary()
+        loader = SynonymLoader(dictionary, session_factory([]), path=str(path))
+        await loader.load()
+        
+        path.write_text("ngo =>\n")
+        
+        assert not await loader.load()
+        assert dictionary.expand("english", ("ngo",)) == (("mission",),)
+    
+    async def test_cache_is_invalidated_only_when_rules_change(self, tmp_path, monkeypatch):
+        """A restart with the same rules keeps the shared cache."""
+        cache = SearchCache(InMemoryCacheBackend())
+        monkeypatch.setattr(synonym_loader_module, "get_search_cache", lambda: cache)
+        path = tmp_path / "synonyms.txt"
+        path.write_text("ngo, mission\n")
+        generation = cache._generation_key(DocumentType.PROJECT)
+        
+        await SynonymLoader(SynonymDictionary(), session_factory([]), path=str(path)).load()
+        assert await cache.backend.get(generation) == "1"
+        
+        # Restarted worker, same rules
+        await SynonymLoader(SynonymDictionary(), session_factory([]), path=str(path)).load()
+        assert await cache.backend.get(generation) == "1"
+        
+        path.write_text("ngo, mission, ministry\n")
+        await SynonymLoader(SynonymDictionary(), session_factory([]), path=str(path)).load()
+        assert await cache.backend.get(generation) == "2"
@@ -0,0 +1,40 @@
+"""Unit tests for search stage timing."""
+
+import time
+
+from app.core.timing import Histogram, StageTimer
+
+
+class TestStageTimer:
+    """Test stage accumulation and reporting."""
+    
+    def test_nested_stages_are_exclusive(self):
+        timer = StageTimer()
+        with timer.stage("hydrate"):
+            with timer.stage("highlight"):
+                time.sleep(0.02)
+        
+        assert timer.timings["highlight"] >= 20
+        assert timer.timings["hydrate"] < 20
+    
+    def test_repeated_stages_accumulate(self):
+        timer = StageTimer()
+        timer.add("count", 1.5)
+        timer.add("count", 2.0)
+        timer.add("fetch", 4.25)
+        
+        assert timer.timings == {"count": 3.5, "fetch": 4.25}
+        assert timer.server_timing() == "count;dur=3.500, fetch;dur=4.250"
+
+
+class TestHistogram:
+    """Test bucketing."""
+    
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram(bounds=(1, 10))
+        for value in (0.5, 1, 5, 50):
+            histogram.observe(value)
+        
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 4
+        assert snapshot["buckets"] == {"1": 2, "10": 3, "+Inf": 4}
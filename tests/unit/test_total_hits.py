@@ -0,0 +1,157 @@
+"""Unit tests for counting matches alongside the page."""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.schemas.search import SearchRequest
+from app.services.search_service import SearchService
+
+
+class FakeTransaction:
+    async def rollback(self):
+        pass
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+    def scalar_one(self):
+        return self.rows
+
+
+def page_row(total_hits=None):
+    row = {
+        "sort_key": 0.5, "id": uuid4(), "document_id": uuid4(), "document_type": "project",
+        "title": "Water", "language": "en", "metadata": {}, "author_name": None,
+        "published_at": None, "content_prefix": "Clean water",
+    }
+    if total_hits is not None:
+        row["total_hits"] = total_hits
+    return SimpleNamespace(_mapping=row)
+
+
+class FakeSession:
+    """Answers counts with ``count`` and pages with ``page_size`` rows, keeping the SQL."""
+
+    def __init__(self, count=7, page_size=1):
+        self.count = count
+        self.page_size = page_size
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        if sql.startswith("SET LOCAL"):
+            return FakeResult([])
+        self.statements.append(sql)
+        if sql.startswith("SELECT count(*) AS count_1"):
+            return FakeResult(self.count)
+        total_hits = self.count if "total_hits" in sql else None
+        return FakeResult([page_row(total_hits) for _ in range(self.page_size)])
+
+    def in_transaction(self):
+        return False
+
+    @asynccontextmanager
+    async def begin(self):
+        yield FakeTransaction()
+
+
+async def search(session: FakeSession, **fields):
+    service = SearchService(session, cache=None)
+    return await service._execute_search(SearchRequest(query="water", **fields), None, 0.0)
+
+
+class TestTotalHits:
+    """Test how far matches are counted and how the count is fetched."""
+
+    def test_total_hits_limit(self, monkeypatch):
+        service = SearchService(None, cache=None)
+
+        assert service._total_hits_limit(SearchRequest(query="water")) is None
+        assert service._total_hits_limit(SearchRequest(query="water", track_total_hits=False)) == 0
+        assert service._total_hits_limit(SearchRequest(query="water", track_total_hits=500)) == 500
+
+        monkeypatch.setattr(settings, "SEARCH_TRACK_TOTAL_HITS", 10000)
+        assert service._total_hits_limit(SearchRequest(query="water")) == 10000
+        exact = SearchRequest(query="water", track_total_hits=True)
+        assert service._total_hits_limit(exact) is None
+
+    @pytest.mark.parametrize("total_hits,hits_limit,rows_seen,expected", [
+        (7, None, 1, (7, "eq")),
+        (100, 100, 20, (100, "eq")),
+        (101, 100, 20, (100, "gte")),
+        (None, 0, 20, (20, "gte")),
+    ])
+    def test_resolve_total(self, total_hits, hits_limit, rows_seen, expected):
+        service = SearchService(None, cache=None)
+
+        assert service._resolve_total(total_hits, hits_limit, rows_seen) == expected
+
+    async def test_exact_count_is_a_window_over_the_page(self):
+        session = FakeSession(count=7)
+
+        response = await search(session)
+
+        assert len(session.statements) == 1
+        assert "count(*) OVER () AS total_hits" in session.statements[0]
+        assert (response.total_count, response.total_relation) == (7, "eq")
+
+    async def test_capped_count_reads_one_row_past_the_limit(self):
+        session = FakeSession(count=6)
+
+        response = await search(session, track_total_hits=5)
+
+        assert len(session.statements) == 1
+        sql = session.statements[0]
+        assert "OVER ()" not in sql
+        assert "(SELECT count(*) AS count_1" in sql
+        assert (response.total_count, response.total_relation) == (5, "gte")
+
+    async def test_skipped_count(self):
+        session = FakeSession(page_size=2)
+
+        response = await search(session, track_total_hits=False)
+
+        assert "count(*)" not in session.statements[0]
+        assert (response.total_count, response.total_relation) == (2, "gte")
+
+    async def test_separate_count_without_single_roundtrip(self, monkeypatch):
+        monkeypatch.setattr(settings, "SEARCH_SINGLE_ROUNDTRIP", False)
+        session = FakeSession(count=7)
+
+        response = await search(session)
+
+        count, page = session.statements
+        assert count.startswith("SELECT count(*) AS count_1")
+        assert "total_hits" not in page
+        assert (response.total_count, response.total_relation) == (7, "eq")
+
+    async def test_page_past_the_end_is_counted_separately(self):
+        session = FakeSession(count=7, page_size=0)
+
+        response = await search(session, page=3, page_size=5)
+
+        assert len(session.statements) == 2
+        assert session.statements[1].startswith("SELECT count(*) AS count_1")
+        assert (response.total_count, response.total_relation) == (7, "eq")
+
+    async def test_matches_past_the_rank_window_are_counted(self):
+        session = FakeSession(count=250)
+
+        response = await search(session, two_phase=True, rank_candidates=100)
+
+        assert len(session.statements) == 1
+        sql = session.statements[0]
+        assert "OVER ()" not in sql
+        assert "(SELECT count(*) AS count_1" in sql
+        assert (response.total_count, response.total_relation) == (250, "eq")
+        assert response.rank_truncated is True
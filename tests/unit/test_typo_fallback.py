@@ -0,0 +1,133 @@
+"""Unit tests for the typo-tolerant fallback of zero-result searches."""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy.exc import DBAPIError
+
+from app.core.config import settings
+from app.schemas.search import SearchRequest
+from app.services.search_service import SearchService
+from app.services.spelling_corrector import spelling_corrector
+
+
+class QueryCanceled(Exception):
+    sqlstate = "57014"
+
+
+class FakeTransaction:
+    async def rollback(self):
+        pass
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+    
+    def all(self):
+        return self.rows
+
+
+def page_row(title: str, sort_key: float = 0.5):
+    return SimpleNamespace(_mapping={
+        "sort_key": sort_key, "id": uuid4(), "document_id": uuid4(), "document_type": "project",
+        "title": title, "language": "en", "metadata": {}, "author_name": None,
+        "published_at": None, "content_prefix": title, "total_hits": 1,
+    })
+
+
+class FakeSession:
+    """Answers full-text pages in turn, dictionary lookups and title similarity searches."""
+    
+    def __init__(self, pages, corrections=None, titles=None, slow_titles=False):
+        self.pages = list(pages)
+        self.corrections = corrections or {}
+        self.titles = titles or []
+        self.slow_titles = slow_titles
+        self.statements = []
+        self.params = []
+    
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        self.params.append(statement.compile().params if hasattr(statement, "compile") else params)
+        if sql.startswith("SET LOCAL"):
+            return FakeResult([])
+        if "search_term_stats" in sql:
+            return FakeResult([
+                SimpleNamespace(word=word, correction=correction)
+                for word, correction in self.corrections.items()
+            ])
+        if "word_similarity" in sql:
+            if self.slow_titles:
+                raise DBAPIError(sql, {}, QueryCanceled())
+            return FakeResult([page_row(title, 0.7) for title in self.titles])
+        return FakeResult(self.pages.pop(0) if self.pages else [])
+    
+    def in_transaction(self):
+        return False
+    
+    @asynccontextmanager
+    async def begin(self):
+        yield FakeTransaction()
+
+
+async def search(session: FakeSession, query: str):
+    service = SearchService(session, cache=None)
+    return await service._cached_search(SearchRequest(query=query), None, 0.0)
+
+
+class TestTypoFallback:
+    """Test that searches matching nothing are retried with typos tolerated."""
+    
+    async def test_corrected_query_is_searched_and_reported(self, monkeypatch):
+        """The lexeme is searched, its indexed surface word is reported."""
+        monkeypatch.setattr(spelling_corrector, "surface_forms", {"communiti": "community"})
+        session = FakeSession(
+            pages=[[], [page_row("Community center")]], corrections={"comunity": "communiti"}
+        )
+        
+        response = await search(session, "Comunity center")
+        
+        assert response.query == "Comunity center"
+        assert response.corrected_query == "community center"
+        assert response.typo_fallback == "corrected"
+        assert [result.title for result in response.results] == ["Community center"]
+        assert response.next_cursor is None
+        assert any("communiti" in str(params) for params in session.params)
+    
+    async def test_title_similarity_when_nothing_to_correct(self):
+        session = FakeSession(pages=[[]], titles=["Comunity garden"])
+        
+        response = await search(session, "comunity gardn")
+        
+        assert response.corrected_query is None
+        assert response.typo_fallback == "title_similarity"
+        assert response.results[0].relevance_score == 0.7
+        assert any("word_similarity_threshold = 0.5" in sql for sql in session.statements)
+    
+    async def test_fallback_timeout_returns_empty_response(self):
+        session = FakeSession(pages=[[]], slow_titles=True)
+        
+        response = await search(session, "comunity gardn")
+        
+        assert response.total_count == 0
+        assert response.typo_fallback is None
+    
+    async def test_short_words_are_not_retried(self):
+        session = FakeSession(pages=[[]])
+        
+        response = await search(session, "abc")
+        
+        assert response.typo_fallback is None
+        assert len(session.statements) == 2  # statement_timeout and the search
+    
+    async def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(settings, "SEARCH_TYPO_FALLBACK", False)
+        session = FakeSession(pages=[[]], titles=["Comunity garden"])
+        
+        response = await search(session, "comunity gardn")
+        
+        assert response.typo_fallback is None
+        assert not any("word_similarity" in sql for sql in session.statements)